@@ -1,21 +1,80 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from database import MedicineDatabase
-from models.pill_recognition import PillRecognitionModel
-from models.adherence_predictor import AdherencePredictor
-from models.interaction_checker import InteractionChecker
+import compression
+import database
+import events
+import fastjson
+import local_auth
+import metrics
+import profiling
+import query_monitor
+from database import MedicineDatabase, DATABASE_URL, replicas
+from models.interaction_checker import knowledge_base_generation
 from datetime import datetime, timedelta
+import gc
 import os
+import json
 import base64
-from flask_apscheduler import APScheduler
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import hashlib
+import hmac
+import threading
+import time
 from notifications import init_notifications
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from sqlalchemy import inspect as sqlalchemy_inspect
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
 
-app = Flask(__name__)
-# Allow CORS for development and the primary production origin
-# For production, we allow any .onrender.com subdomain to handle dynamic URL assignments
-CORS(app, origins=["https://medicine-tracker-ui.onrender.com", "http://localhost:5173"], supports_credentials=True)
+# Routes live on a blueprint so create_app() can build the app around them
+api = Blueprint('api', __name__)
+
+
+class LazyComponent:
+    """
+    A subsystem built on first use, so importing the app does not pay for it
+    Attribute access is forwarded to the built object
+    """
+    
+    def __init__(self, name: str, factory):
+        self.name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+    
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.perf_counter()
+                    self._instance = self._factory()
+                    print(f"Loaded {self.name} in {time.perf_counter() - start:.2f}s")
+        return self._instance
+    
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+
+def _load_pill_model():
+    from models.pill_recognition import PillRecognitionModel
+    return PillRecognitionModel()
+
+def _load_adherence_model():
+    from models.adherence_predictor import AdherencePredictor
+    # A model saved with save_model() if configured
+    model = AdherencePredictor(os.getenv('ADHERENCE_MODEL_PATH'))
+    if not model.is_trained:
+        # Fit on synthetic data now rather than inside the first prediction request
+        model.train([])
+    return model
+
+def _load_interaction_checker():
+    from models.interaction_checker import InteractionChecker
+    # Prebuilt compact knowledge base if configured, otherwise the drug_interactions table
+    checker = InteractionChecker(os.getenv('INTERACTION_KB_PATH') or DATABASE_URL)
+    if PRELOAD_MODELS:
+        checker.freeze()
+    return checker
 
 # Initialize components
 print("Initializing Database...")
@@ -26,41 +85,202 @@ except Exception as e:
     print(f"FAILED to initialize database: {e}")
     raise
 
-print("Initializing ML Models...")
-try:
-    pill_model = PillRecognitionModel()
-    adherence_model = AdherencePredictor()
-    interaction_checker = InteractionChecker()
-    print("ML Models initialized successfully.")
-except Exception as e:
-    print(f"FAILED to initialize ML models: {e}")
-    raise
-
-# Initialize Notifications & Scheduler
-print("Initializing Notifications...")
-notification_engine = init_notifications(db)
-scheduler = APScheduler()
-scheduler.init_app(app)
-scheduler.start()
-
-@scheduler.task('interval', id='check_notifications', minutes=1)
-def check_notifications():
-    with app.app_context():
-        notification_engine.check_and_send_notifications()
-
-print("Notification Scheduler started (every 1 minute).")
+# ML models (numpy, scikit-learn, Pillow) load on first use, or in the background with ML_WARMUP=1.
+# PRELOAD_MODELS=1, set by gunicorn.conf.py, loads them in the gunicorn master instead
+pill_model = LazyComponent('pill recognition model', _load_pill_model)
+adherence_model = LazyComponent('adherence predictor', _load_adherence_model)
+interaction_checker = LazyComponent('interaction checker', _load_interaction_checker)
+ML_WARMUP = os.getenv('ML_WARMUP', '1') == '1'
+PRELOAD_MODELS = os.getenv('PRELOAD_MODELS') == '1'
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', '1') == '1'
+
+def warm_up_models():
+    """Load every ML model so the first requests that need one do not wait for it"""
+    for component in (interaction_checker, adherence_model, pill_model):
+        try:
+            component.get()
+        except Exception as e:
+            print(f"FAILED to load {component.name}: {e}")
+
+def preload_for_fork():
+    """
+    Load every model in the gunicorn master, before the workers are forked
+    The interaction index is frozen into flat arrays, and gc.freeze() moves all
+    loaded objects out of the collector's reach, so the workers' collections
+    and lookups leave the shared pages alone instead of copying them
+    """
+    warm_up_models()
+    db.remove_session()
+    database.dispose_pools()
+    gc.freeze()
+
+def init_worker(app):
+    """Per-worker setup after a fork from a preloaded master"""
+    database.dispose_pools(close=False)
+    if SCHEDULER_ENABLED:
+        _start_scheduler(app)
+
+def set_read_consistency():
+    """
+    Clients may ask for 'strong', 'read-your-writes' or 'eventual' reads with X-Read-Consistency,
+    and send back the X-Last-Write header of their latest write, so any worker keeps them on the primary
+    """
+    try:
+        last_write = float(request.headers.get('X-Last-Write', ''))
+    except ValueError:
+        last_write = None
+    db.set_read_consistency(request.headers.get('X-Read-Consistency'), last_write)
+
+def add_write_marker(response):
+    marker = db.last_write_marker()
+    if marker is not None:
+        response.headers['X-Last-Write'] = f'{marker:.3f}'
+    return response
+
+def fast_jsonify(payload: dict, status: int = 200):
+    """jsonify for payloads holding fastjson RowLists (the large list endpoints)"""
+    return current_app.response_class(fastjson.dumps(payload), status=status, mimetype='application/json')
+
+def remove_db_session(exc):
+    """Each request and scheduler job runs on its own thread-local session; batch sub-requests share the batch's"""
+    if not g.get('batch_shares_session'):
+        db.remove_session()
+
+def start_request_metrics():
+    g.metrics_start = time.perf_counter()
+    g.metrics_tally = metrics.start_query_tally()
+    metrics.http_requests_in_flight.inc()
+
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+def finish_request_metrics(exc):
+    """Latency, status and SQL statements of the request, labelled by its route pattern"""
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    status = 500 if exc is not None else g.pop('metrics_status', 500)
+    queries, db_seconds = metrics.stop_query_tally(g.pop('metrics_tally'))
+    
+    metrics.http_requests_in_flight.dec()
+    metrics.http_requests.inc((route, request.method, str(status)))
+    metrics.http_request_duration.observe(time.perf_counter() - start, (route, request.method))
+    metrics.db_queries_per_request.observe(queries, (route,))
+    metrics.db_time_per_request.observe(db_seconds, (route,))
+
+# Minutes after its scheduled time before a pending dose counts as missed
+MISSED_DOSE_GRACE_MINUTES = int(os.getenv('MISSED_DOSE_GRACE_MINUTES', '60'))
+
+notification_engine = None
+
+def check_notifications(app):
+    with app.app_context(), metrics.scheduler_job_duration.time(('check_notifications',)):
+        try:
+            notification_engine.check_and_send_notifications()
+        except Exception:
+            metrics.scheduler_job_failures.inc(('check_notifications',))
+            raise
+
+def materialize_doses(app):
+    """Create today's and tomorrow's pending dose logs, and those of recent days a run was missed for"""
+    with app.app_context(), metrics.scheduler_job_duration.time(('materialize_doses',)):
+        try:
+            created = db.catch_up_doses()
+            print(f"Materialized {created} dose logs.")
+        except Exception as e:
+            metrics.scheduler_job_failures.inc(('materialize_doses',))
+            print(f"Dose materialization failed: {e}")
+
+def sweep_missed_doses(app):
+    """Mark overdue pending doses as missed"""
+    with app.app_context(), metrics.scheduler_job_duration.time(('sweep_missed_doses',)):
+        try:
+            missed = db.sweep_missed_doses(grace_minutes=MISSED_DOSE_GRACE_MINUTES)
+            if missed:
+                print(f"Marked {missed} overdue doses as missed.")
+        except Exception as e:
+            metrics.scheduler_job_failures.inc(('sweep_missed_doses',))
+            print(f"Missed-dose sweep failed: {e}")
+
+def _start_scheduler(app):
+    from flask_apscheduler import APScheduler
+    
+    scheduler = APScheduler()
+    scheduler.init_app(app)
+    scheduler.add_job('check_notifications', check_notifications, args=(app,), trigger='interval', minutes=1)
+    scheduler.add_job('materialize_doses', materialize_doses, args=(app,), trigger='cron', hour=23, minute=0)
+    # Once at startup too, so days missed while the app was down are caught up
+    scheduler.add_job('materialize_doses_on_start', materialize_doses, args=(app,), trigger='date')
+    scheduler.add_job('sweep_missed_doses', sweep_missed_doses, args=(app,), trigger='interval', minutes=5)
+    scheduler.start()
+    print("Notification Scheduler started (every 1 minute).")
+
+def create_app() -> Flask:
+    """
+    Build the Flask app: routes, CORS, per-request session handling and, with
+    SCHEDULER_ENABLED=1 (the default), the background jobs. The schema is
+    left to migrate.py and the ML models to their first use or warm-up
+    """
+    app = Flask(__name__)
+    # Allow CORS for development and the primary production origin
+    # For production, we allow any .onrender.com subdomain to handle dynamic URL assignments
+    CORS(app, origins=["https://medicine-tracker-ui.onrender.com", "http://localhost:5173"], supports_credentials=True,
+         expose_headers=['X-Last-Write', 'Retry-After'])
+    # Registered first, so it runs after every other after_request hook has set the body and headers
+    compression.init_app(app)
+    app.register_blueprint(api)
+    app.before_request(set_read_consistency)
+    app.after_request(add_write_marker)
+    app.teardown_appcontext(remove_db_session)
+    
+    metrics.instrument_sqlalchemy()
+    app.before_request(start_request_metrics)
+    app.after_request(record_response_status)
+    app.teardown_request(finish_request_metrics)
+    query_monitor.init_app(app)
+    # Registers nothing unless PROFILE_TOKEN or PROFILE_SAMPLE_RATE is set
+    profiling.init_app(app)
+    
+    global notification_engine
+    print("Initializing Notifications...")
+    notification_engine = init_notifications(db)
+    # A preloaded master must not start threads before forking; init_worker() starts the scheduler
+    if PRELOAD_MODELS:
+        return app
+    
+    if SCHEDULER_ENABLED:
+        _start_scheduler(app)
+    if ML_WARMUP:
+        threading.Thread(target=warm_up_models, name='ml-warmup', daemon=True).start()
+    return app
 
 # GOOGLE_CLIENT_ID = "YOUR_GOOGLE_CLIENT_ID.apps.googleusercontent.com"
 # In production, get this from environment variable
 GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
+# Load tests only: also accept tokens signed with this secret (see local_auth.py)
+LOCAL_AUTH_SECRET = os.getenv('LOCAL_AUTH_SECRET')
 
 def get_authenticated_user():
     """Extract and verify Google ID token from Authorization header"""
+    # Batch sub-requests reuse the user the batch request authenticated
+    if 'batch_user' in g:
+        return g.batch_user
+    
     auth_header = request.headers.get('Authorization')
     if not auth_header or not auth_header.startswith('Bearer '):
         return None
     
     token = auth_header.split(' ')[1]
+    if LOCAL_AUTH_SECRET:
+        idinfo = local_auth.verify(token, LOCAL_AUTH_SECRET)
+        if idinfo:
+            return db.get_or_create_user(google_id=idinfo['sub'], email=idinfo['email'], name=idinfo['name'])
+    
+    from google.oauth2 import id_token
+    from google.auth.transport import requests as google_requests
+    
     try:
         # Verify the ID token
         idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), GOOGLE_CLIENT_ID)
@@ -78,7 +298,7 @@ def get_authenticated_user():
 
 # ============= Auth Endpoints =============
 
-@app.route('/api/auth/google', methods=['POST'])
+@api.route('/api/auth/google', methods=['POST'])
 def google_auth():
     """Handle Google Sign-In"""
     user = get_authenticated_user()
@@ -96,7 +316,7 @@ def google_auth():
 
 # ============= Medication Endpoints =============
 
-@app.route('/api/medications', methods=['GET'])
+@api.route('/api/medications', methods=['GET'])
 def get_medications():
     """Get all medications for the authenticated user"""
     user = get_authenticated_user()
@@ -104,12 +324,12 @@ def get_medications():
         return jsonify({'success': False, 'error': 'Unauthorized'}), 401
         
     try:
-        medications = db.get_all_medications(user.id)
-        return jsonify({'success': True, 'medications': medications})
+        medications = db.get_all_medications(user.id, as_rows=True)
+        return fast_jsonify({'success': True, 'medications': medications})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/medications', methods=['POST'])
+@api.route('/api/medications', methods=['POST'])
 def add_medication():
     """Add a new medication for the authenticated user"""
     user = get_authenticated_user()
@@ -133,20 +353,21 @@ def add_medication():
             reminder_minutes=data.get('reminder_minutes', 15)
         )
         
-        # Check for interactions with existing medications
-        all_meds = db.get_all_medications()
-        med_names = [m['name'] for m in all_meds]
-        interactions = interaction_checker.check_interactions(med_names)
+        # Check the new medication against this user's other medications
+        existing_names = db.get_medication_names(user.id, exclude_id=med_id)
+        interactions = interaction_checker.check_new_medication(data['name'], existing_names)
         
         return jsonify({
             'success': True,
             'medication_id': med_id,
             'interactions': interactions
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/medications/<int:med_id>', methods=['GET'])
+@api.route('/api/medications/<int:med_id>', methods=['GET'])
 def get_medication(med_id):
     """Get a specific medication"""
     user = get_authenticated_user()
@@ -162,7 +383,7 @@ def get_medication(med_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/medications/<int:med_id>', methods=['PUT'])
+@api.route('/api/medications/<int:med_id>', methods=['PUT'])
 def update_medication(med_id):
     """Update a medication"""
     user = get_authenticated_user()
@@ -177,10 +398,12 @@ def update_medication(med_id):
             return jsonify({'success': True, 'message': 'Medication updated'})
         else:
             return jsonify({'success': False, 'error': 'Medication not found'}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/medications/<int:med_id>', methods=['DELETE'])
+@api.route('/api/medications/<int:med_id>', methods=['DELETE'])
 def delete_medication(med_id):
     """Delete a medication"""
     user = get_authenticated_user()
@@ -199,7 +422,10 @@ def delete_medication(med_id):
 
 # ============= Medication Logs Endpoints =============
 
-@app.route('/api/logs', methods=['GET'])
+MAX_LOGS_PAGE_SIZE = 1000
+MAX_BULK_ITEMS = 1000
+
+@api.route('/api/logs', methods=['GET'])
 def get_logs():
     """Get medication logs"""
     user = get_authenticated_user()
@@ -211,12 +437,36 @@ def get_logs():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        logs = db.get_medication_logs(user.id, med_id, start_date, end_date)
-        return jsonify({'success': True, 'logs': logs})
+        # Opt-in NDJSON streaming: one log per line, read from a server-side cursor
+        if request.args.get('format') == 'ndjson':
+            rows = db.iter_medication_logs(user.id, med_id, start_date, end_date)
+            return Response(
+                stream_with_context(json.dumps(row) + '\n' for row in rows),
+                mimetype='application/x-ndjson'
+            )
+        
+        # Keyset pagination when a limit or cursor is given
+        if 'limit' in request.args or 'cursor' in request.args:
+            limit = min(max(request.args.get('limit', default=100, type=int), 1), MAX_LOGS_PAGE_SIZE)
+            try:
+                logs, next_cursor = db.get_medication_logs_page(
+                    user.id, med_id, start_date, end_date,
+                    limit=limit,
+                    cursor=request.args.get('cursor'),
+                    as_rows=True
+                )
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            return fast_jsonify({'success': True, 'logs': logs, 'next_cursor': next_cursor})
+        
+        logs = db.get_medication_logs(user.id, med_id, start_date, end_date, as_rows=True)
+        return fast_jsonify({'success': True, 'logs': logs})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/logs', methods=['POST'])
+@api.route('/api/logs', methods=['POST'])
 def log_medication():
     """Log medication intake"""
     user = get_authenticated_user()
@@ -236,10 +486,64 @@ def log_medication():
         )
         
         return jsonify({'success': True, 'log_id': log_id})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api.route('/api/logs/bulk', methods=['POST'])
+def bulk_log_medication():
+    """Log many medication intakes in one transaction"""
+    user = get_authenticated_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+        
+    try:
+        entries = (request.json or {}).get('logs')
+        error = _check_bulk_payload(entries, 'logs')
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        
+        results = db.bulk_log_medications(user.id, entries)
+        return jsonify(_bulk_response(results))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api.route('/api/logs/bulk', methods=['PUT'])
+def bulk_update_logs():
+    """Update the status of many medication logs in one transaction"""
+    user = get_authenticated_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+        
+    try:
+        updates = (request.json or {}).get('updates')
+        error = _check_bulk_payload(updates, 'updates')
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        
+        results = db.bulk_update_log_status(user.id, updates)
+        return jsonify(_bulk_response(results))
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/logs/<int:log_id>', methods=['PUT'])
+def _check_bulk_payload(items, field: str) -> str:
+    if not isinstance(items, list) or not items:
+        return f"'{field}' must be a non-empty list"
+    if len(items) > MAX_BULK_ITEMS:
+        return f'At most {MAX_BULK_ITEMS} items per request'
+    return None
+
+def _bulk_response(results: list) -> dict:
+    failed = sum(1 for result in results if 'error' in result)
+    return {
+        'success': True,
+        'succeeded': len(results) - failed,
+        'failed': failed,
+        'results': [{'index': i, **result} for i, result in enumerate(results)]
+    }
+
+@api.route('/api/logs/<int:log_id>', methods=['PUT'])
 def update_log(log_id):
     """Update medication log status"""
     user = get_authenticated_user()
@@ -259,12 +563,51 @@ def update_log(log_id):
             return jsonify({'success': True, 'message': 'Log updated'})
         else:
             return jsonify({'success': False, 'error': 'Log not found'}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ============= Change Events =============
+
+@api.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Server-sent events for the user's data changes, so clients need not poll
+    The stream opens with `ready` ({"data_version": ...}): refetch then, and
+    on `resync`; apply the other events as deltas. It ends after
+    EVENTS_MAX_STREAM_SECONDS and the client reconnects
+    """
+    user = get_authenticated_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    
+    broker = events.get_broker()
+    if broker.subscriber_count() >= events.EVENTS_MAX_STREAMS:
+        response = jsonify({'success': False, 'error': 'Too many open event streams'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(events.EVENTS_BUSY_RETRY_SECONDS)
+        return response
+    
+    # Subscribed before the version is read, so no change falls between the two
+    subscription = broker.subscribe(user.id)
+    try:
+        ready = {'type': 'ready', 'data_version': db.get_data_version(user.id)}
+    except Exception:
+        broker.unsubscribe(subscription)
+        raise
+    
+    # No stream_with_context: the generator needs no request state, and the
+    # request's DB session is released before the stream starts
+    response = Response(events.stream(subscription, ready), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx would otherwise hold events back
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+    return response
+
 # ============= ML Endpoints =============
 
-@app.route('/api/ml/recognize-pill', methods=['POST'])
+@api.route('/api/ml/recognize-pill', methods=['POST'])
 def recognize_pill():
     """Recognize pill from image using ML"""
     try:
@@ -281,21 +624,28 @@ def recognize_pill():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/ml/predict-adherence', methods=['POST'])
+@api.route('/api/ml/predict-adherence', methods=['POST'])
 def predict_adherence():
     """Predict medication adherence"""
+    user = get_authenticated_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    
     try:
         data = request.json
         medication_id = data.get('medication_id')
         
         # Get medication logs
-        logs = db.get_medication_logs(medication_id)
+        logs = db.get_medication_logs(user.id, medication_id, iso=False)
+        if not logs and not db.get_medication(medication_id, user.id):
+            return jsonify({'success': False, 'error': 'Medication not found'}), 404
         
         # Predict adherence
         prediction = adherence_model.predict_adherence(logs)
         
         # Save prediction
         db.save_ml_prediction(
+            user.id,
             medication_id,
             'adherence',
             prediction['adherence_probability'],
@@ -309,7 +659,7 @@ def predict_adherence():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/ml/check-interactions', methods=['POST'])
+@api.route('/api/ml/check-interactions', methods=['POST'])
 def check_interactions():
     """Check drug interactions"""
     try:
@@ -332,7 +682,7 @@ def check_interactions():
 
 # ============= Analytics Endpoints =============
 
-@app.route('/api/analytics/adherence', methods=['GET'])
+@api.route('/api/analytics/adherence', methods=['GET'])
 def get_adherence_stats():
     """Get adherence statistics"""
     user = get_authenticated_user()
@@ -352,7 +702,7 @@ def get_adherence_stats():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/analytics/dashboard', methods=['GET'])
+@api.route('/api/analytics/dashboard', methods=['GET'])
 def get_dashboard_data():
     """Get dashboard overview data"""
     user = get_authenticated_user()
@@ -360,58 +710,229 @@ def get_dashboard_data():
         return jsonify({'success': False, 'error': 'Unauthorized'}), 401
         
     try:
-        # Get all medications
-        medications = db.get_all_medications(user.id)
-        
-        # Get today's schedule
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_logs = db.get_medication_logs(
-            user.id,
-            start_date=today,
-            end_date=today
-        )
-        
-        # Get adherence stats
-        stats = db.get_adherence_stats(user.id, days=7)
+        # Only the version lookup runs when the client's copy is still current
+        etag = dashboard_etag(user.id, db.get_data_version(user.id))
+        # Weak comparison: compressed copies carry the ETag as W/"..."
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        # Medications, today's doses and 7-day adherence in one query
+        snapshot = db.get_dashboard_snapshot(user.id, week_days=7)
+        medications = snapshot['medications']
         
         # Check interactions
         med_names = [m['name'] for m in medications]
         interactions = interaction_checker.check_interactions(med_names)
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'total_medications': len(medications),
-            'today_doses': len(today_logs),
-            'adherence_rate': stats.get('adherence_rate', 0),
+            'today_doses': snapshot['today_doses'],
+            'adherence_rate': snapshot['adherence_rate'],
             'interactions': interactions,
             'medications': medications[:5]  # Top 5 for quick view
         })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# How long the knowledge base source's fingerprint is reused before it is looked up again
+KB_FINGERPRINT_SECONDS = float(os.getenv('KB_FINGERPRINT_SECONDS', '60'))
+_kb_fingerprint = (0.0, '')
+
+def interaction_kb_fingerprint() -> str:
+    """
+    Identifies the interaction knowledge base's source without loading it: the
+    compact file's path, mtime and size, or the drug_interactions table's row
+    count and highest id. Together with the in-process generation it changes
+    after a deploy or an edit to the source as well as after add_interaction()
+    """
+    global _kb_fingerprint
+    expires, fingerprint = _kb_fingerprint
+    if time.monotonic() >= expires:
+        path = os.getenv('INTERACTION_KB_PATH')
+        if path:
+            try:
+                stat = os.stat(path)
+                fingerprint = f'{path}:{stat.st_mtime_ns}:{stat.st_size}'
+            except OSError:
+                fingerprint = f'{path}:missing'
+        else:
+            count, max_id = db.get_drug_interactions_stamp()
+            fingerprint = f'table:{count}:{max_id}'
+        _kb_fingerprint = (time.monotonic() + KB_FINGERPRINT_SECONDS, fingerprint)
+    return f'{fingerprint}:{knowledge_base_generation()}'
+
+def dashboard_etag(user_id: int, data_version: int) -> str:
+    """The dashboard depends on the user's data, the current day and the interaction knowledge base"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    # Read from the source and a module-level counter, so a 304 never loads the knowledge base
+    key = f'{user_id}:{data_version}:{today}:{interaction_kb_fingerprint()}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
 # ============= Model Info Endpoints =============
 
-@app.route('/api/models/info', methods=['GET'])
+@api.route('/api/models/info', methods=['GET'])
 def get_models_info():
     """Get information about ML models"""
     return jsonify({
         'success': True,
         'pill_recognition': pill_model.get_model_info(),
         'adherence_predictor': adherence_model.get_model_info(),
-        'interaction_checker': interaction_checker.get_database_stats()
+        'interaction_checker': {
+            **interaction_checker.get_database_stats(),
+            'result_cache': interaction_checker.get_cache_stats()
+        }
     })
 
+# ============= Metrics =============
+
+# When set, /api/metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+@api.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request, SQL, scheduler and notification metrics in the Prometheus text format"""
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# ============= Batch Endpoint =============
+
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+# Threads per worker process for running a batch's consecutive GETs side by side
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+# A nested batch, and the event stream, which would hold the batch open
+BATCH_EXCLUDED_PATHS = ('/api/batch', '/api/events')
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+def _get_batch_pool() -> ThreadPoolExecutor:
+    # Created on first use, so a preloaded master forks without these threads
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+        return _batch_pool
+
+def _validate_batch(specs) -> str:
+    """Return an error message for a malformed list of sub-requests, or None"""
+    if not isinstance(specs, list) or not specs:
+        return 'requests must be a non-empty list'
+    if len(specs) > BATCH_MAX_REQUESTS:
+        return f'At most {BATCH_MAX_REQUESTS} requests per batch'
+    for i, spec in enumerate(specs):
+        if not isinstance(spec, dict) or not isinstance(spec.get('path'), str):
+            return f'requests[{i}]: path is required'
+        if not spec['path'].startswith('/api/') or spec['path'].split('?')[0].rstrip('/') in BATCH_EXCLUDED_PATHS:
+            return f'requests[{i}]: path must be an /api/ endpoint other than {" and ".join(BATCH_EXCLUDED_PATHS)}'
+        if str(spec.get('method', 'GET')).upper() not in BATCH_METHODS:
+            return f'requests[{i}]: method must be one of {", ".join(BATCH_METHODS)}'
+        if spec.get('headers') is not None and not isinstance(spec['headers'], dict):
+            return f'requests[{i}]: headers must be an object'
+    return None
+
+def _run_sub_request(app, user, base_url: str, spec: dict, shares_session: bool) -> dict:
+    """
+    Dispatch one sub-request to its view in a fresh app and request context
+    Only the view runs: the batch request's own hooks already cover auth,
+    read consistency and metrics
+    """
+    method = str(spec.get('method', 'GET')).upper()
+    builder = EnvironBuilder(path=spec['path'], base_url=base_url, method=method,
+                             json=spec.get('body'), headers=spec.get('headers') or {})
+    with app.app_context():
+        g.batch_user = user
+        g.batch_shares_session = shares_session
+        with app.request_context(builder.get_environ()):
+            try:
+                response = app.make_response(app.dispatch_request())
+            except HTTPException as e:
+                response = jsonify({'success': False, 'error': e.description})
+                response.status_code = e.code
+            except Exception as e:
+                response = jsonify({'success': False, 'error': str(e)})
+                response.status_code = 500
+            if shares_session and response.status_code >= 500:
+                # A failed write leaves the shared session unusable for the writes after it
+                db.rollback_session()
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            # Read inside the context: streamed bodies are generated here
+            body = response.get_data(as_text=True)
+    
+    metrics.http_batch_subrequests.inc((route, method, str(response.status_code)))
+    result = {'status': response.status_code}
+    if 'id' in spec:
+        result['id'] = spec['id']
+    if response.headers.get('ETag'):
+        result['etag'] = response.headers['ETag']
+    result['body'] = fastjson.RawJSON(body) if response.is_json and body else body
+    return result
+
+@api.route('/api/batch', methods=['POST'])
+def batch():
+    """
+    Run several API calls in one round trip, authenticated once
+    Body: {"requests": [{"id": ..., "method": "GET", "path": "/api/...", "body": {...}, "headers": {...}}]}
+    Returns {"success": true, "responses": [{"id", "status", "etag", "body"}]} in request order.
+    Requests run in order on the batch's DB session, except that consecutive
+    GETs run side by side, each on its own session
+    """
+    user = get_authenticated_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    
+    specs = (request.get_json(silent=True) or {}).get('requests')
+    error = _validate_batch(specs)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    # Load the user's columns and detach it, so no sub-request lazy-loads through another thread's session
+    user.id
+    state = sqlalchemy_inspect(user)
+    if state.session is not None:
+        state.session.expunge(user)
+    
+    app = current_app._get_current_object()
+    base_url = request.host_url
+    responses = []
+    i = 0
+    while i < len(specs):
+        end = i
+        while end < len(specs) and str(specs[end].get('method', 'GET')).upper() == 'GET':
+            end += 1
+        if end - i > 1 and BATCH_WORKERS > 1:
+            # Each GET runs in a copy of this context (read consistency, query tallies) on its own session
+            futures = [_get_batch_pool().submit(copy_context().run, _run_sub_request, app, user, base_url, spec, False)
+                       for spec in specs[i:end]]
+            responses.extend(future.result() for future in futures)
+            i = end
+        else:
+            responses.append(_run_sub_request(app, user, base_url, specs[i], True))
+            i += 1
+    
+    return fast_jsonify({'success': True, 'responses': responses})
+
 # ============= Health Check =============
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'read_replicas': replicas.get_stats() if replicas else None
     })
 
+app = create_app()
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     print("🏥 Medicine Tracker API Server")
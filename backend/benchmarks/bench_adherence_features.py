@@ -0,0 +1,68 @@
+"""
+Benchmark AdherencePredictor.extract_features on ISO strings vs datetimes
+
+Logs read with get_medication_logs(iso=False) carry datetime objects, so
+feature extraction no longer re-parses every timestamp. Reports the mean
+time per call for --logs logs in each representation.
+
+Usage (from backend/):
+    python benchmarks/bench_adherence_features.py [--logs 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.adherence_predictor import AdherencePredictor
+
+
+def make_logs(n: int) -> list:
+    rng = random.Random(42)
+    now = datetime.now().replace(microsecond=0)
+    logs = []
+    for i in range(n):
+        scheduled = now - timedelta(hours=12 * i)
+        status = rng.choice(['taken', 'taken', 'taken', 'missed'])
+        taken = scheduled + timedelta(minutes=rng.randint(-10, 90)) if status == 'taken' else None
+        logs.append({'id': i, 'scheduled_time': scheduled, 'taken_time': taken, 'status': status})
+    return logs
+
+
+def as_iso(logs: list) -> list:
+    return [{**log, 'scheduled_time': log['scheduled_time'].isoformat(),
+             'taken_time': log['taken_time'].isoformat() if log['taken_time'] else None} for log in logs]
+
+
+def timeit(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logs', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    predictor = AdherencePredictor()
+    native = make_logs(args.logs)
+    strings = as_iso(native)
+    now = datetime.now()
+    assert (predictor.extract_features(native, now) == predictor.extract_features(strings, now)).all()
+
+    before = timeit(lambda: predictor.extract_features(strings, now), args.repeat)
+    after = timeit(lambda: predictor.extract_features(native, now), args.repeat)
+
+    print(f"\nextract_features over {args.logs:,} logs")
+    print(f"{'ISO strings':<14}{before * 1e3:>10.2f}ms")
+    print(f"{'datetimes':<14}{after * 1e3:>10.2f}ms{before / after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
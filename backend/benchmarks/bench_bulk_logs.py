@@ -0,0 +1,95 @@
+"""
+Benchmark log ingestion: one log per call vs the bulk methods
+
+Seeds a temporary SQLite database, then writes --logs dose logs one at a
+time (a commit per log, as a client looping over POST /api/logs does) and
+through bulk_log_medications, followed by the same comparison for status
+updates. Reports rows/sec for each path.
+
+Usage (from backend/):
+    python benchmarks/bench_bulk_logs.py [--logs 5000] [--batch 1000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(WORKDIR, "bench.db")}'
+
+from database import MedicineDatabase  # noqa: E402  (needs DATABASE_URL set first)
+
+
+def make_entries(med_ids: list, n: int) -> list:
+    return [{
+        'medication_id': med_ids[i % len(med_ids)],
+        'scheduled_time': f'2024-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00',
+    } for i in range(n)]
+
+
+def chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def rate(n: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logs', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=1000, help='Items per bulk request')
+    parser.add_argument('--medications', type=int, default=20)
+    args = parser.parse_args()
+
+    db = MedicineDatabase()
+    user = db.get_or_create_user('bench_user', 'bench@example.com')
+    med_ids = [db.add_medication(user.id, f'Medication {i}', '10mg', 'daily', ['08:00'], '2024-01-01')
+               for i in range(args.medications)]
+    entries = make_entries(med_ids, args.logs)
+
+    single_ids = []
+    bulk_ids = []
+
+    def single_insert():
+        for entry in entries:
+            single_ids.append(db.log_medication(user.id, entry['medication_id'], entry['scheduled_time']))
+
+    def bulk_insert():
+        for batch in chunks(entries, args.batch):
+            bulk_ids.extend(r['log_id'] for r in db.bulk_log_medications(user.id, batch))
+
+    def single_update():
+        for log_id in single_ids:
+            db.update_log_status(log_id, user.id, 'taken', '2024-01-01T08:05:00')
+
+    def bulk_update():
+        updates = [{'id': log_id, 'status': 'taken', 'taken_time': '2024-01-01T08:05:00'} for log_id in bulk_ids]
+        for batch in chunks(updates, args.batch):
+            db.bulk_update_log_status(user.id, batch)
+
+    rows = [
+        ('insert', rate(args.logs, single_insert), rate(args.logs, bulk_insert)),
+        ('update status', rate(args.logs, single_update), rate(args.logs, bulk_update)),
+    ]
+    assert len(single_ids) == len(bulk_ids) == args.logs
+
+    print(f"\n{args.logs:,} logs, bulk batches of {args.batch:,}")
+    print(f"{'operation':<16}{'one by one':>14}{'bulk':>14}{'speedup':>10}")
+    for name, single, bulk in rows:
+        print(f"{name:<16}{single:>10,.0f}/sec{bulk:>10,.0f}/sec{bulk / single:>9.1f}x")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
@@ -0,0 +1,124 @@
+"""
+Benchmark dose materialization and the missed-dose sweeper
+
+Seeds a temporary SQLite database with --medications medications spread
+over many users, then materializes one day with per-row ORM objects (the
+baseline) and another day with MedicineDatabase.materialize_doses, and
+sweeps each day's pending doses with per-row ORM edits vs the set-based
+sweep_missed_doses. Reports doses/sec.
+
+Usage (from backend/):
+    python benchmarks/bench_dose_schedule.py [--medications 100000] [--times 3]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(WORKDIR, "bench.db")}'
+
+import database  # noqa: E402  (needs DATABASE_URL set first)
+from database import Medication, MedicationLog, MedicineDatabase  # noqa: E402
+
+BASELINE_DAY = date(2024, 3, 1)
+BATCH_DAY = date(2024, 3, 2)
+
+
+def seed(n_meds: int, n_times: int, n_users: int):
+    times = json.dumps([f'{8 + 12 * i // n_times:02d}:00' for i in range(n_times)])
+    database.migrate()
+    conn = database.engine.raw_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO users (google_id, email, created_at, data_version) VALUES (?, ?, '2024-01-01 00:00:00', 0)",
+        [(f'bench_{i}', f'bench_{i}@example.com') for i in range(n_users)]
+    )
+    cursor.executemany(
+        'INSERT INTO medications (name, dosage, frequency, times, start_date, user_id, reminder_minutes, created_at) '
+        "VALUES (?, '10mg', 'daily', ?, '2024-01-01', ?, 15, '2024-01-01 00:00:00')",
+        [(f'Medication {i}', times, 1 + i % n_users) for i in range(n_meds)]
+    )
+    minutes = [int(t[:2]) * 60 + int(t[3:]) for t in json.loads(times)]
+    cursor.executemany(
+        'INSERT INTO medication_dose_times (medication_id, minute_of_day) VALUES (?, ?)',
+        [(1 + i, minute) for i in range(n_meds) for minute in minutes]
+    )
+    conn.commit()
+    conn.close()
+
+
+# Previous approach, kept here as the baseline
+
+def orm_materialize(db: MedicineDatabase, day: date) -> int:
+    day_start = datetime(day.year, day.month, day.day)
+    created = 0
+    for med in db.session.query(Medication).all():
+        existing = {log.scheduled_time for log in db.session.query(MedicationLog).filter(
+            MedicationLog.medication_id == med.id, MedicationLog.scheduled_time >= day_start,
+            MedicationLog.scheduled_time < day_start + timedelta(days=1))}
+        for time_str in json.loads(med.times):
+            hour, minute = map(int, time_str.split(':'))
+            scheduled_time = day_start.replace(hour=hour, minute=minute)
+            if scheduled_time not in existing:
+                db.session.add(MedicationLog(medication_id=med.id, user_id=med.user_id,
+                                             scheduled_time=scheduled_time, status='pending'))
+                created += 1
+    db.session.commit()
+    return created
+
+
+def orm_sweep(db: MedicineDatabase, cutoff: datetime) -> int:
+    logs = db.session.query(MedicationLog).filter(
+        MedicationLog.status == 'pending', MedicationLog.scheduled_time < cutoff).all()
+    for log in logs:
+        log.status = 'missed'
+    db.session.commit()
+    return len(logs)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    count = fn()
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--medications', type=int, default=100000)
+    parser.add_argument('--times', type=int, default=3, help='Doses per medication per day')
+    parser.add_argument('--users', type=int, default=20000)
+    args = parser.parse_args()
+
+    seed(args.medications, args.times, args.users)
+    db = MedicineDatabase()
+
+    rows = [
+        ('materialize',
+         timed(lambda: orm_materialize(db, BASELINE_DAY)),
+         timed(lambda: db.materialize_doses(BATCH_DAY.isoformat()))),
+        ('sweep missed',
+         timed(lambda: orm_sweep(db, datetime(2024, 3, 2))),
+         timed(lambda: db.sweep_missed_doses(grace_minutes=0, now=datetime(2024, 3, 3)))),
+    ]
+
+    print(f"\n{args.medications:,} medications x {args.times} doses, {args.users:,} users")
+    print(f"{'operation':<14}{'doses':>10}{'per-row ORM':>16}{'set-based':>16}{'speedup':>10}")
+    for name, (before_count, before), (after_count, after) in rows:
+        assert before_count == after_count
+        print(f"{name:<14}{after_count:>10,}{before_count / before:>12,.0f}/sec"
+              f"{after_count / after:>12,.0f}/sec{before / after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
@@ -0,0 +1,110 @@
+"""
+Benchmark DrugNameNormalizer on free-text medication names
+
+Builds a synthetic vocabulary, generates --names free-text inputs
+(strength/form suffixes, brand names, typos, unknown names) and reports
+per-name resolution time for the exact path, the fuzzy path and memo hits.
+
+Usage (from backend/):
+    python benchmarks/bench_drug_normalizer.py [--names 100000] [--vocabulary 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.drug_normalizer import SYNONYMS, DrugNameNormalizer
+
+SYLLABLES = ['ab', 'ace', 'al', 'am', 'ar', 'ba', 'cil', 'cor', 'da', 'dro', 'fen', 'flu',
+             'ga', 'ine', 'lol', 'lo', 'mab', 'met', 'mi', 'nib', 'ol', 'pam', 'pra', 'pril',
+             'ro', 'sar', 'tan', 'ti', 'tra', 'vir', 'xa', 'zide', 'zo', 'zol']
+SUFFIXES = ['', ' 5mg', ' 10 mg', ' 500mg tablets', ' 20mg ER', ' oral solution', ' 0.5 mg']
+
+
+def make_vocabulary(n: int, rng: random.Random) -> list:
+    names = set()
+    while len(names) < n:
+        names.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))).title())
+    return sorted(names)
+
+
+def make_typo(name: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(name) - 1)
+    kind = rng.random()
+    if kind < 0.4:
+        return name[:i] + name[i + 1:]
+    if kind < 0.8:
+        return name[:i] + rng.choice('aeioulnrst') + name[i + 1:]
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def make_inputs(vocabulary: list, n: int, rng: random.Random) -> list:
+    """Returns (text, expected canonical or None, kind) tuples"""
+    brands = list(SYNONYMS.items())
+    inputs = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.45:
+            name = rng.choice(vocabulary)
+            inputs.append((rng.choice([name, name.lower(), name.upper()]) + rng.choice(SUFFIXES), name, 'exact'))
+        elif roll < 0.6:
+            brand, canonical = rng.choice(brands)
+            inputs.append((brand.title() + rng.choice(SUFFIXES), canonical, 'brand'))
+        elif roll < 0.85:
+            name = rng.choice(vocabulary)
+            inputs.append((make_typo(name, rng), name, 'typo'))
+        else:
+            inputs.append((f'Supplement {rng.randrange(10 ** 6)}', None, 'unknown'))
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--names', type=int, default=100000)
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    inputs = make_inputs(vocabulary, args.names, rng)
+
+    start = time.perf_counter()
+    normalizer = DrugNameNormalizer(vocabulary)
+    build = time.perf_counter() - start
+    normalizer.CACHE_SIZE = len(inputs) + 1
+
+    timings = {}
+    correct = {}
+    counts = {}
+    seen = set()
+    for text, expected, kind in inputs:
+        if text in seen:
+            continue
+        seen.add(text)
+        start = time.perf_counter()
+        result = normalizer.resolve(text)
+        elapsed = time.perf_counter() - start
+        timings[kind] = timings.get(kind, 0.0) + elapsed
+        counts[kind] = counts.get(kind, 0) + 1
+        correct[kind] = correct.get(kind, 0) + (result == expected)
+
+    start = time.perf_counter()
+    for text, _, _ in inputs:
+        normalizer.resolve(text)
+    memo = (time.perf_counter() - start) / len(inputs)
+
+    print(f"Vocabulary: {len(vocabulary):,} names + {len(SYNONYMS)} synonyms (index built in {build * 1000:.0f}ms)")
+    print(f"Inputs: {len(inputs):,} ({len(seen):,} distinct)\n")
+    print(f"{'kind':<10}{'distinct':>10}{'mean':>12}{'accuracy':>11}")
+    for kind in ('exact', 'brand', 'typo', 'unknown'):
+        if counts.get(kind):
+            print(f"{kind:<10}{counts[kind]:>10,}{timings[kind] / counts[kind] * 1e6:>10.1f}us"
+                  f"{correct[kind] / counts[kind]:>10.1%}")
+    print(f"{'memo hit':<10}{len(inputs):>10,}{memo * 1e6:>10.2f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark InteractionChecker lookups against synthetic knowledge bases
+
+Compares the adjacency index with the previous all-pairs / full-scan
+implementation at 10k and 500k interaction pairs.
+
+Usage (from backend/):
+    python benchmarks/bench_interaction_checker.py [--sizes 10000 500000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.interaction_checker import InteractionChecker
+
+SEVERITIES = ['high', 'medium', 'low']
+
+
+def build_checker(n_pairs: int, seed: int = 42) -> InteractionChecker:
+    """Create a checker holding n_pairs synthetic interactions"""
+    rng = random.Random(seed)
+    n_drugs = max(100, n_pairs // 10)
+    drugs = [f'Drug{i:06d}' for i in range(n_drugs)]
+
+    checker = InteractionChecker()
+    while len(checker.interactions) < n_pairs:
+        drug1, drug2 = rng.sample(drugs, 2)
+        checker.add_interaction(drug1, drug2, rng.choice(SEVERITIES),
+                                'Synthetic interaction.', 'Synthetic recommendation.')
+    return checker
+
+
+# Previous implementation, kept here as the baseline
+
+def naive_check(checker: InteractionChecker, medications):
+    meds = [med.strip().title() for med in medications]
+    found = []
+    for i, med1 in enumerate(meds):
+        for med2 in meds[i+1:]:
+            interaction = checker.interactions.get((med1, med2)) or checker.interactions.get((med2, med1))
+            if interaction:
+                found.append((med1, med2, interaction['severity']))
+    return found
+
+
+def naive_warnings(checker: InteractionChecker, medication: str):
+    med = medication.strip().title()
+    return [
+        (drug2 if drug1 == med else drug1)
+        for (drug1, drug2) in checker.interactions
+        if drug1 == med or drug2 == med
+    ]
+
+
+def naive_stats(checker: InteractionChecker):
+    values = checker.interactions.values()
+    return (
+        len(checker.interactions),
+        sum(1 for i in values if i['severity'] == 'high'),
+        sum(1 for i in values if i['severity'] == 'medium'),
+        sum(1 for i in values if i['severity'] == 'low'),
+        len(set(drug for pair in checker.interactions for drug in pair)),
+    )
+
+
+def timeit(fn, repeat: int) -> float:
+    """Return mean seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(n_pairs: int, list_sizes):
+    start = time.perf_counter()
+    checker = build_checker(n_pairs)
+    build_time = time.perf_counter() - start
+    for list_size in list_sizes:
+        report(checker, n_pairs, list_size, build_time)
+
+
+def report(checker: InteractionChecker, n_pairs: int, list_size: int, build_time: float):
+    rng = random.Random(7)
+    drugs = list(checker._index)
+    patient = rng.sample(drugs, list_size)
+    target = patient[0]
+
+    # Sanity check: both implementations find the same pairs
+    indexed = [frozenset((i['drug1'], i['drug2'])) for i in checker.check_interactions(patient)['interactions']]
+    assert set(indexed) == {frozenset((a, b)) for a, b, _ in naive_check(checker, patient)}
+
+    scan_repeat = 3 if n_pairs > 100000 else 20
+    rows = [
+        ('check_interactions', timeit(lambda: naive_check(checker, patient), 200),
+         # Bypass the result cache so the lookup itself is measured
+         timeit(lambda: checker._find_interactions(sorted(set(patient))), 200)),
+        ('get_medication_warnings', timeit(lambda: naive_warnings(checker, target), scan_repeat),
+         timeit(lambda: checker.get_medication_warnings(target), 200)),
+        ('get_database_stats', timeit(lambda: naive_stats(checker), scan_repeat),
+         timeit(checker.get_database_stats, 200)),
+    ]
+
+    print(f"\n{n_pairs:,} pairs, {len(drugs):,} drugs, {list_size} medications "
+          f"(built in {build_time:.2f}s)")
+    print(f"{'operation':<26}{'baseline':>14}{'indexed':>14}{'speedup':>10}")
+    for name, before, after in rows:
+        print(f"{name:<26}{before * 1e6:>12.1f}us{after * 1e6:>12.1f}us{before / after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 500000])
+    parser.add_argument('--medications', type=int, nargs='+', default=[12, 50])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.medications)
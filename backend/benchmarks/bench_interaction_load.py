@@ -0,0 +1,147 @@
+"""
+Benchmark InteractionChecker startup against a synthetic knowledge base
+
+Seeds a SQLite drug_interactions table with --rows synthetic interactions,
+builds the compact file from it, then loads each source in a fresh
+process and reports load time and resident memory.
+
+Usage (from backend/):
+    python benchmarks/bench_interaction_load.py [--rows 1000000] [--workdir DIR]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SEVERITIES = ['high', 'medium', 'low']
+
+
+def current_rss_mb() -> float:
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+
+def peak_rss_mb() -> float:
+    # VmHWM rather than ru_maxrss, which survives exec from the seeding parent
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def seed_table(db_file: str, n_rows: int):
+    """Create a drug_interactions table with n_rows unique pairs"""
+    rng = random.Random(42)
+    n_drugs = max(1000, int(n_rows ** 0.5) * 20)
+    drugs = [f'Drug{i:06d}' for i in range(n_drugs)]
+    descriptions = [f'Synthetic interaction mechanism {i}.' for i in range(500)]
+    recommendations = [f'Synthetic recommendation {i}.' for i in range(200)]
+
+    def rows():
+        for i in range(n_rows):
+            drug1 = i % n_drugs
+            drug2 = (drug1 + 1 + i // n_drugs) % n_drugs
+            yield (drugs[drug1], drugs[drug2], rng.choice(SEVERITIES),
+                   rng.choice(descriptions), rng.choice(recommendations))
+
+    conn = sqlite3.connect(db_file)
+    conn.execute('DROP TABLE IF EXISTS drug_interactions')
+    conn.execute('CREATE TABLE drug_interactions (id INTEGER PRIMARY KEY, drug1 VARCHAR(200) NOT NULL, '
+                 'drug2 VARCHAR(200) NOT NULL, severity VARCHAR(50) NOT NULL, '
+                 'description TEXT NOT NULL, recommendation TEXT)')
+    conn.executemany('INSERT INTO drug_interactions (drug1, drug2, severity, description, recommendation) '
+                     'VALUES (?, ?, ?, ?, ?)', rows())
+    conn.commit()
+    conn.close()
+
+
+def load_naive(db_url: str) -> dict:
+    """Baseline: one fresh dict and fresh strings per row"""
+    conn = sqlite3.connect(db_url[len('sqlite:///'):])
+    interactions = {}
+    for drug1, drug2, severity, description, recommendation in conn.execute(
+            'SELECT drug1, drug2, severity, description, recommendation FROM drug_interactions'):
+        interactions[(drug1.strip().title(), drug2.strip().title())] = {
+            'severity': severity,
+            'description': description,
+            'recommendation': recommendation
+        }
+    conn.close()
+    return interactions
+
+
+def measure(mode: str, source: str):
+    """Runs in a child process; prints one JSON line"""
+    from models.interaction_checker import InteractionChecker
+
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    if mode == 'naive':
+        loaded = load_naive(source)
+        count = len(loaded)
+    else:
+        loaded = InteractionChecker(source)
+        count = loaded.get_database_stats()['total_interactions']
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'mode': mode,
+        'pairs': count,
+        'seconds': elapsed,
+        'rss_mb': current_rss_mb() - baseline,
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+
+def run_child(mode: str, source: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, '--measure', mode, source],
+        check=True, capture_output=True, text=True, cwd=BACKEND_DIR
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--workdir', help='Keep the generated files here instead of a temp dir')
+    parser.add_argument('--measure', nargs=2, metavar=('MODE', 'SOURCE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    from models.interaction_checker import InteractionChecker
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        db_file = os.path.join(workdir, 'interactions_bench.db')
+        kb_file = os.path.join(workdir, 'interactions_bench.kb')
+        db_url = f'sqlite:///{db_file}'
+
+        print(f"Seeding {args.rows:,} rows into {db_file}...")
+        seed_table(db_file, args.rows)
+        InteractionChecker(db_url).save_compact(kb_file)
+        print(f"SQLite file: {os.path.getsize(db_file) / 1024 / 1024:.1f} MB, "
+              f"compact file: {os.path.getsize(kb_file) / 1024 / 1024:.1f} MB")
+
+        print(f"\n{'source':<22}{'pairs':>10}{'load':>10}{'RSS':>12}{'peak RSS':>12}")
+        for mode, source in (('naive', db_url), ('table', db_url), ('compact', kb_file)):
+            r = run_child(mode, source)
+            print(f"{mode:<22}{r['pairs']:>10,}{r['seconds']:>9.2f}s"
+                  f"{r['rss_mb']:>10.1f}MB{r['peak_rss_mb']:>10.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
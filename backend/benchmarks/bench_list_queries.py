@@ -0,0 +1,145 @@
+"""
+Benchmark the medication/log list reads: ORM entities vs projected rows
+
+Seeds a temporary SQLite database, then compares loading full ORM
+entities and copying them into dicts (the previous path) with the
+column-projected MedicineDatabase methods. Reports rows/sec and the
+peak memory allocated per call (tracemalloc).
+
+Usage (from backend/):
+    python benchmarks/bench_list_queries.py [--logs 50000] [--medications 200]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(WORKDIR, "bench.db")}'
+
+import database  # noqa: E402  (needs DATABASE_URL set first)
+from database import Medication, MedicationLog, MedicineDatabase, SessionLocal  # noqa: E402
+
+
+def seed(db: MedicineDatabase, n_meds: int, n_logs: int) -> int:
+    user = db.get_or_create_user('bench_user', 'bench@example.com')
+    conn = database.engine.raw_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        'INSERT INTO medications (name, dosage, frequency, times, start_date, user_id, reminder_minutes, created_at) '
+        "VALUES (?, '10mg', 'daily', '[\"08:00\", \"20:00\"]', '2020-01-01', ?, 15, '2020-01-01 00:00:00')",
+        [(f'Medication {i}', user.id) for i in range(n_meds)]
+    )
+    cursor.executemany(
+        'INSERT INTO medication_logs (medication_id, user_id, scheduled_time, taken_time, status, created_at) '
+        "VALUES (?, ?, ?, ?, 'taken', '2020-01-01 00:00:00')",
+        # Stored in SQLAlchemy's SQLite DateTime format
+        [(1 + i % n_meds, user.id, f'2020-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00.000000',
+          f'2020-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:05:00.000000') for i in range(n_logs)]
+    )
+    conn.commit()
+    conn.close()
+    return user.id
+
+
+# Previous implementation, kept here as the baseline
+
+def orm_medications(user_id: int) -> list:
+    session = SessionLocal()
+    try:
+        meds = session.query(Medication).filter(Medication.user_id == user_id) \
+            .order_by(Medication.created_at.desc()).all()
+        return [{
+            'id': med.id,
+            'name': med.name,
+            'dosage': med.dosage,
+            'frequency': med.frequency,
+            'times': med.times,
+            'start_date': med.start_date.isoformat() if med.start_date else None,
+            'end_date': med.end_date.isoformat() if med.end_date else None,
+            'notes': med.notes,
+            'image_path': med.image_path,
+            'phone_number': med.phone_number,
+            'reminder_minutes': med.reminder_minutes,
+            'created_at': med.created_at.isoformat() if med.created_at else None
+        } for med in meds]
+    finally:
+        session.close()
+
+
+def orm_logs(user_id: int) -> list:
+    session = SessionLocal()
+    try:
+        logs = session.query(MedicationLog).filter(MedicationLog.user_id == user_id) \
+            .order_by(MedicationLog.scheduled_time.desc(), MedicationLog.id.desc()).all()
+        return [{
+            'id': log.id,
+            'medication_id': log.medication_id,
+            'scheduled_time': log.scheduled_time.isoformat(),
+            'taken_time': log.taken_time.isoformat() if log.taken_time else None,
+            'status': log.status,
+            'notes': log.notes,
+            'created_at': log.created_at.isoformat() if log.created_at else None
+        } for log in logs]
+    finally:
+        session.close()
+
+
+def projected(method, user_id: int) -> list:
+    db = MedicineDatabase()
+    try:
+        return method(db, user_id)
+    finally:
+        db.session.close()
+
+
+def measure(fn, repeat: int):
+    """Return (rows/sec, peak KB allocated during one call)"""
+    rows = len(fn())
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows / elapsed, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logs', type=int, default=50000)
+    parser.add_argument('--medications', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    user_id = seed(MedicineDatabase(), args.medications, args.logs)
+
+    cases = [
+        ('medications', lambda: orm_medications(user_id),
+         lambda: projected(MedicineDatabase.get_all_medications, user_id)),
+        ('logs', lambda: orm_logs(user_id),
+         lambda: projected(MedicineDatabase.get_medication_logs, user_id)),
+    ]
+
+    print(f"\n{'endpoint':<14}{'path':<11}{'rows/sec':>14}{'peak alloc':>14}")
+    for name, before, after in cases:
+        assert before() == after()
+        for label, fn in (('orm', before), ('projected', after)):
+            rate, peak = measure(fn, args.repeat)
+            print(f"{name:<14}{label:<11}{rate:>14,.0f}{peak:>12,.0f}KB")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
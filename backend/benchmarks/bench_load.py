@@ -0,0 +1,323 @@
+"""
+End-to-end load test: a seeded population driven through the HTTP API
+
+Seeds a population (see population.py) into --database-url, starts gunicorn
+on it with LOCAL_AUTH_SECRET set, and signs in the synthetic users with
+local_auth tokens instead of Google. Then it sends a mix of the SPA's API
+calls at --rps for --duration seconds. Arrivals are open loop: requests
+start on schedule whether or not earlier ones have finished, and latency is
+measured from the scheduled start, so a saturated server shows up as
+growing latency rather than a quietly lower request rate.
+
+Reports throughput, errors and p50/p95/p99 latency per endpoint. --json
+saves the results with the git commit they were measured on, and --compare
+prints the change against a saved run.
+
+Usage (from backend/):
+    python benchmarks/bench_load.py [--rps 50] [--duration 30] [--users 200] [--years 2]
+    python benchmarks/bench_load.py --database-url postgresql://... --workers 4 --json run.json
+    python benchmarks/bench_load.py --url http://host:port --secret S   # server started elsewhere
+    python benchmarks/bench_load.py --compare run.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import local_auth  # noqa: E402
+from population import google_id  # noqa: E402
+
+# (weight, label, method, build(session) -> (path, body)); weights follow what the SPA calls most
+def _mix():
+    def recent(days):
+        return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    return [
+        (25, 'GET /api/analytics/dashboard', 'GET', lambda s: ('/api/analytics/dashboard', None)),
+        (20, 'GET /api/medications', 'GET', lambda s: ('/api/medications', None)),
+        (15, 'GET /api/logs?limit', 'GET', lambda s: ('/api/logs?limit=100', None)),
+        (5, 'GET /api/logs?medication_id', 'GET', lambda s: (
+            f'/api/logs?medication_id={s.medication()}&start_date={recent(30)}', None)),
+        (10, 'GET /api/analytics/adherence', 'GET', lambda s: ('/api/analytics/adherence', None)),
+        (2, 'GET /api/medications/<id>', 'GET', lambda s: (f'/api/medications/{s.medication()}', None)),
+        (10, 'POST /api/logs', 'POST', lambda s: ('/api/logs', {
+            'medication_id': s.medication(), 'scheduled_time': datetime.now().strftime('%Y-%m-%dT%H:%M:00'),
+            'taken_time': datetime.now().isoformat(timespec='seconds'), 'status': 'taken'})),
+        (5, 'PUT /api/logs/<id>', 'PUT', lambda s: (f'/api/logs/{s.log()}', {'status': 'taken'})),
+        (5, 'POST /api/ml/check-interactions', 'POST', lambda s: (
+            '/api/ml/check-interactions', {'medications': s.medication_names})),
+        (3, 'POST /api/ml/predict-adherence', 'POST', lambda s: (
+            '/api/ml/predict-adherence', {'medication_id': s.medication()})),
+    ]
+
+
+class UserSession:
+    """One synthetic user's token and the ids their requests refer to"""
+
+    def __init__(self, token: str, medications: list, log_ids: list, rng: random.Random):
+        self.headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+        self.medication_ids = [m['id'] for m in medications]
+        self.medication_names = [m['name'] for m in medications]
+        self.log_ids = log_ids
+        self.rng = rng
+
+    def medication(self) -> int:
+        return self.rng.choice(self.medication_ids)
+
+    def log(self) -> int:
+        return self.rng.choice(self.log_ids)
+
+
+class Client:
+    """Keep-alive HTTP connections, one per thread"""
+
+    def __init__(self, base_url: str):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body=None, headers=None) -> tuple:
+        """(status, parsed JSON or None)"""
+        data = json.dumps(body).encode() if body is not None else None
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                conn.request(method, path, body=data, headers=headers or {})
+                response = conn.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed an idle keep-alive connection; retry once on a new one
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        try:
+            return response.status, json.loads(payload)
+        except ValueError:
+            return response.status, None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(client: Client, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if client.request('GET', '/api/health')[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('Server did not come up')
+
+
+def open_sessions(client: Client, secret: str, users: int, rng: random.Random) -> list:
+    """Sign in every user and fetch the medication and log ids the mix refers to"""
+    sessions = []
+    for index in range(users):
+        token = local_auth.sign(google_id(index), secret)
+        headers = {'Authorization': f'Bearer {token}'}
+        status, body = client.request('GET', '/api/medications', headers=headers)
+        if status != 200:
+            raise RuntimeError(f'{google_id(index)}: GET /api/medications answered {status}; '
+                               f'is LOCAL_AUTH_SECRET set on the server?')
+        if not body['medications']:
+            continue
+        _, logs = client.request('GET', '/api/logs?limit=200', headers=headers)
+        log_ids = [log['id'] for log in logs['logs']] or [0]
+        sessions.append(UserSession(token, body['medications'], log_ids, random.Random(rng.random())))
+    if not sessions:
+        raise RuntimeError('No seeded users found; run without --skip-seed')
+    return sessions
+
+
+def drive(client: Client, sessions: list, rps: float, duration: float, concurrency: int, seed: int) -> dict:
+    """Send the mix at rps for duration seconds; returns {label: [(latency seconds, status), ...]}"""
+    mix = _mix()
+    weights = [entry[0] for entry in mix]
+    rng = random.Random(seed)
+    results = defaultdict(list)
+    lock = threading.Lock()
+
+    def call(scheduled: float, label: str, method: str, session: UserSession, path: str, body):
+        try:
+            status = client.request(method, path, body, session.headers)[0]
+        except OSError:
+            status = 0
+        latency = time.perf_counter() - scheduled
+        with lock:
+            results[label].append((latency, status))
+
+    total = int(rps * duration)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            _, label, method, build = rng.choices(mix, weights)[0]
+            session = rng.choice(sessions)
+            path, body = build(session)
+            pool.submit(call, scheduled, label, method, session, path, body)
+    results['_elapsed'] = time.perf_counter() - start
+    return results
+
+
+def summarize(results: dict, elapsed: float) -> dict:
+    summary = {}
+    everything = []
+    for label, samples in sorted(results.items()):
+        everything.extend(samples)
+        summary[label] = _stats(samples, elapsed)
+    summary['ALL'] = _stats(everything, elapsed)
+    return summary
+
+
+def _stats(samples: list, elapsed: float) -> dict:
+    latencies = sorted(latency * 1000 for latency, _ in samples)
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, status in samples if not 200 <= status < 400),
+        'rps': len(samples) / elapsed,
+        'p50_ms': cuts[49],
+        'p95_ms': cuts[94],
+        'p99_ms': cuts[98],
+        'max_ms': latencies[-1],
+    }
+
+
+def report(summary: dict, baseline: dict = None):
+    print(f"\n{'endpoint':<36}{'reqs':>7}{'err':>5}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for label, row in summary.items():
+        print(f"{label:<36}{row['requests']:>7}{row['errors']:>5}{row['rps']:>8.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}")
+        old = (baseline or {}).get(label)
+        if old:
+            print(f"{'  vs baseline':<36}{'':>20}"
+                  + ''.join(f"{(row[key] / old[key] - 1) if old[key] else 0:>+9.0%}"
+                            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def start_server(args, database_url: str, secret: str) -> tuple:
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': database_url,
+        'LOCAL_AUTH_SECRET': secret,
+        'SCHEDULER_ENABLED': '0',
+        'WEB_CONCURRENCY': str(args.workers),
+    })
+    command = [sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{port}', '--threads', str(args.threads), 'app:app']
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return server, f'http://127.0.0.1:{port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Defaults to a SQLite file in a temporary directory')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--medications', type=int, default=4, help='Per user')
+    parser.add_argument('--years', type=float, default=2, help='Years of dose history per medication')
+    parser.add_argument('--skip-seed', action='store_true', help='Use the population already in the database')
+    parser.add_argument('--url', help='Load an already running server instead of starting gunicorn')
+    parser.add_argument('--secret', default='load-test-secret', help="The server's LOCAL_AUTH_SECRET")
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--rps', type=float, default=50, help='Target request rate')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load')
+    parser.add_argument('--concurrency', type=int, default=64, help='Most requests in flight')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Save the results here')
+    parser.add_argument('--compare', help='Results saved by an earlier --json run')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        baseline = saved['endpoints']
+        print(f"Comparing against {args.compare} (commit {saved['commit']}, {saved['params']['rps']} req/s target)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        server = None
+        if not args.skip_seed and not args.url:
+            os.environ['DATABASE_URL'] = database_url
+            import database
+            from population import seed_population
+            database.migrate()
+            print(f"Seeding {args.users} users x {args.medications} medications x {args.years:g} years...")
+            start = time.perf_counter()
+            created = seed_population(database.MedicineDatabase(), args.users, args.medications, args.years, args.seed)
+            print(f"  {created['logs']:,} logs in {time.perf_counter() - start:.1f}s")
+            database.dispose_pools()
+
+        base_url = args.url
+        if not base_url:
+            server, base_url = start_server(args, database_url, args.secret)
+        try:
+            client = Client(base_url)
+            wait_ready(client)
+            rng = random.Random(args.seed)
+            sessions = open_sessions(client, args.secret, args.users, rng)
+            print(f"Driving {len(sessions)} users at {args.rps:g} req/s for {args.duration:g}s...")
+            results = drive(client, sessions, args.rps, args.duration, args.concurrency, args.seed)
+        finally:
+            if server:
+                server.terminate()
+                server.wait(timeout=30)
+
+    elapsed = results.pop('_elapsed')
+    summary = summarize(results, elapsed)
+    achieved = summary['ALL']['rps']
+    print(f"\nTarget {args.rps:g} req/s, achieved {achieved:.1f} req/s over {elapsed:.1f}s")
+    report(summary, baseline)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'params': {key: getattr(args, key) for key in
+                           ('users', 'medications', 'years', 'workers', 'threads', 'rps', 'duration')},
+                'endpoints': summary,
+            }, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
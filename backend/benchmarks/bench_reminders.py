@@ -0,0 +1,103 @@
+"""
+Benchmark the reminder query: JSON times scan vs the dose-time index
+
+Seeds a temporary SQLite database with --medications medications (every
+one with a phone number and --times doses a day), then times one reminder
+tick both ways: loading every medication and decoding its JSON times (the
+previous notification loop) and MedicineDatabase.get_due_reminders.
+
+Usage (from backend/):
+    python benchmarks/bench_reminders.py [--medications 100000] [--times 3]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(WORKDIR, "bench.db")}'
+
+import database  # noqa: E402  (needs DATABASE_URL set first)
+from database import MedicineDatabase  # noqa: E402
+
+
+def seed(n_meds: int, n_times: int):
+    rng = random.Random(42)
+    database.migrate()
+    conn = database.engine.raw_connection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO users (google_id, email, created_at, data_version) "
+                   "VALUES ('bench', 'bench@example.com', '2024-01-01 00:00:00', 0)")
+    meds, dose_rows = [], []
+    for i in range(n_meds):
+        minutes = sorted(rng.sample(range(24 * 60), n_times))
+        times = json.dumps([f'{m // 60:02d}:{m % 60:02d}' for m in minutes])
+        meds.append((f'Medication {i}', times, rng.choice([5, 15, 30, 60])))
+        dose_rows.extend((i + 1, m) for m in minutes)
+    cursor.executemany(
+        'INSERT INTO medications (name, dosage, frequency, times, start_date, user_id, phone_number, '
+        "reminder_minutes, created_at) VALUES (?, '10mg', 'daily', ?, '2024-01-01', 1, '+15550000', ?, "
+        "'2024-01-01 00:00:00')", meds
+    )
+    cursor.executemany('INSERT INTO medication_dose_times (medication_id, minute_of_day) VALUES (?, ?)', dose_rows)
+    conn.commit()
+    conn.close()
+
+
+# Previous notification loop, kept here as the baseline
+
+def scan_reminders(db: MedicineDatabase, now: datetime) -> list:
+    due = []
+    for med in db.get_all_medications():
+        if not med.get('phone_number'):
+            continue
+        for time_str in json.loads(med['times']):
+            hour, minute = map(int, time_str.split(':'))
+            scheduled = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if scheduled - timedelta(minutes=med['reminder_minutes']) <= now < scheduled:
+                due.append((med['id'], time_str))
+    return due
+
+
+def timeit(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--medications', type=int, default=100000)
+    parser.add_argument('--times', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.medications, args.times)
+    db = MedicineDatabase()
+    now = datetime(2024, 3, 1, 8, 0, 30)
+
+    indexed = [(dose['id'], dose['time']) for dose in db.get_due_reminders(now)]
+    assert sorted(indexed) == sorted(scan_reminders(db, now))
+
+    before = timeit(lambda: scan_reminders(db, now), args.repeat)
+    after = timeit(lambda: db.get_due_reminders(now), args.repeat)
+
+    print(f"\n{args.medications:,} medications x {args.times} doses, {len(indexed):,} reminders due")
+    print(f"{'JSON scan':<14}{before * 1e3:>10.1f}ms")
+    print(f"{'indexed':<14}{after * 1e3:>10.1f}ms{before / after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
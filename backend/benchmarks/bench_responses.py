@@ -0,0 +1,105 @@
+"""
+Benchmark list responses: serialization CPU and bytes on the wire
+
+Seeds a temporary SQLite database with one user's medications and logs,
+then, for the medication list and log histories of several sizes, compares:
+  - serialization CPU: rows -> dicts -> Flask jsonify (the previous path)
+    against RowList -> fastjson.dumps
+  - body size: identity, gzip and, when the brotli package is installed, br,
+    with the CPU time of each compressor
+
+CPU is process time per response, the median of --repeat runs.
+
+Usage (from backend/):
+    python benchmarks/bench_responses.py [--logs 100 1000 10000] [--repeat 20]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(WORKDIR, "bench.db")}'
+
+from flask import Flask, jsonify  # noqa: E402
+
+import compression  # noqa: E402
+import fastjson  # noqa: E402
+from database import MedicineDatabase  # noqa: E402  (needs DATABASE_URL set first)
+
+
+def cpu(fn, repeat: int):
+    """(median process seconds per call, last result)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        result = fn()
+        samples.append(time.process_time() - start)
+    return statistics.median(samples), result
+
+
+def seed(db: MedicineDatabase, n_logs: int):
+    user = db.get_or_create_user('bench_user', 'bench@example.com')
+    med_ids = [db.add_medication(user.id, f'Medication {i}', '10mg', 'daily', ['08:00', '20:00'], '2020-01-01',
+                                 notes='Take with food' if i % 3 == 0 else None, phone_number='+15550000')
+               for i in range(20)]
+    start = datetime(2024, 1, 1, 8)
+    entries = []
+    for i in range(n_logs):
+        scheduled = start - timedelta(hours=12 * (i // len(med_ids)))
+        taken = i % 5 != 0
+        entries.append({'medication_id': med_ids[i % len(med_ids)], 'scheduled_time': scheduled.isoformat(),
+                        'taken_time': (scheduled + timedelta(minutes=i % 40)).isoformat() if taken else None,
+                        'status': 'taken' if taken else 'missed'})
+    for offset in range(0, len(entries), 5000):
+        db.bulk_log_medications(user.id, entries[offset:offset + 5000])
+    return user.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logs', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    db = MedicineDatabase()
+    user_id = seed(db, max(args.logs))
+    app = Flask(__name__)
+    encodings = ['gzip'] + (['br'] if compression.brotli else [])
+
+    cases = [('medications (20)', lambda as_rows: db.get_all_medications(user_id, as_rows=as_rows), 'medications')]
+    for n in args.logs:
+        cases.append((f'logs ({n:,})',
+                      lambda as_rows, n=n: db.get_medication_logs_page(user_id, limit=n, as_rows=as_rows)[0], 'logs'))
+
+    print(f"\n{'response':<18}{'jsonify':>10}{'fastjson':>10}{'speedup':>9}{'identity':>11}"
+          + ''.join(f'{name:>10}{name + " cpu":>11}' for name in encodings))
+    with app.app_context():
+        for label, read, key in cases:
+            dicts, rows = read(False), read(True)
+            before, old_body = cpu(lambda: jsonify({'success': True, key: db._rows_to_dicts(rows.keys, rows.rows)})
+                                   .get_data(), args.repeat)
+            after, new_body = cpu(lambda: fastjson.dumps({'success': True, key: rows}).encode(), args.repeat)
+            assert len(dicts) == len(rows)
+            line = (f"{label:<18}{before * 1e3:>8.2f}ms{after * 1e3:>8.2f}ms{before / after:>8.1f}x"
+                    f"{len(new_body) / 1024:>9.1f}KB")
+            for encoding in encodings:
+                seconds, packed = cpu(lambda: compression.compress(new_body, encoding), args.repeat)
+                line += f"{len(packed) / 1024:>8.1f}KB{seconds * 1e3:>9.2f}ms"
+            # Same compact, ASCII-escaped output; only key order differs
+            assert abs(len(old_body) - len(new_body)) <= 2
+            print(line)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
@@ -0,0 +1,118 @@
+"""
+Benchmark mixed concurrent reads and writes on SQLite, default vs tuned
+
+Runs the same workload in two fresh processes: one with SQLite's defaults
+(rollback journal, SQLITE_TUNING=0) and one with the WAL profile from
+database.SQLITE_PRAGMAS. Reader threads page through a user's logs while
+writer threads log doses, each thread on its own session, for --seconds.
+Reports reads/sec, writes/sec and lock errors.
+
+Usage (from backend/):
+    python benchmarks/bench_sqlite_concurrency.py [--readers 8] [--writers 2] [--seconds 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def run_workload(readers: int, writers: int, seconds: float, seed_logs: int):
+    """Runs in a child process; prints one JSON line"""
+    from database import MedicineDatabase
+
+    db = MedicineDatabase()
+    user = db.get_or_create_user('bench_user', 'bench@example.com')
+    med_ids = [db.add_medication(user.id, f'Medication {i}', '10mg', 'daily', ['08:00'], '2024-01-01')
+               for i in range(10)]
+    db.bulk_log_medications(user.id, [
+        {'medication_id': med_ids[i % 10], 'scheduled_time': f'2024-01-{1 + i % 28:02d}T{i % 24:02d}:00:00'}
+        for i in range(seed_logs)
+    ])
+    user_id = user.id
+    db.remove_session()
+
+    deadline = time.perf_counter() + seconds
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def reader():
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                db.get_medication_logs_page(user_id, limit=50)
+                db.get_dashboard_snapshot(user_id)
+                done += 1
+            except Exception:
+                db.session.rollback()
+                errors += 1
+        db.remove_session()
+        with lock:
+            counts['reads'] += done
+            counts['errors'] += errors
+
+    def writer(n: int):
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                db.log_medication(user_id, med_ids[(n + done) % 10], '2024-02-01T08:00:00', status='taken')
+                done += 1
+            except Exception:
+                db.session.rollback()
+                errors += 1
+        db.remove_session()
+        with lock:
+            counts['writes'] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({key: value / seconds if key != 'errors' else value for key, value in counts.items()}))
+
+
+def run_child(tuned: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ,
+                   DATABASE_URL=f'sqlite:///{os.path.join(workdir, "bench.db")}',
+                   SQLITE_TUNING='1' if tuned else '0')
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--readers', str(args.readers), '--writers', str(args.writers),
+             '--seconds', str(args.seconds), '--logs', str(args.logs)],
+            check=True, capture_output=True, text=True, cwd=BACKEND_DIR, env=env
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--logs', type=int, default=20000, help='Logs seeded before the run')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_workload(args.readers, args.writers, args.seconds, args.logs)
+        return
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s, {args.logs:,} seeded logs")
+    print(f"\n{'profile':<10}{'reads/sec':>12}{'writes/sec':>12}{'errors':>8}")
+    for label, tuned in (('default', False), ('tuned', True)):
+        r = run_child(tuned, args)
+        print(f"{label:<10}{r['reads']:>12,.0f}{r['writes']:>12,.0f}{r['errors']:>8,}")
+
+
+if __name__ == '__main__':
+    main()
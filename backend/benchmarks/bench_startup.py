@@ -0,0 +1,117 @@
+"""
+Benchmark backend cold start: the time to `import app` in a fresh process
+
+Each run is a new interpreter started with `-X importtime`, so the report
+shows both the wall time and where the import time goes, summed per
+top-level package (sklearn, numpy, PIL, twilio, google, ...). The database
+is a temporary SQLite file whose schema is created before timing starts, as
+the migrate step does in production.
+
+With --baseline REV the same measurement runs on the backend/ directory of
+that git revision, for a before/after comparison.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [--runs 5] [--top 12] [--baseline HEAD~1]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child_env(db_path: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'AUTO_MIGRATE': '0',
+        'ML_WARMUP': '0',
+        'PYTHONDONTWRITEBYTECODE': '1',
+    })
+    env.pop('DATABASE_SHARD_URLS', None)
+    env.pop('DATABASE_REPLICA_URLS', None)
+    return env
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Self time in microseconds per top-level package"""
+    per_package = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        per_package[name.strip().split('.')[0]] += int(self_us)
+    return per_package
+
+
+def measure(backend_dir: str, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = child_env(os.path.join(tmp, 'startup.db'))
+        # Create the schema once, outside the timed runs
+        subprocess.run([sys.executable, '-c', 'import app'], cwd=backend_dir,
+                       env={**env, 'AUTO_MIGRATE': '1'}, check=True, capture_output=True)
+
+        walls, packages = [], defaultdict(list)
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                                    cwd=backend_dir, env=env, capture_output=True, text=True)
+            walls.append(time.perf_counter() - start)
+            if result.returncode != 0:
+                raise RuntimeError(f'import app failed in {backend_dir}:\n{result.stderr[-2000:]}')
+            for package, self_us in parse_importtime(result.stderr).items():
+                packages[package].append(self_us)
+
+    return {
+        'wall': statistics.median(walls),
+        'packages': {package: statistics.median(times) / 1e6 for package, times in packages.items()},
+    }
+
+
+def export_revision(revision: str, target: str) -> str:
+    """Write backend/ as of a git revision into target and return its path"""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    
+    root, prefix = git('rev-parse', '--show-toplevel'), git('rev-parse', '--show-prefix')
+    archive = os.path.join(target, 'backend.tar')
+    subprocess.run(['git', 'archive', '-o', archive, f'{revision}:{prefix}'], cwd=root, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(os.path.join(target, 'backend'))
+    return os.path.join(target, 'backend')
+
+
+def report(label: str, result: dict, top: int):
+    print(f"\n{label}: import app {result['wall'] * 1000:.0f} ms (wall, median)")
+    ranked = sorted(result['packages'].items(), key=lambda item: item[1], reverse=True)
+    for package, seconds in ranked[:top]:
+        print(f"  {package:<24} {seconds * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure backend import time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=12, help='Packages to list, by import time')
+    parser.add_argument('--baseline', help='Git revision to compare against, e.g. HEAD~1')
+    args = parser.parse_args()
+
+    current = measure(BACKEND_DIR, args.runs)
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = measure(export_revision(args.baseline, tmp), args.runs)
+        report(f'Baseline ({args.baseline})', baseline, args.top)
+    report('Current', current, args.top)
+    if args.baseline:
+        print(f"\nSpeedup: {baseline['wall'] / current['wall']:.1f}x "
+              f"({(baseline['wall'] - current['wall']) * 1000:.0f} ms less)")
+
+
+if __name__ == '__main__':
+    main()
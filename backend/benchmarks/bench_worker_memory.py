@@ -0,0 +1,147 @@
+"""
+Benchmark gunicorn worker memory with and without preloaded models
+
+Starts gunicorn twice on a synthetic interaction knowledge base: once with
+PRELOAD_MODELS=0, where every worker loads its own models, and once with
+PRELOAD_MODELS=1, where the master loads them before forking (see
+gunicorn.conf.py). Each run serves a mix of interaction checks and adherence
+predictions, then reports every worker's RSS and PSS from
+/proc/<pid>/smaps_rollup. PSS splits shared pages between the processes
+sharing them, so the PSS total is the real memory cost of the server.
+
+Linux only. Usage (from backend/):
+    python benchmarks/bench_worker_memory.py [--workers 8] [--pairs 200000] [--requests 800]
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_interaction_checker import build_checker
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def memory_kb(pid: int) -> dict:
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            field, _, rest = line.partition(':')
+            if field in ('Rss', 'Pss'):
+                values[field] = int(rest.split()[0])
+    return values
+
+
+def worker_pids(master: int) -> list:
+    with open(f'/proc/{master}/task/{master}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def post(url: str, payload: dict):
+    request = urllib.request.Request(url, json.dumps(payload).encode(), {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+
+
+def wait_ready(url: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up')
+
+
+def run(preload: bool, args, kb_path: str, drugs: list, tmp: str) -> dict:
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, f'memory_{int(preload)}.db')}",
+        'INTERACTION_KB_PATH': kb_path,
+        'PRELOAD_MODELS': '1' if preload else '0',
+        'SCHEDULER_ENABLED': '0',
+        'ML_WARMUP': '1',
+        'WEB_CONCURRENCY': str(args.workers),
+    })
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{port}', 'app:app'],
+                              cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        wait_ready(f'{base}/api/health')
+
+        rng = random.Random(42)
+        calls = []
+        for i in range(args.requests):
+            if i % 4 == 3:
+                calls.append((f'{base}/api/ml/predict-adherence', {'medication_id': 1}))
+            else:
+                calls.append((f'{base}/api/ml/check-interactions', {'medications': rng.sample(drugs, 8)}))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers * 2) as pool:
+            list(pool.map(lambda call: post(*call), calls))
+        elapsed = time.perf_counter() - start
+        # Let warm-up threads of workers that got no request finish
+        time.sleep(args.settle)
+
+        workers = [memory_kb(pid) for pid in worker_pids(server.pid)]
+        return {'master': memory_kb(server.pid), 'workers': workers, 'rps': args.requests / elapsed}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def report(label: str, result: dict):
+    workers = result['workers']
+    print(f"\n{label}  ({result['rps']:.0f} req/s)")
+    print(f"  {'process':<10} {'RSS MB':>9} {'PSS MB':>9}")
+    print(f"  {'master':<10} {result['master']['Rss'] / 1024:9.1f} {result['master']['Pss'] / 1024:9.1f}")
+    for i, worker in enumerate(workers):
+        print(f"  {f'worker {i}':<10} {worker['Rss'] / 1024:9.1f} {worker['Pss'] / 1024:9.1f}")
+    total_pss = result['master']['Pss'] + sum(worker['Pss'] for worker in workers)
+    print(f"  mean worker RSS {sum(w['Rss'] for w in workers) / len(workers) / 1024:.1f} MB, "
+          f"PSS {sum(w['Pss'] for w in workers) / len(workers) / 1024:.1f} MB; "
+          f"total PSS {total_pss / 1024:.1f} MB")
+    return total_pss
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-worker RSS/PSS with and without preloaded models')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--pairs', type=int, default=200000, help='Interactions in the synthetic knowledge base')
+    parser.add_argument('--requests', type=int, default=800)
+    parser.add_argument('--settle', type=float, default=3.0, help='Seconds to wait before measuring')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Building a {args.pairs}-pair knowledge base...")
+        checker = build_checker(args.pairs)
+        kb_path = os.path.join(tmp, 'interactions.kb')
+        checker.save_compact(kb_path)
+        drugs = list(checker._index)
+        del checker
+
+        separate = report(f'PRELOAD_MODELS=0, {args.workers} workers', run(False, args, kb_path, drugs, tmp))
+        shared = report(f'PRELOAD_MODELS=1, {args.workers} workers', run(True, args, kb_path, drugs, tmp))
+        print(f"\nPreloading saves {(separate - shared) / 1024:.1f} MB of PSS "
+              f"({1 - shared / separate:.0%} of the total)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""
+Microbenchmarks for the ML, interaction and reminder hot paths, with a history
+
+Benchmarks (select with -k SUBSTRING):
+    adherence.extract_features    logs=100, 1000, 10000
+    adherence.predict_adherence   logs=100, 1000, 10000
+    pill.predict_with_features    size=64, 512, 2048 x format=png, jpeg, base64
+    interactions.check            meds=2, 8, 32 x kb=1000, 100000 x index=dict, frozen
+    notifications.check_and_send  medications=100, 1000, 10000 (every one due)
+
+Each benchmark is calibrated so a round lasts at least --min-time, then
+timed for --rounds rounds. The median time per call is reported with the
+min and the interquartile range. Every run is appended to the history file
+with its git commit. `compare` checks the newest run against an earlier
+one and exits 1 if any median slowed by more than --threshold percent.
+
+Usage (from backend/):
+    python benchmarks/microbench.py run [-k interactions] [--rounds 15] [--history FILE]
+    python benchmarks/microbench.py compare [--against COMMIT] [--threshold 10]
+"""
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'microbench_history.json')
+
+
+# ============= Harness =============
+
+def measure(fn, rounds: int, min_time: float) -> dict:
+    """Seconds per call of fn(): calibrated iterations per round, then rounds timed rounds"""
+    fn()  # warm-up
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        iterations = min(iterations * 10, max(iterations * 2, int(iterations * min_time / max(elapsed, 1e-9))))
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations)
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else samples * 3
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'iqr': quartiles[2] - quartiles[0],
+        'rounds': rounds,
+        'iterations': iterations,
+    }
+
+
+# ============= Cases =============
+# Each case generator yields (name, fn); setup work happens before yielding
+
+def adherence_cases():
+    from bench_adherence_features import make_logs
+    from models.adherence_predictor import AdherencePredictor
+
+    predictor = AdherencePredictor()
+    predictor.train([])
+    now = datetime.now()
+    for n in (100, 1000, 10000):
+        logs = make_logs(n)
+        yield f'adherence.extract_features[logs={n}]', lambda logs=logs: predictor.extract_features(logs, now)
+    for n in (100, 1000, 10000):
+        logs = make_logs(n)
+        yield f'adherence.predict_adherence[logs={n}]', lambda logs=logs: predictor.predict_adherence(logs, now)
+
+
+def pill_cases():
+    from PIL import Image, ImageDraw
+    from models.pill_recognition import PillRecognitionModel
+
+    model = PillRecognitionModel()
+    for size in (64, 512, 2048):
+        # A white pill on a dark background, noisy so the encoders cannot shortcut it
+        image = Image.effect_noise((size, size), 40).convert('RGB')
+        ImageDraw.Draw(image).ellipse((size // 4, size // 3, 3 * size // 4, 2 * size // 3), fill=(235, 235, 230))
+        encoded = {}
+        for fmt in ('png', 'jpeg'):
+            buffer = io.BytesIO()
+            image.save(buffer, format=fmt.upper())
+            encoded[fmt] = buffer.getvalue()
+        # What the SPA uploads: a JPEG data URL
+        encoded['base64'] = 'data:image/jpeg;base64,' + base64.b64encode(encoded['jpeg']).decode()
+        for fmt, data in encoded.items():
+            yield f'pill.predict_with_features[size={size},format={fmt}]', \
+                lambda data=data: model.predict_with_features(data)
+
+
+def interaction_cases():
+    from bench_interaction_checker import build_checker
+
+    for kb in (1000, 100000):
+        checker = build_checker(kb)
+        drugs = list(checker._index)
+        rng = random.Random(kb)
+        lists = {n: [rng.choice(drugs) for _ in range(n)] for n in (2, 8, 32)}
+        for index in ('dict', 'frozen'):
+            if index == 'frozen':
+                checker.freeze()
+            for n, meds in lists.items():
+                yield f'interactions.check[meds={n},kb={kb},index={index}]', \
+                    lambda meds=meds, checker=checker: checker.check_interactions(meds)
+
+
+class _SentMessage:
+    sid = 'SM-benchmark'
+
+
+class _FakeMessages:
+    """Stands in for Twilio's API so the benchmark times the reminder loop, not the network"""
+
+    def create(self, **kwargs):
+        return _SentMessage()
+
+
+class _FakeTwilio:
+    messages = _FakeMessages()
+
+
+def notification_cases():
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, "bench.db")}'
+    import database
+    from notifications import NotificationEngine
+
+    database.migrate()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = NotificationEngine(database.MedicineDatabase())
+    engine.client = _FakeTwilio()
+
+    # The loop prints per reminder; keep that cost, not the terminal's
+    with open(os.devnull, 'w') as devnull:
+        def tick():
+            with contextlib.redirect_stdout(devnull):
+                engine.check_and_send_notifications()
+
+        try:
+            seeded = 0
+            for n in (100, 1000, 10000):
+                seed_due(database, seeded, n - seeded)
+                seeded = n
+                assert len(engine.db.get_due_reminders(datetime.now())) == n
+                yield f'notifications.check_and_send[medications={n}]', tick
+        finally:
+            database.dispose_pools()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def seed_due(database, offset: int, count: int):
+    """Add count medications, each with a dose five minutes from now inside a 15 minute window"""
+    minute = (datetime.now() + timedelta(minutes=5)).replace(second=0, microsecond=0)
+    hhmm = minute.strftime('%H:%M')
+    conn = database.engine.raw_connection()
+    cursor = conn.cursor()
+    if offset == 0:
+        cursor.execute("INSERT INTO users (google_id, email, created_at, data_version) "
+                       "VALUES ('microbench', 'microbench@example.com', '2024-01-01 00:00:00', 0)")
+    cursor.executemany(
+        'INSERT INTO medications (id, name, dosage, frequency, times, start_date, user_id, phone_number, '
+        "reminder_minutes, created_at) VALUES (?, ?, '10mg', 'daily', ?, '2024-01-01', 1, '+15550000', 15, "
+        "'2024-01-01 00:00:00')",
+        [(offset + i + 1, f'Medication {offset + i}', json.dumps([hhmm])) for i in range(count)]
+    )
+    cursor.executemany('INSERT INTO medication_dose_times (medication_id, minute_of_day) VALUES (?, ?)',
+                       [(offset + i + 1, minute.hour * 60 + minute.minute) for i in range(count)])
+    conn.commit()
+    conn.close()
+
+
+CASES = {
+    'adherence.': adherence_cases,
+    'pill.': pill_cases,
+    'interactions.': interaction_cases,
+    'notifications.': notification_cases,
+}
+
+
+def _wanted(prefix: str, k: str) -> bool:
+    """Whether a group can hold benchmarks matching -k; skips the setup of groups -k rules out"""
+    if not k:
+        return True
+    named = [p for p in CASES if k.startswith(p) or p.startswith(k)]
+    return not named or prefix in named
+
+
+# ============= History =============
+
+def load_history(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f}{unit}'
+    return f'{seconds / 1e-9:.0f}ns'
+
+
+def regressions(new: dict, old: dict, threshold: float) -> list:
+    """(name, old median, new median, change) for benchmarks slower by more than threshold percent"""
+    slower = []
+    for name, result in new.items():
+        if name in old:
+            change = result['median'] / old[name]['median'] - 1
+            if change * 100 > threshold:
+                slower.append((name, old[name]['median'], result['median'], change))
+    return slower
+
+
+# ============= Commands =============
+
+def run(args):
+    history = load_history(args.history)
+    previous = history[-1]['results'] if history else {}
+    results = {}
+    print(f"{'benchmark':<64}{'median':>11}{'min':>11}{'IQR':>11}{'vs last':>9}")
+    for prefix, group in CASES.items():
+        if not _wanted(prefix, args.k):
+            continue
+        for name, fn in group():
+            if args.k and args.k not in name:
+                continue
+            results[name] = result = measure(fn, args.rounds, args.min_time)
+            change = f"{result['median'] / previous[name]['median'] - 1:+.0%}" if name in previous else ''
+            print(f"{name:<64}{format_time(result['median']):>11}{format_time(result['min']):>11}"
+                  f"{format_time(result['iqr']):>11}{change:>9}")
+
+    if not args.no_save:
+        history.append({
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.node(),
+            'results': results,
+        })
+        with open(args.history, 'w') as f:
+            json.dump(history, f, indent=1)
+        print(f"\nAppended to {args.history} ({len(history)} runs)")
+
+
+def compare(args) -> int:
+    history = load_history(args.history)
+    if len(history) < 2:
+        print(f"Need at least two runs in {args.history}")
+        return 2
+    new = history[-1]
+    if args.against:
+        matches = [entry for entry in history[:-1] if entry['commit'].startswith(args.against)]
+        if not matches:
+            print(f"No run for commit {args.against} in {args.history}")
+            return 2
+        old = matches[-1]
+    else:
+        old = history[-2]
+
+    print(f"{new['commit']} ({new['timestamp']}) vs {old['commit']} ({old['timestamp']}), "
+          f"threshold {args.threshold:g}%")
+    slower = regressions(new['results'], old['results'], args.threshold)
+    for name, before, after, change in slower:
+        print(f"  REGRESSION {name}: {format_time(before)} -> {format_time(after)} ({change:+.0%})")
+    faster = [name for name in new['results'] if name in old['results']
+              and 1 - new['results'][name]['median'] / old['results'][name]['median'] > args.threshold / 100]
+    print(f"{len(slower)} slower, {len(faster)} faster, "
+          f"{len(set(new['results']) & set(old['results'])) - len(slower) - len(faster)} unchanged")
+    return 1 if slower else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks and append the results to the history')
+    run_parser.add_argument('-k', help='Only benchmarks whose name contains this')
+    run_parser.add_argument('--rounds', type=int, default=15)
+    run_parser.add_argument('--min-time', type=float, default=0.05, help='Seconds per round, at least')
+    run_parser.add_argument('--no-save', action='store_true', help='Do not append to the history')
+
+    compare_parser = commands.add_parser('compare', help='Flag regressions between two runs in the history')
+    compare_parser.add_argument('--against', help='Commit of the earlier run (default: the run before the newest)')
+    compare_parser.add_argument('--threshold', type=float, default=10, help='Percent slowdown that fails')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Seed a synthetic population: users, their medications and years of dose logs
+
+Users are load_user_0 .. load_user_<N-1>, the Google ids that local_auth
+tokens sign for, so bench_load.py can sign in as any of them. Each user
+gets --medications daily medications on one- to three-dose schedules and a
+log for every dose over the last --years, taken or missed according to the
+user's own adherence rate. Writes go through MedicineDatabase (bulk inserts),
+so shards from DATABASE_SHARD_URLS are filled the way the app fills them.
+Seeding is idempotent per user: users that already have medications are
+skipped.
+
+Usage (from backend/):
+    python benchmarks/population.py --database-url sqlite:///load.db [--users 200] [--medications 4] [--years 2]
+    python benchmarks/population.py --database-url postgresql://... --users 5000
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DRUGS = ['Warfarin', 'Aspirin', 'Metformin', 'Lisinopril', 'Atorvastatin', 'Omeprazole', 'Simvastatin',
+         'Amlodipine', 'Ibuprofen', 'Levothyroxine', 'Metoprolol', 'Sertraline', 'Clopidogrel', 'Digoxin']
+SCHEDULES = [['08:00'], ['08:00'], ['09:00', '21:00'], ['08:00', '20:00'], ['07:00', '13:00', '19:00']]
+
+
+def google_id(index: int) -> str:
+    return f'load_user_{index}'
+
+
+def dose_logs(rng: random.Random, med_id: int, times: list, start: date, end: date, adherence: float,
+              now: datetime):
+    """One log entry per scheduled dose between start and end; doses after now stay pending"""
+    day = start
+    while day <= end:
+        for hhmm in times:
+            scheduled = datetime.combine(day, datetime.strptime(hhmm, '%H:%M').time())
+            entry = {'medication_id': med_id, 'scheduled_time': scheduled.isoformat()}
+            if scheduled > now:
+                entry['status'] = 'pending'
+            elif rng.random() < adherence:
+                entry['status'] = 'taken'
+                entry['taken_time'] = (scheduled + timedelta(minutes=rng.randint(-20, 90))).isoformat()
+            else:
+                entry['status'] = 'missed'
+            yield entry
+        day += timedelta(days=1)
+
+
+def seed_population(db, users: int, medications: int, years: float, seed: int = 42, batch: int = 5000) -> dict:
+    """Seed users load_user_0 .. load_user_<users-1>; returns counts of what was created"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    end = now.date()
+    start = end - timedelta(days=int(365 * years))
+    created = {'users': 0, 'medications': 0, 'logs': 0}
+
+    for index in range(users):
+        # get_or_create_user announces every new user
+        with contextlib.redirect_stdout(io.StringIO()):
+            user = db.get_or_create_user(google_id(index), f'{google_id(index)}@local.test', google_id(index))
+        if db.get_all_medications(user.id):
+            continue
+        created['users'] += 1
+        adherence = rng.uniform(0.55, 0.98)
+
+        pending = []
+        for drug in rng.sample(DRUGS, min(medications, len(DRUGS))):
+            times = rng.choice(SCHEDULES)
+            med_id = db.add_medication(user.id, drug, f'{rng.choice([5, 10, 20, 50, 100])}mg', 'daily',
+                                       times, start.isoformat())
+            created['medications'] += 1
+            pending.extend(dose_logs(rng, med_id, times, start, end, adherence, now))
+            while len(pending) >= batch:
+                db.bulk_log_medications(user.id, pending[:batch])
+                created['logs'] += batch
+                del pending[:batch]
+        if pending:
+            db.bulk_log_medications(user.id, pending)
+            created['logs'] += len(pending)
+        db.remove_session()
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Defaults to DATABASE_URL')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--medications', type=int, default=4, help='Per user')
+    parser.add_argument('--years', type=float, default=2, help='Years of dose history per medication')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    import database
+
+    database.migrate()
+    start = time.perf_counter()
+    created = seed_population(database.MedicineDatabase(), args.users, args.medications, args.years, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"Seeded {created['users']} users, {created['medications']} medications and "
+          f"{created['logs']:,} logs in {elapsed:.1f}s ({created['logs'] / max(elapsed, 1e-9):,.0f} logs/s)")
+
+
+if __name__ == '__main__':
+    main()
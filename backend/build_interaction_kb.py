@@ -0,0 +1,47 @@
+"""
+Build a compact interaction knowledge base file from the drug_interactions table
+
+Usage:
+    python build_interaction_kb.py interactions.kb [--db DATABASE_URL] [--sample]
+
+Point INTERACTION_KB_PATH at the output file to load it on startup. An empty
+or missing table is an error, since the file would hold only the built-in
+sample interactions; pass --sample to write those on purpose (development).
+"""
+import argparse
+import os
+import sys
+import time
+
+from models.interaction_checker import InteractionChecker
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a compact interaction knowledge base file')
+    parser.add_argument('output', help='Path of the compact file to write')
+    parser.add_argument('--db', default=os.getenv('DATABASE_URL', 'sqlite:///medicine_tracker.db'),
+                        help='Database URL holding the drug_interactions table')
+    parser.add_argument('--sample', action='store_true',
+                        help='Write the built-in sample interactions when the table is empty')
+    args = parser.parse_args()
+
+    db_url = args.db
+    if db_url.startswith('postgres://'):
+        db_url = db_url.replace('postgres://', 'postgresql://', 1)
+
+    start = time.perf_counter()
+    checker = InteractionChecker(db_url)
+    loaded = time.perf_counter() - start
+    if checker.uses_sample_data and not args.sample:
+        sys.exit(f"No interactions in the drug_interactions table of {db_url}; "
+                 "refusing to write the built-in sample set (pass --sample to do so)")
+
+    checker.save_compact(args.output)
+    stats = checker.get_database_stats()
+    print(f"Loaded {stats['total_interactions']} interactions "
+          f"({stats['unique_medications']} medications) in {loaded:.2f}s")
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Negotiated response compression
+
+Responses of a text-like type (JSON, text/*, JavaScript, SVG) of at least
+COMPRESS_MIN_BYTES are compressed with brotli or gzip, whichever the
+client's Accept-Encoding prefers. Brotli needs the optional `brotli`
+package, otherwise only gzip is offered. Streamed responses (NDJSON log
+exports) and bodies below the threshold are sent as they are: a smaller
+body is not worth the compressor's CPU. Compressed bodies get weak ETags,
+since a strong ETag names one exact byte sequence.
+"""
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only without it
+    brotli = None
+
+from flask import request
+
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+# Brotli's higher qualities cost far more CPU per response than they save on the wire
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'image/svg+xml')
+
+
+def compressible(mimetype: str) -> bool:
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+def choose_encoding(accept_encodings) -> str:
+    """'br', 'gzip' or None for the client's Accept-Encoding, preferring brotli on a tie"""
+    gzip_quality = accept_encodings.quality('gzip')
+    if brotli is not None:
+        brotli_quality = accept_encodings.quality('br')
+        if brotli_quality > 0 and brotli_quality >= gzip_quality:
+            return 'br'
+    return 'gzip' if gzip_quality > 0 else None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response):
+    """after_request: compress the body when the client accepts it and it is worth it"""
+    if (response.direct_passthrough or response.is_streamed or not 200 <= response.status_code < 300
+            or response.status_code in (204, 206) or 'Content-Encoding' in response.headers
+            or not compressible(response.mimetype or '')):
+        return response
+
+    # Whether or not this body is compressed, the same URL's next one may be
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
@@ -0,0 +1,49 @@
+import os
+from contextlib import contextmanager
+
+# Set before any test imports app: its scheduler jobs and ML warm-up would otherwise
+# write to and read from the test database in the background while tests run
+os.environ['SCHEDULER_ENABLED'] = '0'
+os.environ['ML_WARMUP'] = '0'
+
+import pytest
+
+import query_monitor
+
+
+@pytest.fixture
+def auth_user(monkeypatch):
+    """
+    Make the API treat requests as coming from a user, for the rest of the test:
+
+        auth_user(user)
+        client.get('/api/medications')
+    """
+    import app as app_module
+
+    def authenticate(user):
+        monkeypatch.setattr(app_module, 'get_authenticated_user', lambda: user)
+
+    return authenticate
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail when a block runs more SQL statements than budgeted, or repeats one
+    statement shape REPEATED_QUERY_THRESHOLD or more times:
+
+        with query_budget(2):
+            client.get('/api/medications')
+    """
+    @contextmanager
+    def budget(max_queries: int, max_repeats: int = None):
+        with query_monitor.track_queries() as shapes:
+            yield shapes
+        listing = '\n'.join(f'  {count}x {shape}' for shape, count in shapes.most_common())
+        total = sum(shapes.values())
+        assert total <= max_queries, f'{total} SQL statements, budget {max_queries}:\n{listing}'
+        repeated = query_monitor.repeated_shapes(shapes, max_repeats)
+        assert not repeated, f'Repeated statement shapes (query in a loop?):\n{listing}'
+
+    return budget
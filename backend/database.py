@@ -1,23 +1,133 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, ForeignKey
+import functools
+import inspect as pyinspect
+import threading
+import time as clock
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from sqlalchemy import (create_engine, event, inspect, insert, select, text, update, func, case, Column, Integer,
+                        String, Text, Date, DateTime, Float, ForeignKey, Index, and_, or_, bindparam)
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime
+from sqlalchemy.orm import scoped_session, sessionmaker, relationship
+from datetime import date, datetime, time, timedelta
+import base64
 import json
+import events
+from fastjson import RowList
 
 # Get database URL from environment variable (for Render deployment)
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///medicine_tracker.db')
 
-# Fix for Render's postgres:// URL (SQLAlchemy needs postgresql://)
-if DATABASE_URL.startswith('postgres://'):
-    DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
+def _normalize_url(url: str) -> str:
+    # Fix for Render's postgres:// URL (SQLAlchemy needs postgresql://)
+    if url.startswith('postgres://'):
+        return url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+DATABASE_URL = _normalize_url(DATABASE_URL)
+
+# Optional comma-separated read replicas for the read-only MedicineDatabase methods
+DATABASE_REPLICA_URLS = [_normalize_url(url.strip()) for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',')
+                         if url.strip()]
+
+# How replica-eligible reads are routed, overridable per request with set_read_consistency():
+#   strong           - always the primary
+#   read-your-writes - the primary for REPLICA_LAG_SECONDS after the same user wrote, otherwise a replica.
+#                      Writes are remembered by this process and by the client, which echoes the
+#                      X-Last-Write marker of its latest write, so other workers honour them too
+#   eventual         - a replica whenever one is healthy
+READ_CONSISTENCY_MODES = ('strong', 'read-your-writes', 'eventual')
+DEFAULT_READ_CONSISTENCY = os.getenv('READ_CONSISTENCY', 'read-your-writes')
+REPLICA_LAG_SECONDS = float(os.getenv('REPLICA_LAG_SECONDS', '5'))
+
+# SQLite performance profile, applied to every new connection. WAL lets readers
+# run alongside the single writer; SQLITE_TUNING=0 keeps SQLite's defaults
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',        # fsync at checkpoints only; safe in WAL mode
+    'busy_timeout': 5000,           # ms a writer waits for the lock instead of failing
+    'cache_size': -64000,           # 64 MB page cache per connection
+    'mmap_size': 268435456,         # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+}
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', '1') != '0'
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {pragma}={value}')
+    cursor.close()
+
+def _create_engine(url: str, **kwargs):
+    new_engine = create_engine(url, **kwargs)
+    if new_engine.dialect.name == 'sqlite' and SQLITE_TUNING:
+        event.listen(new_engine, 'connect', _apply_sqlite_pragmas)
+    return new_engine
+
+class ReplicaPool:
+    """
+    Round-robin over read replica engines
+    A replica that fails a query sits out for RETRY_SECONDS, then has to pass
+    a SELECT 1 health check before it takes reads again
+    """
+    
+    RETRY_SECONDS = 30.0
+    
+    def __init__(self, urls):
+        # pool_pre_ping replaces connections a restarted replica dropped
+        self.engines = [_create_engine(url, pool_pre_ping=True) for url in urls]
+        self._lock = threading.Lock()
+        self._next = 0
+        self._down_until = {}
+    
+    def choose(self):
+        """Next healthy replica engine, or None if all are down"""
+        for _ in range(len(self.engines)):
+            with self._lock:
+                candidate = self.engines[self._next % len(self.engines)]
+                self._next += 1
+                down_until = self._down_until.get(candidate)
+            if down_until is None:
+                return candidate
+            if clock.monotonic() >= down_until and self._healthy(candidate):
+                with self._lock:
+                    self._down_until.pop(candidate, None)
+                return candidate
+        return None
+    
+    def mark_down(self, replica):
+        with self._lock:
+            self._down_until[replica] = clock.monotonic() + self.RETRY_SECONDS
+        print(f"Replica {replica.url!r} marked down for {self.RETRY_SECONDS:g}s")
+    
+    def _healthy(self, replica) -> bool:
+        try:
+            with replica.connect() as conn:
+                conn.execute(text('SELECT 1'))
+            return True
+        except DBAPIError:
+            with self._lock:
+                self._down_until[replica] = clock.monotonic() + self.RETRY_SECONDS
+            return False
+    
+    def get_stats(self) -> dict:
+        now = clock.monotonic()
+        with self._lock:
+            down = sum(1 for until in self._down_until.values() if until > now)
+        return {'replicas': len(self.engines), 'down': down}
 
 # Create engine
 print(f"Connecting to database at: {DATABASE_URL.split('@')[-1] if '@' in DATABASE_URL else DATABASE_URL}")
 try:
-    engine = create_engine(DATABASE_URL)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine = _create_engine(DATABASE_URL)
+    replicas = ReplicaPool(DATABASE_REPLICA_URLS) if DATABASE_REPLICA_URLS else None
+    # One session, and so one pooled connection, per thread: request threads and
+    # scheduler jobs never share a connection. Call SessionLocal.remove() when done
+    SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
     Base = declarative_base()
+    if replicas:
+        print(f"Routing read-only queries to {len(replicas.engines)} replica(s).")
     print("Database engine and session factory created.")
 except Exception as e:
     print(f"FAILED to create database engine: {e}")
@@ -33,6 +143,8 @@ class User(Base):
     email = Column(String(200), unique=True, nullable=False)
     name = Column(String(200))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped on every write to the user's medications or logs; drives dashboard ETags
+    data_version = Column(Integer, nullable=False, default=0, server_default='0')
     
     medications = relationship("Medication", back_populates="user")
 
@@ -43,18 +155,28 @@ class Medication(Base):
     name = Column(String(200), nullable=False)
     dosage = Column(String(100), nullable=False)
     frequency = Column(String(100), nullable=False)
-    times = Column(Text, nullable=False)  # JSON string
-    start_date = Column(String(50), nullable=False)
-    end_date = Column(String(50))
+    times = Column(Text, nullable=False)  # JSON string, rendered as-is; schedule queries use dose_times
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date)
     notes = Column(Text)
     image_path = Column(String(500))
     phone_number = Column(String(50))  # WhatsApp number
-    reminder_minutes = Column(Integer, default=15)
+    # Indexed so the widest reminder window is a single index lookup
+    reminder_minutes = Column(Integer, default=15, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="medications")
     logs = relationship("MedicationLog", back_populates="medication")
+    dose_times = relationship("MedicationDoseTime", back_populates="medication", cascade="all, delete-orphan")
+
+class MedicationDoseTime(Base):
+    __tablename__ = 'medication_dose_times'
+    
+    medication_id = Column(Integer, ForeignKey('medications.id'), primary_key=True)
+    minute_of_day = Column(Integer, primary_key=True, index=True)  # 0-1439, server-local time
+    
+    medication = relationship("Medication", back_populates="dose_times")
 
 class MedicationLog(Base):
     __tablename__ = 'medication_logs'
@@ -62,13 +184,22 @@ class MedicationLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     medication_id = Column(Integer, ForeignKey('medications.id'), nullable=False)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    scheduled_time = Column(String(50), nullable=False)
-    taken_time = Column(String(50))
+    scheduled_time = Column(DateTime, nullable=False)
+    taken_time = Column(DateTime)
     status = Column(String(50), nullable=False)
     notes = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     medication = relationship("Medication", back_populates="logs")
+    
+    __table_args__ = (
+        # Serves per-user history queries and keyset pagination
+        Index('ix_medication_logs_user_scheduled', 'user_id', 'scheduled_time', 'id'),
+        # Existing-dose lookups when materializing a day's schedule
+        Index('ix_medication_logs_medication_scheduled', 'medication_id', 'scheduled_time'),
+        # Lets the missed-dose sweeper reach overdue pending rows without scanning history
+        Index('ix_medication_logs_status_scheduled', 'status', 'scheduled_time'),
+    )
 
 class MLPrediction(Base):
     __tablename__ = 'ml_predictions'
@@ -88,23 +219,583 @@ class DrugInteraction(Base):
     drug2 = Column(String(200), nullable=False)
     severity = Column(String(50), nullable=False)
     description = Column(Text, nullable=False)
+    recommendation = Column(Text)
 
-# Create tables
-print("Creating database tables if they don't exist...")
-try:
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created/verified successfully.")
-except Exception as e:
-    print(f"FAILED to create database tables: {e}")
-    raise
+class UserDirectory(Base):
+    """Which shard holds each user; only used, and only on shard 0, when sharding is configured"""
+    __tablename__ = 'user_directory'
+    
+    id = Column(Integer, primary_key=True)  # the user's id on every shard
+    google_id = Column(String(200), unique=True, nullable=False, index=True)
+    shard = Column(Integer, nullable=False)
+
+class MaterializedDay(Base):
+    """Days whose scheduled doses have been materialized, per shard, so missed runs can be caught up"""
+    __tablename__ = 'materialized_days'
+    
+    day = Column(Date, primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class SchemaMigration(Base):
+    __tablename__ = 'schema_migrations'
+    
+    name = Column(String(100), primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+# Valid medication log statuses
+LOG_STATUSES = ('pending', 'taken', 'missed')
+
+# Frequencies without a fixed schedule; no doses are materialized for them
+UNSCHEDULED_FREQUENCIES = ('as-needed',)
+# How far back catch_up_doses() fills in days whose materialization never ran
+MATERIALIZE_CATCH_UP_DAYS = int(os.getenv('MATERIALIZE_CATCH_UP_DAYS', '7'))
+
+# Columns returned by the list endpoints, selected as plain rows rather than ORM entities
+MEDICATION_LIST_COLUMNS = (
+    Medication.id, Medication.name, Medication.dosage, Medication.frequency, Medication.times,
+    Medication.start_date, Medication.end_date, Medication.notes, Medication.image_path,
+    Medication.phone_number, Medication.reminder_minutes, Medication.created_at
+)
+LOG_LIST_COLUMNS = (
+    MedicationLog.id, MedicationLog.medication_id, MedicationLog.scheduled_time,
+    MedicationLog.taken_time, MedicationLog.status, MedicationLog.notes, MedicationLog.created_at
+)
+
+# Date/time columns, returned to API clients as ISO 8601 strings
+TEMPORAL_KEYS = frozenset(['start_date', 'end_date', 'scheduled_time', 'taken_time', 'created_at'])
+
+def _to_datetime(value):
+    """
+    Parse an ISO 8601 timestamp from the API; raises ValueError if malformed
+    Timestamps are naive server-local wall-clock times, the clock datetime.now(),
+    dose times and reminders use. One with an offset ('...Z', '+02:00') is
+    converted to that clock and stored and returned without an offset. Every
+    stored value, on every backend and through the legacy-column migration,
+    goes through here
+    """
+    if value is None or value == '' or isinstance(value, datetime):
+        return value or None
+    if isinstance(value, date):
+        return datetime.combine(value, time())
+    if not isinstance(value, str):
+        raise ValueError(f'Invalid timestamp: {value!r}')
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f'Invalid timestamp: {value}')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def _dose_minutes(times) -> list:
+    """Minutes of the day for a list of 'HH:MM' times; raises ValueError if one is malformed"""
+    if not isinstance(times, list):
+        raise ValueError('times must be a list of HH:MM strings')
+    minutes = set()
+    for time_str in times:
+        try:
+            hour, minute = map(int, str(time_str).split(':')[:2])
+        except ValueError:
+            raise ValueError(f'Invalid time: {time_str}')
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f'Invalid time: {time_str}')
+        minutes.add(hour * 60 + minute)
+    return sorted(minutes)
+
+def _to_date(value):
+    """Parse an ISO 8601 date (a full timestamp is accepted); raises ValueError if malformed"""
+    if value is None or value == '' or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value or None
+    return _to_datetime(value).date()
+
+def _is_date_only(value) -> bool:
+    """Whether a range bound names a whole day ('2025-01-31') rather than an instant"""
+    if isinstance(value, date):
+        return not isinstance(value, datetime)
+    try:
+        date.fromisoformat(value.strip())
+        return True
+    except (AttributeError, ValueError):
+        return False
+
+def _upgrade_schema(bind=None):
+    """
+    Add columns and indexes introduced after a table was first created
+    create_all only creates missing tables, not what changed inside existing ones
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=bind.dialect)}'
+                if column.server_default is not None:
+                    ddl += f" DEFAULT '{column.server_default.arg}'"
+                conn.execute(text(ddl))
+                print(f"Added column {table.name}.{column.name}")
+            
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+# Legacy string columns converted to native date/time types
+TEMPORAL_MIGRATION_COLUMNS = {
+    'medications': (('start_date', Date, False), ('end_date', Date, True)),
+    'medication_logs': (('scheduled_time', DateTime, False), ('taken_time', DateTime, True)),
+}
+
+def _migrate_temporal_columns(batch_size: int = 5000, bind=None):
+    """
+    Convert the date/time columns that used to be String(50), once per database
+    The values are parsed with _to_datetime() on both backends, so offsets are
+    converted to server-local time the same way. SQLite has no ALTER COLUMN
+    and stores DateTime as text anyway, so they are rewritten in SQLAlchemy's
+    sortable format. PostgreSQL gets them rewritten as naive ISO text first,
+    then changes the column types in place: a plain ::TIMESTAMP cast would
+    drop an offset instead of converting it. Unparseable values become NULL,
+    or the row's created_at where the column is required
+    """
+    name = 'native_temporal_columns'
+    bind = bind or engine
+    with bind.begin() as conn:
+        if _migration_applied(conn, name):
+            return
+        
+        if bind.dialect.name == 'postgresql':
+            inspector = inspect(conn)
+            for table_name, columns in TEMPORAL_MIGRATION_COLUMNS.items():
+                legacy = {c['name'] for c in inspector.get_columns(table_name) if isinstance(c['type'], String)}
+                columns = [column for column in columns if column[0] in legacy]
+                if columns:
+                    _rewrite_temporal_values(conn, Base.metadata.tables[table_name], columns, batch_size, as_text=True)
+                for column, type_, nullable in columns:
+                    sql_type = 'DATE' if type_ is Date else 'TIMESTAMP'
+                    value = f"CASE WHEN {column} ~ '^\\d{{4}}-\\d{{2}}-\\d{{2}}' THEN {column}::{sql_type} END"
+                    if not nullable:
+                        value = f'COALESCE({value}, created_at::{sql_type})'
+                    conn.execute(text(f'ALTER TABLE {table_name} ALTER COLUMN {column} TYPE {sql_type} USING {value}'))
+        else:
+            for table_name, columns in TEMPORAL_MIGRATION_COLUMNS.items():
+                _rewrite_temporal_values(conn, Base.metadata.tables[table_name], columns, batch_size)
+        
+        _record_migration(conn, name)
+
+def _migration_applied(conn, name: str) -> bool:
+    return conn.execute(select(SchemaMigration.name).where(SchemaMigration.name == name)).first() is not None
+
+def _record_migration(conn, name: str):
+    conn.execute(insert(SchemaMigration).values(name=name, applied_at=datetime.utcnow()))
+    print(f"Applied migration {name}")
+
+def _rewrite_temporal_values(conn, table, columns, batch_size: int, as_text: bool = False):
+    """as_text=True writes naive ISO text, for columns that are still String"""
+    names = [column for column, _, _ in columns]
+    # Read the raw stored text; the DateTime/Date result processors would reject legacy values
+    read = text(f"SELECT id, created_at, {', '.join(names)} FROM {table.name} WHERE id > :last_id ORDER BY id LIMIT :limit")
+    write = update(table).where(table.c.id == bindparam('row_id')).values(
+        {column: bindparam(f'new_{column}', type_=String() if as_text else table.c[column].type) for column in names}
+    )
+    
+    last_id = 0
+    while True:
+        rows = conn.execute(read, {'last_id': last_id, 'limit': batch_size}).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        
+        params = []
+        for row_id, created_at, *values in rows:
+            converted = {'row_id': row_id}
+            for (column, type_, nullable), value in zip(columns, values):
+                try:
+                    parsed = _to_datetime(value)
+                except ValueError:
+                    parsed = None
+                if parsed is None and not nullable:
+                    parsed = _to_datetime(created_at) if created_at else datetime.utcnow()
+                if parsed is not None and type_ is Date:
+                    parsed = parsed.date()
+                if parsed is not None and as_text:
+                    parsed = parsed.isoformat()
+                converted[f'new_{column}'] = parsed
+            params.append(converted)
+        conn.execute(write, params)
+
+def _backfill_dose_times(batch_size: int = 5000, bind=None):
+    """Fill medication_dose_times from each medication's JSON times, once per database"""
+    name = 'medication_dose_times'
+    with (bind or engine).begin() as conn:
+        if _migration_applied(conn, name):
+            return
+        
+        read = select(Medication.id, Medication.times).order_by(Medication.id).limit(batch_size)
+        last_id = 0
+        while True:
+            meds = conn.execute(read.where(Medication.id > last_id)).all()
+            if not meds:
+                break
+            last_id = meds[-1].id
+            
+            rows = []
+            for med_id, times in meds:
+                try:
+                    minutes = _dose_minutes(json.loads(times))
+                except (TypeError, ValueError):
+                    # Malformed legacy schedules keep rendering but never fire
+                    continue
+                rows.extend({'medication_id': med_id, 'minute_of_day': minute} for minute in minutes)
+            if rows:
+                conn.execute(insert(MedicationDoseTime), rows)
+        
+        _record_migration(conn, name)
+
+def _prepare_schema(bind):
+    Base.metadata.create_all(bind=bind)
+    _upgrade_schema(bind)
+    _migrate_temporal_columns(bind=bind)
+    _backfill_dose_times(bind=bind)
+
+
+# Sharding: user data lives on one of N databases. Shard 0 is DATABASE_URL,
+# which also holds the user directory (google_id -> user id -> shard) and the
+# global tables (drug interactions). ML predictions reference a medication, so
+# they live on its user's shard, like the logs. DATABASE_SHARD_URLS lists
+# shards 1..N-1; new users are placed by jump_hash(user_id, N)
+DATABASE_SHARD_URLS = [_normalize_url(url.strip()) for url in os.getenv('DATABASE_SHARD_URLS', '').split(',')
+                       if url.strip()]
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach): stable across processes, and
+    growing from N to N+1 buckets moves only 1/(N+1) of the keys
+    """
+    key &= 0xFFFFFFFFFFFFFFFF
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+shard_engines = [engine]
+_shard_sessions = [SessionLocal]
+_user_shards = {}  # user id -> shard, filled from the directory
+_current_shard = ContextVar('current_shard', default=0)
+# Threads shared by every cross-shard query
+SHARD_FAN_OUT_WORKERS = int(os.getenv('SHARD_FAN_OUT_WORKERS', '16'))
+_fan_out_pool = None
+_fan_out_pool_lock = threading.Lock()
+
+def _get_fan_out_pool() -> ThreadPoolExecutor:
+    # Created on first use, so a preloaded master forks without these threads
+    global _fan_out_pool
+    with _fan_out_pool_lock:
+        if _fan_out_pool is None:
+            _fan_out_pool = ThreadPoolExecutor(max_workers=SHARD_FAN_OUT_WORKERS, thread_name_prefix='shard')
+        return _fan_out_pool
+
+def configure_shards(urls: list):
+    """
+    Set up shards 1..N-1 from their URLs, replacing any configured before
+    The new shards get their schema, and shard 0's existing users a directory entry, from migrate()
+    """
+    global shard_engines, _shard_sessions
+    for shard_engine in shard_engines[1:]:
+        shard_engine.dispose()
+    
+    shard_engines = [engine] + [_create_engine(url) for url in urls]
+    _shard_sessions = [SessionLocal] + [
+        scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=shard_engine))
+        for shard_engine in shard_engines[1:]
+    ]
+    _user_shards.clear()
+    if AUTO_MIGRATE:
+        migrate()
+
+def _backfill_user_directory():
+    """Add shard 0's users that predate sharding to the directory"""
+    with engine.begin() as conn:
+        listed = select(UserDirectory.id)
+        conn.execute(insert(UserDirectory).from_select(
+            ['id', 'google_id', 'shard'],
+            select(User.id, User.google_id, text('0')).where(User.id.notin_(listed))
+        ))
+        if engine.dialect.name == 'postgresql':
+            # Explicit ids do not advance the serial sequence
+            conn.execute(text("SELECT setval(pg_get_serial_sequence('user_directory', 'id'), "
+                              "GREATEST((SELECT MAX(id) FROM user_directory), 1))"))
+
+
+# Schema changes are applied by migrate(), run as a release step (python migrate.py)
+# rather than on import. AUTO_MIGRATE=1 runs it when MedicineDatabase is first created
+# or shards are configured; it defaults to on for SQLite, where the file is created on demand
+AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', '1' if DATABASE_URL.startswith('sqlite') else '0') == '1'
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+def migrate():
+    """Create and upgrade the schema on every shard that has not been migrated by this process"""
+    with _migrate_lock:
+        pending = [shard_engine for shard_engine in shard_engines if shard_engine not in _migrated]
+        if not pending:
+            return
+        
+        print("Creating database tables if they don't exist...")
+        try:
+            for shard_engine in pending:
+                _prepare_schema(shard_engine)
+            if len(shard_engines) > 1:
+                _backfill_user_directory()
+            print("Database tables created/verified successfully.")
+        except Exception as e:
+            print(f"FAILED to create database tables: {e}")
+            raise
+        _migrated.update(pending)
+
+if DATABASE_SHARD_URLS:
+    configure_shards(DATABASE_SHARD_URLS)
+    print(f"Sharding user data across {len(shard_engines)} databases.")
+
+def dispose_pools(close: bool = True):
+    """
+    Drop the pooled connections of every engine (primary, shards, replicas)
+    A forked worker calls it with close=False, which forgets the connections
+    inherited from its parent without closing them under the parent's feet
+    """
+    for pool_engine in shard_engines + (replicas.engines if replicas else []):
+        pool_engine.dispose(close=close)
+
+def _on_user_shard(method):
+    """Run a MedicineDatabase method on the shard that holds its user_id argument"""
+    position = list(pyinspect.signature(method).parameters).index('user_id')
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if len(shard_engines) == 1:
+            return method(self, *args, **kwargs)
+        user_id = kwargs['user_id'] if 'user_id' in kwargs else (
+            args[position - 1] if len(args) >= position else None)
+        if user_id is None:
+            return method(self, *args, **kwargs)
+        token = _current_shard.set(self.shard_for_user(user_id))
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _current_shard.reset(token)
+    return wrapper
+
+
+# Read consistency chosen for the current request, the client's write marker, and when this request
+# and each user last wrote. Wall-clock seconds, so a marker means the same on every worker
+_read_consistency = ContextVar('read_consistency', default=None)
+_client_last_write = ContextVar('client_last_write', default=None)
+_request_wrote_at = ContextVar('request_wrote_at', default=None)
+_last_write = {}
+# Entries older than REPLICA_LAG_SECONDS no longer route anything; they are dropped past this size
+LAST_WRITE_PRUNE_SIZE = 1024
+
+def _prune_last_writes(now: float):
+    for user_id, wrote_at in list(_last_write.items()):
+        if now - wrote_at >= REPLICA_LAG_SECONDS and _last_write.get(user_id) == wrote_at:
+            _last_write.pop(user_id, None)
+
+
+def _delete_user_rows(conn, user_id: int):
+    """Delete a user and everything they own from one shard"""
+    med_ids = select(Medication.id).where(Medication.user_id == user_id)
+    conn.execute(MedicationDoseTime.__table__.delete().where(MedicationDoseTime.medication_id.in_(med_ids)))
+    conn.execute(MLPrediction.__table__.delete().where(MLPrediction.medication_id.in_(med_ids)))
+    conn.execute(MedicationLog.__table__.delete().where(MedicationLog.user_id == user_id))
+    conn.execute(Medication.__table__.delete().where(Medication.user_id == user_id))
+    conn.execute(User.__table__.delete().where(User.id == user_id))
 
 
 class MedicineDatabase:
     def __init__(self):
-        self.session = SessionLocal()
+        if AUTO_MIGRATE:
+            migrate()
+    
+    @property
+    def session(self):
+        """The calling thread's session on the current shard"""
+        return _shard_sessions[_current_shard.get()]()
+    
+    def remove_session(self):
+        """Close and discard the calling thread's sessions, returning their connections to the pool"""
+        for sessions in _shard_sessions:
+            sessions.remove()
+        _read_consistency.set(None)
+        _client_last_write.set(None)
+        _request_wrote_at.set(None)
+    
+    def rollback_session(self):
+        """Roll back the calling thread's sessions, e.g. after a failed write left them unusable"""
+        for sessions in _shard_sessions:
+            sessions().rollback()
+    
+    def shard_for_user(self, user_id: int) -> int:
+        """Shard holding a user: the directory entry, or where a new user with that id would go"""
+        if len(shard_engines) == 1:
+            return 0
+        shard = _user_shards.get(user_id)
+        if shard is None:
+            shard = SessionLocal().execute(select(UserDirectory.shard).where(UserDirectory.id == user_id)).scalar()
+            if shard is None:
+                return jump_hash(user_id, len(shard_engines))
+            _user_shards[user_id] = shard
+        return shard
+    
+    def _fan_out(self, method, *args, **kwargs) -> list:
+        """
+        Run a method once per shard, in parallel, and return the results in shard order
+        Each worker uses its own session on its shard and removes it when done
+        """
+        if len(shard_engines) == 1:
+            return [method(*args, **kwargs)]
+        
+        def run(shard):
+            _current_shard.set(shard)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _shard_sessions[shard].remove()
+        
+        # A copy of the caller's context per shard, so per-request query tallies see the workers
+        contexts = [copy_context() for _ in shard_engines]
+        return list(_get_fan_out_pool().map(lambda shard: contexts[shard].run(run, shard), range(len(shard_engines))))
+    
+    def move_user(self, user_id: int, target: int, batch_size: int = 5000) -> bool:
+        """
+        Copy a user's rows to another shard, repoint the directory, then delete the originals
+        Medication and log ids are reassigned by the target shard. Safe to rerun after a
+        failure: leftovers of an unfinished copy on the target are cleared first. Other
+        processes cache user placement, so restart them after moving users
+        """
+        source = self.shard_for_user(user_id)
+        if source == target:
+            return False
+        
+        with shard_engines[source].connect() as read, shard_engines[target].begin() as write:
+            _delete_user_rows(write, user_id)
+            user = read.execute(select(User.__table__).where(User.id == user_id)).mappings().first()
+            if user is None:
+                raise ValueError(f"User {user_id} not found on shard {source}")
+            write.execute(insert(User.__table__), [dict(user)])
+            
+            med_ids = {}
+            for med in read.execute(select(Medication.__table__).where(Medication.user_id == user_id)
+                                    .order_by(Medication.id)).mappings().all():
+                values = dict(med)
+                old_id = values.pop('id')
+                med_ids[old_id] = write.execute(insert(Medication.__table__).values(values)).inserted_primary_key[0]
+            
+            if med_ids:
+                doses = read.execute(select(MedicationDoseTime.__table__)
+                                     .where(MedicationDoseTime.medication_id.in_(list(med_ids)))).mappings().all()
+                if doses:
+                    write.execute(insert(MedicationDoseTime.__table__),
+                                  [{**dose, 'medication_id': med_ids[dose['medication_id']]} for dose in doses])
+                predictions = read.execute(select(MLPrediction.__table__)
+                                           .where(MLPrediction.medication_id.in_(list(med_ids)))).mappings().all()
+                if predictions:
+                    write.execute(insert(MLPrediction.__table__), [
+                        {**{key: value for key, value in prediction.items() if key != 'id'},
+                         'medication_id': med_ids[prediction['medication_id']]}
+                        for prediction in predictions
+                    ])
+            
+            logs = read.execute(select(MedicationLog.__table__).where(MedicationLog.user_id == user_id)
+                                .order_by(MedicationLog.id).execution_options(yield_per=batch_size)).mappings()
+            for partition in logs.partitions():
+                write.execute(insert(MedicationLog.__table__), [
+                    {**{key: value for key, value in log.items() if key != 'id'},
+                     'medication_id': med_ids[log['medication_id']]}
+                    for log in partition
+                ])
+        
+        with engine.begin() as conn:
+            conn.execute(update(UserDirectory).where(UserDirectory.id == user_id).values(shard=target))
+        _user_shards[user_id] = target
+        with shard_engines[source].begin() as conn:
+            _delete_user_rows(conn, user_id)
+        return True
+    
+    def set_read_consistency(self, mode: str = None, last_write: float = None):
+        """
+        Read consistency for the current request; None or an unknown mode means the default
+        last_write is the marker the client got back from its latest write (see last_write_marker())
+        """
+        _read_consistency.set(mode if mode in READ_CONSISTENCY_MODES else None)
+        _client_last_write.set(last_write)
+        _request_wrote_at.set(None)
+    
+    def last_write_marker(self) -> float:
+        """When the current request last wrote, for the client to send back on later requests; None if it did not"""
+        return _request_wrote_at.get()
+    
+    def _replica_for(self, user_id: int = None):
+        """Replica engine a read may use, or None to read from the primary"""
+        # Replicas follow DATABASE_URL, i.e. shard 0
+        if replicas is None or _current_shard.get() != 0:
+            return None
+        mode = _read_consistency.get() or DEFAULT_READ_CONSISTENCY
+        if mode == 'strong':
+            return None
+        if mode == 'read-your-writes' and user_id is not None:
+            wrote_at = max(_last_write.get(user_id) or 0, _client_last_write.get() or 0)
+            if clock.time() - wrote_at < REPLICA_LAG_SECONDS:
+                return None
+        return replicas.choose()
+    
+    def _read(self, stmt, user_id: int = None) -> tuple:
+        """
+        Run a read-only statement on a replica when routing allows; a failing
+        replica is marked down and the next one tried, then the primary.
+        Returns (keys, rows)
+        """
+        replica = self._replica_for(user_id)
+        while replica is not None:
+            try:
+                with replica.connect() as conn:
+                    result = conn.execute(stmt)
+                    return list(result.keys()), result.all()
+            except DBAPIError as e:
+                print(f"Replica read failed: {e}")
+                replicas.mark_down(replica)
+            replica = replicas.choose()
+        
+        result = self.session.execute(stmt)
+        return list(result.keys()), result.all()
+    
+    def _bump_data_version(self, user_id: int):
+        """Mark the user's data as changed, in the same transaction as the write"""
+        self.session.execute(
+            update(User).where(User.id == user_id).values(data_version=User.data_version + 1)
+        )
+        # Replicas may lag this write; read-your-writes reads go to the primary for a while
+        wrote_at = clock.time()
+        _last_write[user_id] = wrote_at
+        _request_wrote_at.set(wrote_at)
+        if len(_last_write) > LAST_WRITE_PRUNE_SIZE:
+            _prune_last_writes(wrote_at)
+    
+    def get_drug_interactions_stamp(self) -> tuple:
+        """(row count, highest id) of the drug_interactions table on shard 0; changes when rows are added or removed"""
+        with engine.connect() as conn:
+            return tuple(conn.execute(select(func.count(), func.max(DrugInteraction.id))).one())
+    
+    @_on_user_shard
+    def get_data_version(self, user_id: int) -> int:
+        """Current data version of a user, read fresh from the database"""
+        return self.session.execute(select(User.data_version).where(User.id == user_id)).scalar() or 0
     
     def get_or_create_user(self, google_id: str, email: str, name: str = None) -> User:
         """Get existing user or create a new one"""
+        if len(shard_engines) > 1:
+            return self._get_or_create_sharded_user(google_id, email, name)
+        
         user = self.session.query(User).filter(User.google_id == google_id).first()
         if not user:
             user = User(google_id=google_id, email=email, name=name)
@@ -112,7 +803,32 @@ class MedicineDatabase:
             self.session.commit()
             print(f"Created new user: {email}")
         return user
+    
+    def _get_or_create_sharded_user(self, google_id: str, email: str, name: str = None) -> User:
+        """The directory on shard 0 hands out user ids; the id then picks the user's shard"""
+        directory = SessionLocal()
+        entry = directory.query(UserDirectory).filter(UserDirectory.google_id == google_id).first()
+        if not entry:
+            entry = UserDirectory(google_id=google_id, shard=0)
+            directory.add(entry)
+            directory.flush()
+            entry.shard = jump_hash(entry.id, len(shard_engines))
+            directory.commit()
+        _user_shards[entry.id] = entry.shard
+        
+        token = _current_shard.set(entry.shard)
+        try:
+            user = self.session.get(User, entry.id)
+            if not user:
+                user = User(id=entry.id, google_id=google_id, email=email, name=name)
+                self.session.add(user)
+                self.session.commit()
+                print(f"Created new user: {email} (shard {entry.shard})")
+            return user
+        finally:
+            _current_shard.reset(token)
 
+    @_on_user_shard
     def add_medication(self, user_id: int, name: str, dosage: str, frequency: str, 
                       times: list, start_date: str, end_date: str = None,
                       notes: str = None, image_path: str = None,
@@ -124,45 +840,87 @@ class MedicineDatabase:
             dosage=dosage,
             frequency=frequency,
             times=json.dumps(times),
-            start_date=start_date,
-            end_date=end_date,
+            dose_times=[MedicationDoseTime(minute_of_day=minute) for minute in _dose_minutes(times)],
+            start_date=_to_date(start_date),
+            end_date=_to_date(end_date),
             notes=notes,
             image_path=image_path,
             phone_number=phone_number,
             reminder_minutes=reminder_minutes
         )
         self.session.add(med)
+        self._bump_data_version(user_id)
         self.session.commit()
+        events.publish(user_id, 'medication.created', medication_id=med.id, name=name)
         return med.id
     
-    def get_all_medications(self, user_id: int = None) -> list:
-        """Get all medications (optionally filtered by user)"""
-        query = self.session.query(Medication)
+    @_on_user_shard
+    def get_all_medications(self, user_id: int = None, as_rows: bool = False) -> list:
+        """
+        Get all medications (optionally filtered by user)
+        as_rows=True returns a RowList for fastjson instead of dicts
+        """
+        if user_id is None and len(shard_engines) > 1:
+            meds = [med for shard_meds in self._fan_out(self._medications_on_shard, None) for med in shard_meds]
+            return sorted(meds, key=lambda med: med['created_at'] or '', reverse=True)
+        return self._medications_on_shard(user_id, as_rows)
+    
+    def _medications_on_shard(self, user_id: int = None, as_rows: bool = False) -> list:
+        stmt = select(*MEDICATION_LIST_COLUMNS)
         if user_id is not None:
-            query = query.filter(Medication.user_id == user_id)
+            stmt = stmt.where(Medication.user_id == user_id)
+        
+        keys, rows = self._read(stmt.order_by(Medication.created_at.desc()), user_id)
+        return RowList(keys, rows) if as_rows else self._rows_to_dicts(keys, rows)
+    
+    @_on_user_shard
+    def get_medication_names(self, user_id: int, exclude_id: int = None) -> list:
+        """Get the names of a user's medications"""
+        query = self.session.query(Medication.name).filter(Medication.user_id == user_id)
+        if exclude_id is not None:
+            query = query.filter(Medication.id != exclude_id)
         
-        meds = query.order_by(Medication.created_at.desc()).all()
-        return [self._medication_to_dict(med) for med in meds]
+        return [name for (name,) in query.all()]
     
+    @_on_user_shard
     def get_medication(self, med_id: int, user_id: int) -> dict:
         """Get a specific medication"""
-        med = self.session.query(Medication).filter(Medication.id == med_id, Medication.user_id == user_id).first()
-        return self._medication_to_dict(med) if med else None
+        stmt = select(*MEDICATION_LIST_COLUMNS).where(Medication.id == med_id, Medication.user_id == user_id)
+        keys, rows = self._read(stmt, user_id)
+        return self._rows_to_dicts(keys, rows)[0] if rows else None
     
+    @_on_user_shard
     def update_medication(self, med_id: int, user_id: int, **kwargs) -> bool:
         """Update medication details"""
         med = self.session.query(Medication).filter(Medication.id == med_id, Medication.user_id == user_id).first()
         if not med:
             return False
         
+        # Values are parsed before any attribute changes, so a bad one leaves the row untouched
+        for key in ('start_date', 'end_date'):
+            if key in kwargs:
+                kwargs[key] = _to_date(kwargs[key])
+        minutes = None
+        if 'times' in kwargs:
+            if isinstance(kwargs['times'], str):
+                kwargs['times'] = json.loads(kwargs['times'])
+            minutes = _dose_minutes(kwargs['times'])
+        
         for key, value in kwargs.items():
-            if key == 'times' and isinstance(value, list):
+            if key == 'times':
                 value = json.dumps(value)
             setattr(med, key, value)
+        if minutes is not None:
+            # Matching rows are kept; delete-orphan removes the rest
+            current = {dose.minute_of_day: dose for dose in med.dose_times}
+            med.dose_times = [current.get(minute) or MedicationDoseTime(minute_of_day=minute) for minute in minutes]
         
+        self._bump_data_version(user_id)
         self.session.commit()
+        events.publish(user_id, 'medication.updated', medication_id=med_id, fields=sorted(kwargs))
         return True
     
+    @_on_user_shard
     def delete_medication(self, med_id: int, user_id: int) -> bool:
         """Delete a medication"""
         med = self.session.query(Medication).filter(Medication.id == med_id, Medication.user_id == user_id).first()
@@ -170,9 +928,12 @@ class MedicineDatabase:
             return False
         
         self.session.delete(med)
+        self._bump_data_version(user_id)
         self.session.commit()
+        events.publish(user_id, 'medication.deleted', medication_id=med_id)
         return True
     
+    @_on_user_shard
     def log_medication(self, user_id: int, medication_id: int, scheduled_time: str, 
                       taken_time: str = None, status: str = 'pending',
                       notes: str = None) -> int:
@@ -180,31 +941,130 @@ class MedicineDatabase:
         log = MedicationLog(
             user_id=user_id,
             medication_id=medication_id,
-            scheduled_time=scheduled_time,
-            taken_time=taken_time,
+            scheduled_time=_to_datetime(scheduled_time),
+            taken_time=_to_datetime(taken_time),
             status=status,
             notes=notes
         )
         self.session.add(log)
+        self._bump_data_version(user_id)
         self.session.commit()
+        events.publish(user_id, 'log.created', log_id=log.id, medication_id=medication_id,
+                       scheduled_time=log.scheduled_time.isoformat(), status=status)
         return log.id
     
+    @_on_user_shard
     def get_medication_logs(self, user_id: int, medication_id: int = None, 
                            start_date: str = None,
-                           end_date: str = None) -> list:
-        """Get medication logs with optional filters"""
-        query = self.session.query(MedicationLog).filter(MedicationLog.user_id == user_id)
+                           end_date: str = None, iso: bool = True, as_rows: bool = False) -> list:
+        """
+        Get medication logs with optional filters
+        iso=False keeps timestamps as datetime objects for in-process consumers;
+        as_rows=True returns a RowList for fastjson
+        """
+        stmt = self._logs_select(user_id, medication_id, start_date, end_date)
+        keys, rows = self._read(stmt, user_id)
+        return RowList(keys, rows) if as_rows else self._rows_to_dicts(keys, rows, iso=iso)
+    
+    @_on_user_shard
+    def get_medication_logs_page(self, user_id: int, medication_id: int = None,
+                                 start_date: str = None, end_date: str = None,
+                                 limit: int = 100, cursor: str = None, as_rows: bool = False) -> tuple:
+        """
+        Get one page of medication logs, newest first
+        Returns (logs, next_cursor); next_cursor is None on the last page.
+        as_rows=True returns the logs as a RowList for fastjson
+        """
+        stmt = self._logs_select(user_id, medication_id, start_date, end_date)
+        
+        if cursor:
+            scheduled_time, log_id = self._decode_log_cursor(cursor)
+            stmt = stmt.where(or_(
+                MedicationLog.scheduled_time < scheduled_time,
+                and_(MedicationLog.scheduled_time == scheduled_time, MedicationLog.id < log_id)
+            ))
+        
+        # One extra row tells whether another page follows
+        result = self.session.execute(stmt.limit(limit + 1))
+        keys, rows = list(result.keys()), result.all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = self._encode_log_cursor({'scheduled_time': last.scheduled_time.isoformat(), 'id': last.id})
+        
+        return (RowList(keys, rows) if as_rows else self._rows_to_dicts(keys, rows)), next_cursor
+    
+    @_on_user_shard
+    def iter_medication_logs(self, user_id: int, medication_id: int = None,
+                             start_date: str = None, end_date: str = None,
+                             batch_size: int = 500):
+        """
+        Yield medication logs one by one from a server-side cursor
+        Filters are validated and the query started, on the user's shard, before the first row is requested
+        """
+        stmt = self._logs_select(user_id, medication_id, start_date, end_date)
+        result = self.session.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+        return self._stream_logs(result)
+    
+    def _stream_logs(self, result):
+        keys = result.keys()
+        for partition in result.partitions():
+            yield from self._rows_to_dicts(keys, partition)
+    
+    def _logs_select(self, user_id: int, medication_id: int = None,
+                     start_date: str = None, end_date: str = None):
+        stmt = select(*LOG_LIST_COLUMNS).where(MedicationLog.user_id == user_id)
         
         if medication_id:
-            query = query.filter(MedicationLog.medication_id == medication_id)
+            stmt = stmt.where(MedicationLog.medication_id == medication_id)
         if start_date:
-            query = query.filter(MedicationLog.scheduled_time >= start_date)
+            stmt = stmt.where(MedicationLog.scheduled_time >= _to_datetime(start_date))
         if end_date:
-            query = query.filter(MedicationLog.scheduled_time <= end_date)
+            # A date-only end_date includes that whole day, as the string comparison on the old column did
+            if _is_date_only(end_date):
+                stmt = stmt.where(MedicationLog.scheduled_time < _to_datetime(end_date) + timedelta(days=1))
+            else:
+                stmt = stmt.where(MedicationLog.scheduled_time <= _to_datetime(end_date))
+        
+        return stmt.order_by(MedicationLog.scheduled_time.desc(), MedicationLog.id.desc())
+    
+    def _rows_to_dicts(self, keys, rows, iso: bool = True) -> list:
+        """Serialize projected rows straight to response dicts"""
+        keys = list(keys)
+        if not iso:
+            return [dict(zip(keys, row)) for row in rows]
         
-        logs = query.order_by(MedicationLog.scheduled_time.desc()).all()
-        return [self._log_to_dict(log) for log in logs]
+        temporal = [(i, key) for i, key in enumerate(keys) if key in TEMPORAL_KEYS]
+        dicts = []
+        for row in rows:
+            item = dict(zip(keys, row))
+            for i, key in temporal:
+                value = row[i]
+                if value is not None:
+                    item[key] = value.isoformat()
+            dicts.append(item)
+        return dicts
     
+    def _encode_log_cursor(self, log: dict) -> str:
+        raw = json.dumps([log['scheduled_time'], log['id']])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+    
+    def _decode_log_cursor(self, cursor: str) -> tuple:
+        """Decode a pagination cursor; raises ValueError if it is malformed"""
+        try:
+            scheduled_time, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except Exception:
+            raise ValueError('Invalid cursor')
+        if not isinstance(scheduled_time, str) or not isinstance(log_id, int):
+            raise ValueError('Invalid cursor')
+        try:
+            return _to_datetime(scheduled_time), log_id
+        except ValueError:
+            raise ValueError('Invalid cursor')
+    
+    @_on_user_shard
     def update_log_status(self, log_id: int, user_id: int, status: str, taken_time: str = None) -> bool:
         """Update medication log status"""
         log = self.session.query(MedicationLog).filter(MedicationLog.id == log_id, MedicationLog.user_id == user_id).first()
@@ -213,14 +1073,334 @@ class MedicineDatabase:
         
         log.status = status
         if taken_time:
-            log.taken_time = taken_time
+            log.taken_time = _to_datetime(taken_time)
         
+        self._bump_data_version(user_id)
         self.session.commit()
+        events.publish(user_id, 'log.updated', log_id=log_id, medication_id=log.medication_id, status=status,
+                       taken_time=log.taken_time.isoformat() if log.taken_time else None)
         return True
     
-    def save_ml_prediction(self, medication_id: int, prediction_type: str,
+    @_on_user_shard
+    def bulk_log_medications(self, user_id: int, entries: list) -> list:
+        """
+        Insert many medication logs in one transaction
+        Returns one result per entry, in order: {'log_id': ...} or {'error': ...}
+        """
+        results = [None] * len(entries)
+        valid = []
+        
+        for i, entry in enumerate(entries):
+            error = self._validate_log_entry(entry, required=('medication_id', 'scheduled_time'))
+            if error:
+                results[i] = {'error': error}
+            else:
+                valid.append(i)
+        
+        # Medications must belong to the user; one query for the whole batch
+        med_ids = {entries[i]['medication_id'] for i in valid}
+        owned = set(self.session.execute(
+            select(Medication.id).where(Medication.user_id == user_id, Medication.id.in_(med_ids))
+        ).scalars()) if med_ids else set()
+        
+        rows, row_indexes = [], []
+        for i in valid:
+            entry = entries[i]
+            if entry['medication_id'] not in owned:
+                results[i] = {'error': 'Medication not found'}
+                continue
+            rows.append({
+                'user_id': user_id,
+                'medication_id': entry['medication_id'],
+                'scheduled_time': _to_datetime(entry['scheduled_time']),
+                'taken_time': _to_datetime(entry.get('taken_time')),
+                'status': entry.get('status', 'pending'),
+                'notes': entry.get('notes')
+            })
+            row_indexes.append(i)
+        
+        if rows:
+            try:
+                # executemany with RETURNING, ids come back in parameter order
+                new_ids = self.session.execute(
+                    insert(MedicationLog).returning(MedicationLog.id, sort_by_parameter_order=True),
+                    rows
+                ).scalars().all()
+                self._bump_data_version(user_id)
+                self.session.commit()
+            except Exception:
+                self.session.rollback()
+                raise
+            
+            for i, log_id in zip(row_indexes, new_ids):
+                results[i] = {'log_id': log_id}
+            events.publish(user_id, 'logs.created', count=len(new_ids), log_ids=new_ids)
+        
+        return results
+    
+    @_on_user_shard
+    def bulk_update_log_status(self, user_id: int, updates: list) -> list:
+        """
+        Update the status of many medication logs in one transaction
+        Returns one result per update, in order: {'log_id': ...} or {'error': ...}
+        """
+        results = [None] * len(updates)
+        valid = []
+        
+        for i, entry in enumerate(updates):
+            error = self._validate_log_entry(entry, required=('id', 'status'))
+            if error:
+                results[i] = {'error': error}
+            else:
+                valid.append(i)
+        
+        log_ids = {updates[i]['id'] for i in valid}
+        owned = set(self.session.execute(
+            select(MedicationLog.id).where(MedicationLog.user_id == user_id, MedicationLog.id.in_(log_ids))
+        ).scalars()) if log_ids else set()
+        
+        # Parameter sets of one executemany must share keys; taken_time is only set when given
+        with_taken, status_only = [], []
+        for i in valid:
+            entry = updates[i]
+            if entry['id'] not in owned:
+                results[i] = {'error': 'Log not found'}
+                continue
+            if entry.get('taken_time'):
+                with_taken.append({'id': entry['id'], 'status': entry['status'],
+                                   'taken_time': _to_datetime(entry['taken_time'])})
+            else:
+                status_only.append({'id': entry['id'], 'status': entry['status']})
+            results[i] = {'log_id': entry['id']}
+        
+        if with_taken or status_only:
+            try:
+                for params in (with_taken, status_only):
+                    if params:
+                        self.session.execute(update(MedicationLog), params)
+                self._bump_data_version(user_id)
+                self.session.commit()
+            except Exception:
+                self.session.rollback()
+                raise
+            events.publish(user_id, 'logs.updated',
+                           log_ids=[entry['id'] for entry in with_taken] + [entry['id'] for entry in status_only])
+        
+        return results
+    
+    def _validate_log_entry(self, entry, required: tuple) -> str:
+        """Return an error message for a malformed bulk entry, or None"""
+        if not isinstance(entry, dict):
+            return 'Entry must be an object'
+        for field in required:
+            if entry.get(field) in (None, ''):
+                return f'Missing field: {field}'
+        for field in ('id', 'medication_id'):
+            if field in entry and (not isinstance(entry[field], int) or isinstance(entry[field], bool)):
+                return f'Invalid {field}'
+        for field in ('scheduled_time', 'taken_time', 'notes'):
+            if entry.get(field) is not None and not isinstance(entry[field], str):
+                return f'Invalid {field}'
+        for field in ('scheduled_time', 'taken_time'):
+            try:
+                _to_datetime(entry.get(field))
+            except ValueError:
+                return f'Invalid {field}'
+        if 'status' in entry and entry['status'] not in LOG_STATUSES:
+            return f"Invalid status: {entry['status']}"
+        return None
+    
+    def materialize_doses(self, day: str = None, batch_size: int = 5000) -> int:
+        """
+        Create pending logs for every scheduled dose on a day (YYYY-MM-DD, default tomorrow)
+        Runs on all shards in parallel. Returns the number of logs created
+        """
+        day_date = _to_date(day) or (datetime.now() + timedelta(days=1)).date()
+        return sum(self._fan_out(self._materialize_doses, day_date, batch_size))
+    
+    def _materialize_doses(self, day_date: date, batch_size: int) -> int:
+        """
+        Medications are read in id-ordered batches with their dose_times rows,
+        checked against existing logs with one query and inserted with one executemany, so
+        running it again for the same day only fills in what is missing.
+        """
+        day_start = datetime.combine(day_date, time())
+        next_day = day_start + timedelta(days=1)
+        
+        active = select(
+            Medication.id, Medication.user_id, Medication.frequency, Medication.start_date
+        ).where(
+            Medication.start_date <= day_date,
+            or_(Medication.end_date.is_(None), Medication.end_date >= day_date),
+            Medication.frequency.notin_(UNSCHEDULED_FREQUENCIES)
+        ).order_by(Medication.id).limit(batch_size)
+        
+        created = 0
+        last_id = 0
+        while True:
+            meds = self.session.execute(active.where(Medication.id > last_id)).all()
+            if not meds:
+                break
+            last_id = meds[-1].id
+            med_ids = [med.id for med in meds]
+            
+            minutes = {}
+            for med_id, minute in self.session.execute(
+                select(MedicationDoseTime.medication_id, MedicationDoseTime.minute_of_day)
+                .where(MedicationDoseTime.medication_id.in_(med_ids))
+            ):
+                minutes.setdefault(med_id, []).append(minute)
+            
+            existing = set(self.session.execute(
+                select(MedicationLog.medication_id, MedicationLog.scheduled_time).where(
+                    MedicationLog.medication_id.in_(med_ids),
+                    MedicationLog.scheduled_time >= day_start,
+                    MedicationLog.scheduled_time < next_day
+                )
+            ).tuples())
+            
+            rows = []
+            users = {}
+            created_at = datetime.utcnow()
+            for med in meds:
+                if med.frequency == 'weekly' and (day_date - med.start_date).days % 7:
+                    continue
+                for minute in minutes.get(med.id, ()):
+                    scheduled_time = day_start + timedelta(minutes=minute)
+                    if (med.id, scheduled_time) in existing:
+                        continue
+                    rows.append({
+                        'medication_id': med.id,
+                        'user_id': med.user_id,
+                        'scheduled_time': scheduled_time,
+                        'status': 'pending',
+                        'created_at': created_at
+                    })
+                    users[med.user_id] = users.get(med.user_id, 0) + 1
+            
+            if rows:
+                try:
+                    # Core executemany: no ORM bulk-persistence bookkeeping per row
+                    self.session.execute(insert(MedicationLog.__table__), rows)
+                    self.session.execute(
+                        update(User).where(User.id.in_(list(users))).values(data_version=User.data_version + 1)
+                    )
+                    self.session.commit()
+                except Exception:
+                    self.session.rollback()
+                    raise
+                created += len(rows)
+                for user_id, count in users.items():
+                    events.publish(user_id, 'logs.created', count=count, day=day_date.isoformat())
+        
+        if self.session.get(MaterializedDay, day_date) is None:
+            try:
+                self.session.add(MaterializedDay(day=day_date))
+                self.session.commit()
+            except IntegrityError:
+                # Another worker's scheduler recorded the same day
+                self.session.rollback()
+        return created
+    
+    def catch_up_doses(self, days: int = None, today: date = None) -> int:
+        """
+        Materialize today, tomorrow and, within the last `days` days, every day a
+        run was missed for (the scheduler was down at 23:00, or a shard failed).
+        Days before a shard's first materialization are left alone, so a new
+        deployment does not fill in a history of missed doses. Returns the
+        number of logs created
+        """
+        today = today or datetime.now().date()
+        return sum(self._fan_out(self._catch_up_doses, today, days or MATERIALIZE_CATCH_UP_DAYS))
+    
+    def _catch_up_doses(self, today: date, days: int) -> int:
+        tomorrow = today + timedelta(days=1)
+        window = [tomorrow - timedelta(days=offset) for offset in range(max(days, 1), -1, -1)]
+        first = self.session.execute(select(func.min(MaterializedDay.day))).scalar()
+        done = set(self.session.execute(
+            select(MaterializedDay.day).where(MaterializedDay.day.between(window[0], tomorrow))
+        ).scalars())
+        return sum(self._materialize_doses(day, 5000) for day in window
+                   if day not in done and (day >= today or (first is not None and day > first)))
+    
+    def get_due_reminders(self, now: datetime = None) -> list:
+        """
+        Doses whose reminder window is open: the dose is later today and at
+        most reminder_minutes away. Every shard is scanned in parallel
+        """
+        reminders = [dose for doses in self._fan_out(self._due_reminders, now or datetime.now()) for dose in doses]
+        return sorted(reminders, key=lambda dose: (dose['time'], dose['id']))
+    
+    def _due_reminders(self, now: datetime) -> list:
+        """An indexed range scan on minute_of_day, bounded by the widest reminder window"""
+        current = now.hour * 60 + now.minute
+        lead = func.coalesce(Medication.reminder_minutes, 15)
+        # NULL reminder_minutes count as the default 15
+        max_lead = max(self.session.execute(select(func.max(Medication.reminder_minutes))).scalar() or 0, 15)
+        
+        stmt = select(
+            Medication.id, Medication.user_id, Medication.name, Medication.dosage, Medication.phone_number,
+            MedicationDoseTime.minute_of_day
+        ).join(Medication, Medication.id == MedicationDoseTime.medication_id).where(
+            MedicationDoseTime.minute_of_day > current,
+            MedicationDoseTime.minute_of_day <= current + max_lead,
+            MedicationDoseTime.minute_of_day - lead <= current,
+            Medication.phone_number.isnot(None),
+            Medication.phone_number != ''
+        ).order_by(MedicationDoseTime.minute_of_day, Medication.id)
+        
+        return [{
+            'id': med_id,
+            'user_id': user_id,
+            'name': name,
+            'dosage': dosage,
+            'phone_number': phone_number,
+            'time': f'{minute // 60:02d}:{minute % 60:02d}'
+        } for med_id, user_id, name, dosage, phone_number, minute in self.session.execute(stmt)]
+    
+    def sweep_missed_doses(self, grace_minutes: int = 60, now: datetime = None) -> int:
+        """
+        Mark pending logs scheduled more than grace_minutes ago as missed
+        One set-based UPDATE; the affected users' data versions are bumped in
+        the same transaction, on each shard in parallel, and each gets a
+        logs.missed event with its count from one grouped query. Returns the
+        number of logs marked missed
+        """
+        cutoff = (now or datetime.now()) - timedelta(minutes=grace_minutes)
+        return sum(self._fan_out(self._sweep_missed_doses, cutoff))
+    
+    def _sweep_missed_doses(self, cutoff: datetime) -> int:
+        overdue = and_(MedicationLog.status == 'pending', MedicationLog.scheduled_time < cutoff)
+        
+        try:
+            # One row per affected user for the events, rather than one per swept dose
+            counts = dict(self.session.execute(
+                select(MedicationLog.user_id, func.count()).where(overdue).group_by(MedicationLog.user_id)
+            ).all())
+            if not counts:
+                self.session.rollback()
+                return 0
+            self.session.execute(
+                update(User).where(User.id.in_(select(MedicationLog.user_id).where(overdue)))
+                .values(data_version=User.data_version + 1)
+            )
+            missed = self.session.execute(
+                update(MedicationLog).where(overdue).values(status='missed')
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        
+        for user_id, count in counts.items():
+            events.publish(user_id, 'logs.missed', count=count)
+        return missed
+    
+    @_on_user_shard
+    def save_ml_prediction(self, user_id: int, medication_id: int, prediction_type: str,
                           prediction_value: float, confidence: float) -> int:
-        """Save ML model prediction"""
+        """Save ML model prediction, on the shard of the user whose medication it is about"""
         pred = MLPrediction(
             medication_id=medication_id,
             prediction_type=prediction_type,
@@ -231,25 +1411,27 @@ class MedicineDatabase:
         self.session.commit()
         return pred.id
     
+    @_on_user_shard
     def get_adherence_stats(self, user_id: int, medication_id: int = None, days: int = 30) -> dict:
         """Calculate adherence statistics"""
-        from datetime import timedelta
-        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        start_date = datetime.combine((datetime.now() - timedelta(days=days)).date(), time())
         
-        query = self.session.query(MedicationLog).filter(
+        def count_status(status):
+            return func.coalesce(func.sum(case((MedicationLog.status == status, 1), else_=0)), 0)
+        
+        # Counted in the database, so only one row comes back
+        stmt = select(
+            func.count(MedicationLog.id), count_status('taken'), count_status('missed'), count_status('pending')
+        ).where(
             MedicationLog.user_id == user_id,
             MedicationLog.scheduled_time >= start_date
         )
         
         if medication_id:
-            query = query.filter(MedicationLog.medication_id == medication_id)
-        
-        logs = query.all()
+            stmt = stmt.where(MedicationLog.medication_id == medication_id)
         
-        total = len(logs)
-        taken = sum(1 for log in logs if log.status == 'taken')
-        missed = sum(1 for log in logs if log.status == 'missed')
-        pending = sum(1 for log in logs if log.status == 'pending')
+        _, rows = self._read(stmt, user_id)
+        total, taken, missed, pending = rows[0]
         
         adherence_rate = (taken / total * 100) if total > 0 else 0
         
@@ -261,31 +1443,44 @@ class MedicineDatabase:
             'adherence_rate': adherence_rate
         }
     
-    def _medication_to_dict(self, med) -> dict:
-        """Convert medication object to dictionary"""
-        return {
-            'id': med.id,
-            'name': med.name,
-            'dosage': med.dosage,
-            'frequency': med.frequency,
-            'times': med.times,  # Already JSON string
-            'start_date': med.start_date,
-            'end_date': med.end_date,
-            'notes': med.notes,
-            'image_path': med.image_path,
-            'phone_number': med.phone_number,
-            'reminder_minutes': med.reminder_minutes,
-            'created_at': med.created_at.isoformat() if med.created_at else None
-        }
-    
-    def _log_to_dict(self, log) -> dict:
-        """Convert log object to dictionary"""
+    @_on_user_shard
+    def get_dashboard_snapshot(self, user_id: int, week_days: int = 7) -> dict:
+        """
+        Dashboard data in one round trip: the user's medications, each row
+        carrying today's dose count and the adherence counts for the last week
+        """
+        today = datetime.combine(date.today(), time())
+        tomorrow = today + timedelta(days=1)
+        week_start = today - timedelta(days=week_days)
+        
+        def count_logs(*conditions):
+            return select(func.count(MedicationLog.id)).where(
+                MedicationLog.user_id == user_id, *conditions
+            ).scalar_subquery()
+        
+        counts = select(
+            count_logs(MedicationLog.scheduled_time >= today,
+                       MedicationLog.scheduled_time < tomorrow).label('today_doses'),
+            count_logs(MedicationLog.scheduled_time >= week_start).label('week_total'),
+            count_logs(MedicationLog.scheduled_time >= week_start,
+                       MedicationLog.status == 'taken').label('week_taken')
+        ).subquery()
+        
+        # The counts row is outer-joined to the medications, so users without
+        # medications still get one row
+        stmt = select(counts, *MEDICATION_LIST_COLUMNS).select_from(counts).outerjoin(
+            Medication, Medication.user_id == user_id
+        ).order_by(Medication.created_at.desc())
+        
+        result = self.session.execute(stmt)
+        keys = list(result.keys())
+        rows = result.all()
+        
+        today_doses, week_total, week_taken = rows[0][:3]
+        med_rows = [row[3:] for row in rows if row[3] is not None]
+        
         return {
-            'id': log.id,
-            'medication_id': log.medication_id,
-            'scheduled_time': log.scheduled_time,
-            'taken_time': log.taken_time,
-            'status': log.status,
-            'notes': log.notes,
-            'created_at': log.created_at.isoformat() if log.created_at else None
+            'medications': self._rows_to_dicts(keys[3:], med_rows),
+            'today_doses': today_doses,
+            'adherence_rate': (week_taken / week_total * 100) if week_total > 0 else 0
         }
@@ -0,0 +1,232 @@
+"""
+Per-user change events, streamed to clients over server-sent events
+
+The MedicineDatabase write methods publish a small event once their
+transaction has committed, and the reminder job publishes dose.due:
+
+    medication.created / medication.updated / medication.deleted
+    log.created / log.updated          one log from the API
+    logs.created / logs.updated        bulk writes, materialized doses
+    logs.missed                        the missed-dose sweep
+    dose.due                           a reminder window opened (medications
+                                       with a phone number, as for reminders)
+
+GET /api/events subscribes the user and streams them (see stream()). A
+stream opens with a `ready` event carrying the user's data_version: a
+client refetches once on every (re)connect, then applies the deltas
+instead of polling. When a slow client's queue fills up, its backlog is
+dropped for a `resync` event, which asks for the same refetch.
+
+The broker is pluggable. LocalBroker delivers within the process, which
+is enough for a single gunicorn worker. With EVENTS_BROKER_URL set to a
+redis:// URL (needs the optional `redis` package), RedisBroker relays every
+event through Redis pub/sub, so a subscriber on any worker sees writes
+made by every worker and by the scheduler.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # Optional: in-process delivery only without it
+    redis = None
+
+import metrics
+
+EVENTS_BROKER_URL = os.getenv('EVENTS_BROKER_URL', '')
+# Events a subscriber may fall behind by before it is told to resync
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '100'))
+# A comment line this often keeps proxies from timing the stream out and detects gone clients
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+# Each stream holds a server thread; it ends after this long and the client reconnects
+EVENTS_MAX_STREAM_SECONDS = float(os.getenv('EVENTS_MAX_STREAM_SECONDS', '300'))
+EVENTS_RETRY_MS = int(os.getenv('EVENTS_RETRY_MS', '3000'))
+# Open streams per process: gunicorn's threads (gunicorn.conf.py) less the ones kept for other requests
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '64'))
+EVENTS_RESERVED_THREADS = int(os.getenv('EVENTS_RESERVED_THREADS', '8'))
+EVENTS_MAX_STREAMS = int(os.getenv('EVENTS_MAX_STREAMS', str(max(GUNICORN_THREADS - EVENTS_RESERVED_THREADS, 1))))
+# Retry-After of a stream refused for capacity; clients back off further on repeated refusals
+EVENTS_BUSY_RETRY_SECONDS = int(os.getenv('EVENTS_BUSY_RETRY_SECONDS', '30'))
+
+
+class Subscription:
+    """One stream's bounded queue of events for one user"""
+
+    def __init__(self, user_id: int, maxsize: int = EVENTS_QUEUE_SIZE):
+        self.user_id = user_id
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, event: dict):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout: float) -> dict:
+        """The next event, or None after timeout seconds without one"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def clear(self):
+        """Drop the backlog; the client refetches instead"""
+        self.overflowed = False
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class LocalBroker:
+    """Delivers events to the subscribers in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        metrics.event_streams_open.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if not subscribers or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+        metrics.event_streams_open.dec()
+
+    def subscriber_count(self, user_id: int = None) -> int:
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id: int, event: dict):
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id: int, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def resync_all(self):
+        """Tell every subscriber to refetch, e.g. after events may have been lost"""
+        with self._lock:
+            subscribers = [s for user_subscribers in self._subscribers.values() for s in user_subscribers]
+        for subscription in subscribers:
+            subscription.overflowed = True
+
+
+class RedisBroker(LocalBroker):
+    """
+    Relays events through one Redis pub/sub channel to every worker's local subscribers
+    The listener thread starts with the first subscription, so a preloaded
+    master forks without it
+    """
+
+    CHANNEL = 'medicine-tracker:events'
+    RECONNECT_SECONDS = 1.0
+
+    def __init__(self, url: str):
+        super().__init__()
+        self._redis = redis.Redis.from_url(url)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, user_id: int, event: dict):
+        self._redis.publish(self.CHANNEL, json.dumps([user_id, event]))
+
+    def subscribe(self, user_id: int) -> Subscription:
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='events-redis', daemon=True)
+                self._listener.start()
+        return super().subscribe(user_id)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                for message in pubsub.listen():
+                    user_id, event = json.loads(message['data'])
+                    self.deliver(user_id, event)
+            except redis.RedisError as e:
+                print(f"Event relay lost its Redis connection: {e}")
+                # Whatever was published meanwhile is gone; clients refetch
+                self.resync_all()
+                time.sleep(self.RECONNECT_SECONDS)
+
+
+def _create_broker() -> LocalBroker:
+    if EVENTS_BROKER_URL.startswith(('redis://', 'rediss://')):
+        if redis is None:
+            print("EVENTS_BROKER_URL needs the redis package; events stay within each process")
+        else:
+            return RedisBroker(EVENTS_BROKER_URL)
+    return LocalBroker()
+
+
+_broker = _create_broker()
+
+
+def get_broker() -> LocalBroker:
+    return _broker
+
+
+def set_broker(broker: LocalBroker):
+    """Swap the broker, e.g. for another transport; existing subscriptions stay on the old one"""
+    global _broker
+    _broker = broker
+
+
+def publish(user_id: int, event_type: str, **data):
+    """
+    Publish an event to the user's streams
+    Call it after the change has committed. A failure is logged, never
+    raised: the write it describes has already succeeded
+    """
+    event = {'type': event_type, **data}
+    try:
+        _broker.publish(user_id, event)
+        metrics.events_published.inc((event_type,))
+    except Exception as e:
+        print(f"Failed to publish {event_type} for user {user_id}: {e}")
+
+
+def format_event(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def stream(subscription: Subscription, ready: dict, heartbeat: float = None, max_seconds: float = None):
+    """
+    Yield the SSE text of one subscription: `ready`, then each event or a
+    heartbeat comment, until max_seconds have passed. The caller unsubscribes
+    once the response closes
+    """
+    heartbeat = EVENTS_HEARTBEAT_SECONDS if heartbeat is None else heartbeat
+    deadline = time.monotonic() + (EVENTS_MAX_STREAM_SECONDS if max_seconds is None else max_seconds)
+    yield f'retry: {EVENTS_RETRY_MS}\n' + format_event('ready', ready)
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if subscription.overflowed:
+            subscription.clear()
+            yield format_event('resync', {'type': 'resync'})
+            continue
+        event = subscription.get(min(heartbeat, remaining))
+        yield format_event(event['type'], event) if event is not None else ': keepalive\n\n'
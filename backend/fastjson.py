@@ -0,0 +1,110 @@
+"""
+JSON encoding for the large list responses
+
+RowList wraps the rows of a projected query with their column names.
+dumps() encodes them a column at a time and fills each row into an
+object template whose '"key":' fragments are encoded once per response,
+rather than going row -> dict -> sorted json.dumps. RawJSON embeds text
+that is already encoded, such as batch sub-responses. Everything else
+falls back to the standard encoder. Dates and datetimes are written with
+isoformat(), as _rows_to_dicts() does.
+"""
+from datetime import date, datetime
+import json
+from json.encoder import encode_basestring_ascii
+
+_TRUE_FALSE = {True: 'true', False: 'false'}
+
+
+def _encode_float(value: float) -> str:
+    return json.dumps(value)
+
+
+def _encode_temporal(value) -> str:
+    return f'"{value.isoformat()}"'
+
+
+# Exact types only; subclasses (bool is an int) take the fallback unless listed
+_ENCODERS = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    bool: _TRUE_FALSE.__getitem__,
+    float: _encode_float,
+    type(None): lambda value: 'null',
+    datetime: _encode_temporal,
+    date: _encode_temporal,
+}
+
+
+class RowList:
+    """Rows from a projected select, serialized by dumps() as a list of objects"""
+
+    __slots__ = ('keys', 'rows')
+
+    def __init__(self, keys, rows):
+        self.keys = list(keys)
+        self.rows = rows if isinstance(rows, list) else list(rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def to_dicts(self) -> list:
+        return [dict(zip(self.keys, row)) for row in self.rows]
+
+
+class RawJSON:
+    """Already encoded JSON text, written by dumps() as it is"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _encode_value(value) -> str:
+    encoder = _ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    if isinstance(value, RowList):
+        return _encode_rows(value)
+    if isinstance(value, RawJSON):
+        return value.text
+    if isinstance(value, dict):
+        return '{' + ','.join(encode_basestring_ascii(str(key)) + ':' + _encode_value(item)
+                              for key, item in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join([_encode_value(item) for item in value]) + ']'
+    return _dumps(value)
+
+
+def _encode_column(values) -> list:
+    encoders = _ENCODERS
+    encoded = []
+    for value in values:
+        encoder = encoders.get(type(value))
+        encoded.append(encoder(value) if encoder is not None else _dumps(value))
+    return encoded
+
+
+def _encode_rows(rows: RowList) -> str:
+    if not rows.rows:
+        return '[]'
+    # Columns are encoded one at a time, then each row is one %-format of its encoded values
+    template = '{' + ','.join(encode_basestring_ascii(key).replace('%', '%%') + ':%s' for key in rows.keys) + '}'
+    columns = [_encode_column(values) for values in zip(*rows.rows)]
+    return '[' + ','.join([template % values for values in zip(*columns)]) + ']'
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(',', ':'), default=_default)
+
+
+def dumps(value) -> str:
+    """Compact JSON for value, which may hold RowLists and RawJSON anywhere in dicts and lists"""
+    return _encode_value(value)
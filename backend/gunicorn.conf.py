@@ -0,0 +1,31 @@
+"""
+Gunicorn settings, read from the working directory by `gunicorn app:app`
+
+PRELOAD_MODELS=1 (the default here) imports the app and loads the ML models
+once in the master, which then forks the workers: they share the models'
+memory copy-on-write instead of each building and training its own copy.
+PRELOAD_MODELS=0 gives every worker its own lazily loaded models.
+"""
+import os
+
+os.environ.setdefault('PRELOAD_MODELS', '1')
+
+preload_app = os.environ['PRELOAD_MODELS'] == '1'
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+# Threaded workers: an open /api/events stream holds a thread, not the whole
+# worker. Stream threads sit idle between events, so they are cheap; the
+# events module lets streams use all but EVENTS_RESERVED_THREADS of them
+os.environ.setdefault('GUNICORN_THREADS', '64')
+threads = int(os.environ['GUNICORN_THREADS'])
+
+
+def when_ready(server):
+    if preload_app:
+        import app
+        app.preload_for_fork()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import app
+        app.init_worker(app.app)
@@ -0,0 +1,225 @@
+"""
+In-process metrics in the Prometheus text format
+
+Counters, gauges and histograms keyed by label values, each guarded by its
+own lock; recording is a dict update and, for histograms, one bisect.
+Metrics are per process: with several gunicorn workers, each scrape of
+/api/metrics answers from whichever worker took it.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Prometheus' default buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: tuple = ()):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: tuple = ()):
+        # Per label set: [count per bucket (+Inf last), sum]
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][slot] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, labels: tuple = ()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, labels)
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.register(Counter(
+    'http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status')))
+http_request_duration = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Time to build the response, by route and method', ('route', 'method')))
+http_requests_in_flight = REGISTRY.register(Gauge(
+    'http_requests_in_flight', 'Requests being handled'))
+http_batch_subrequests = REGISTRY.register(Counter(
+    'http_batch_subrequests_total', 'Requests run inside /api/batch, by route, method and status',
+    ('route', 'method', 'status')))
+db_queries = REGISTRY.register(Counter(
+    'db_queries_total', 'SQL statements executed'))
+db_query_duration = REGISTRY.register(Histogram(
+    'db_query_duration_seconds', 'Time per SQL statement',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+db_queries_per_request = REGISTRY.register(Histogram(
+    'db_queries_per_request', 'SQL statements per request, by route', ('route',),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)))
+db_time_per_request = REGISTRY.register(Histogram(
+    'db_time_per_request_seconds', 'Time spent in SQL per request, by route', ('route',)))
+db_slow_queries = REGISTRY.register(Counter(
+    'db_slow_queries_total', 'SQL statements slower than SLOW_QUERY_MS, by route or thread', ('route',)))
+db_repeated_query_requests = REGISTRY.register(Counter(
+    'db_repeated_query_requests_total', 'Requests that repeated one statement shape, by route', ('route',)))
+scheduler_job_duration = REGISTRY.register(Histogram(
+    'scheduler_job_duration_seconds', 'Scheduler job run time', ('job',)))
+scheduler_job_failures = REGISTRY.register(Counter(
+    'scheduler_job_failures_total', 'Scheduler job runs that raised', ('job',)))
+notification_send_duration = REGISTRY.register(Histogram(
+    'notification_send_duration_seconds', 'Twilio send time, by outcome', ('outcome',)))
+event_streams_open = REGISTRY.register(Gauge(
+    'event_streams_open', 'Open /api/events streams'))
+events_published = REGISTRY.register(Counter(
+    'events_published_total', 'Change events published, by type', ('type',)))
+
+
+# [statement count, seconds] for the request or job being handled, None outside one
+_query_tally = ContextVar('query_tally', default=None)
+
+
+def start_query_tally():
+    """Start counting this context's SQL statements; returns the token for stop_query_tally()"""
+    return _query_tally.set([0, 0.0])
+
+
+def stop_query_tally(token) -> tuple:
+    """Stop counting and return (statements, seconds)"""
+    tally = _query_tally.get()
+    _query_tally.reset(token)
+    return tuple(tally) if tally else (0, 0.0)
+
+
+# Called as observer(conn, statement, parameters, executemany, seconds) after every statement
+_query_observers = []
+
+
+def add_query_observer(observer):
+    """Pass every timed statement to observer too, so other monitors share this one timing listener"""
+    if observer not in _query_observers:
+        _query_observers.append(observer)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    db_queries.inc()
+    db_query_duration.observe(elapsed)
+    tally = _query_tally.get()
+    if tally is not None:
+        tally[0] += 1
+        tally[1] += elapsed
+    for observer in _query_observers:
+        observer(conn, statement, parameters, executemany, elapsed)
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
+
+
+def instrument_sqlalchemy():
+    """Time every statement on every engine, including shards, replicas and ones created later"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
@@ -0,0 +1,23 @@
+"""
+Create and upgrade the database schema
+
+Usage:
+    python migrate.py
+
+Run it once per deploy, before the app starts (the Procfile release step).
+The app itself no longer touches the schema unless AUTO_MIGRATE=1, which is
+the default for SQLite. Covers DATABASE_URL and every DATABASE_SHARD_URLS shard.
+"""
+import time
+
+import database
+
+
+def main():
+    start = time.perf_counter()
+    database.migrate()
+    print(f"Migrated {len(database.shard_engines)} database(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,19 @@
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
-import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import pickle
 
+def _as_datetime(value) -> Optional[datetime]:
+    """Log timestamps arrive as datetimes from the database, or as ISO strings from clients"""
+    if isinstance(value, datetime) or value is None:
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
 class AdherencePredictor:
     """
     ML model to predict medication adherence patterns
@@ -40,10 +48,11 @@ class AdherencePredictor:
         
         features = []
         
-        # Sort logs by time
-        sorted_logs = sorted(medication_logs, 
-                           key=lambda x: x.get('scheduled_time', ''),
-                           reverse=True)
+        # Pair each log with its parsed times once, newest first
+        timed_logs = [(_as_datetime(log.get('scheduled_time')), _as_datetime(log.get('taken_time')), log)
+                      for log in medication_logs]
+        timed_logs.sort(key=lambda x: x[0] or datetime.min, reverse=True)
+        sorted_logs = [log for _, _, log in timed_logs]
         
         # Time-based features
         hour = current_time.hour
@@ -51,8 +60,9 @@ class AdherencePredictor:
         is_weekend = 1 if day_of_week >= 5 else 0
         
         # Calculate recent adherence (last 7 days)
-        recent_logs = [log for log in sorted_logs 
-                      if self._is_within_days(log.get('scheduled_time', ''), 7)]
+        cutoff = datetime.now() - timedelta(days=7)
+        recent = [entry for entry in timed_logs if entry[0] is not None and entry[0] >= cutoff]
+        recent_logs = [log for _, _, log in recent]
         
         if recent_logs:
             taken_count = sum(1 for log in recent_logs if log.get('status') == 'taken')
@@ -64,8 +74,8 @@ class AdherencePredictor:
         current_streak = self._calculate_streak(sorted_logs)
         
         # Time since last dose (in hours)
-        if sorted_logs and sorted_logs[0].get('taken_time'):
-            last_dose_time = datetime.fromisoformat(sorted_logs[0]['taken_time'])
+        if timed_logs and timed_logs[0][1]:
+            last_dose_time = timed_logs[0][1]
             hours_since_last = (current_time - last_dose_time).total_seconds() / 3600
         else:
             hours_since_last = 24  # Default
@@ -75,10 +85,8 @@ class AdherencePredictor:
         
         # Average delay (when taken late)
         delays = []
-        for log in recent_logs:
-            if log.get('status') == 'taken' and log.get('taken_time') and log.get('scheduled_time'):
-                scheduled = datetime.fromisoformat(log['scheduled_time'])
-                taken = datetime.fromisoformat(log['taken_time'])
+        for scheduled, taken, log in recent:
+            if log.get('status') == 'taken' and taken:
                 delay = (taken - scheduled).total_seconds() / 3600
                 if delay > 0:
                     delays.append(delay)
@@ -99,14 +107,10 @@ class AdherencePredictor:
         
         return np.array(features).reshape(1, -1)
     
-    def _is_within_days(self, timestamp_str: str, days: int) -> bool:
+    def _is_within_days(self, timestamp, days: int) -> bool:
         """Check if timestamp is within specified days"""
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str)
-            cutoff = datetime.now() - timedelta(days=days)
-            return timestamp >= cutoff
-        except:
-            return False
+        timestamp = _as_datetime(timestamp)
+        return timestamp is not None and timestamp >= datetime.now() - timedelta(days=days)
     
     def _calculate_streak(self, sorted_logs: List[Dict]) -> int:
         """Calculate current streak of consecutive taken doses"""
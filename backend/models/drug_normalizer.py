@@ -0,0 +1,192 @@
+from typing import Dict, Iterable, List, Optional
+import re
+import threading
+
+# Brand names and synonyms -> canonical drug name
+SYNONYMS = {
+    'tylenol': 'Acetaminophen',
+    'panadol': 'Acetaminophen',
+    'paracetamol': 'Acetaminophen',
+    'apap': 'Acetaminophen',
+    'advil': 'Ibuprofen',
+    'motrin': 'Ibuprofen',
+    'nurofen': 'Ibuprofen',
+    'bayer': 'Aspirin',
+    'ecotrin': 'Aspirin',
+    'acetylsalicylic acid': 'Aspirin',
+    'asa': 'Aspirin',
+    'coumadin': 'Warfarin',
+    'jantoven': 'Warfarin',
+    'glucophage': 'Metformin',
+    'zocor': 'Simvastatin',
+    'lipitor': 'Atorvastatin',
+    'norvasc': 'Amlodipine',
+    'zestril': 'Lisinopril',
+    'prinivil': 'Lisinopril',
+    'cozaar': 'Losartan',
+    'synthroid': 'Levothyroxine',
+    'levoxyl': 'Levothyroxine',
+    'euthyrox': 'Levothyroxine',
+    'lopressor': 'Metoprolol',
+    'toprol': 'Metoprolol',
+    'ventolin': 'Albuterol',
+    'proair': 'Albuterol',
+    'salbutamol': 'Albuterol',
+    'deltasone': 'Prednisone',
+    'prilosec': 'Omeprazole',
+    'losec': 'Omeprazole',
+    'protonix': 'Pantoprazole',
+    'plavix': 'Clopidogrel',
+    'neurontin': 'Gabapentin',
+    'lasix': 'Furosemide',
+    'zoloft': 'Sertraline',
+    'amoxil': 'Amoxicillin',
+    'calcium carbonate': 'Calcium',
+    'tums': 'Calcium',
+    'ethanol': 'Alcohol',
+    'grapefruit juice': 'Grapefruit',
+}
+
+# Strength and dosage-form tokens that do not change which drug is meant
+_STRENGTH = re.compile(r'\b\d+(?:[.,]\d+)?\s*(?:mg|mcg|µg|ug|g|ml|iu|units?|%)(?:\s*/\s*\d*\s*(?:ml|tab|dose))?\b')
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_FORM_WORDS = frozenset([
+    'tablet', 'tablets', 'tab', 'tabs', 'capsule', 'capsules', 'cap', 'caps', 'pill', 'pills',
+    'oral', 'solution', 'suspension', 'syrup', 'liquid', 'chewable', 'injection', 'cream',
+    'er', 'xr', 'sr', 'cr', 'dr', 'xl', 'ec', 'extended', 'delayed', 'release', 'strength', 'extra',
+])
+
+
+def _deletes(text: str) -> set:
+    """The text itself and every variant with one character removed"""
+    variants = {text[:i] + text[i + 1:] for i in range(len(text))}
+    variants.add(text)
+    return variants
+
+
+def _near_distance(a: str, b: str) -> int:
+    """
+    Edit distance of two strings sharing a single-deletion variant
+    Such strings are at most two edits apart, so only 0, 1 or 2 is possible
+    """
+    if a == b:
+        return 0
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return 1
+        i = diffs[0]
+        if len(diffs) == 2 and diffs[1] == i + 1 and a[i] == b[i + 1] and a[i + 1] == b[i]:
+            return 1
+        return 2
+    if abs(len(a) - len(b)) == 1:
+        short, long = (a, b) if len(a) < len(b) else (b, a)
+        i = 0
+        while i < len(short) and short[i] == long[i]:
+            i += 1
+        if short[i:] == long[i + 1:]:
+            return 1
+    return 2
+
+
+class DrugNameNormalizer:
+    """
+    Resolves free-text medication names to canonical drug names
+    Strips strength and dosage-form tokens, maps brand names and synonyms,
+    and falls back to a single-deletion index for misspellings: a typo of one
+    insertion, deletion, substitution or transposition leaves the query and
+    the key with a common variant, so a lookup is a dozen dict probes
+    """
+
+    # Distinct inputs remembered before the memo is reset
+    CACHE_SIZE = 100000
+
+    def __init__(self, vocabulary: Iterable[str] = (), synonyms: Dict[str, str] = None):
+        self._lock = threading.Lock()
+        self._lookup = {}
+        self._variants = {}
+        self._memo = {}
+
+        for alias, canonical in (SYNONYMS if synonyms is None else synonyms).items():
+            self._add_key(self.clean(alias), canonical)
+        self.add_names(vocabulary)
+
+    def clean(self, name: str) -> str:
+        """Lower-case a name and drop strength, form words and punctuation"""
+        text = _STRENGTH.sub(' ', name.casefold())
+        words = [word for word in _NON_ALNUM.split(text) if word and word not in _FORM_WORDS]
+        return ' '.join(words)
+
+    def add_names(self, names: Iterable[str]):
+        """Add canonical names to the vocabulary"""
+        with self._lock:
+            added = False
+            for name in names:
+                key = self.clean(name)
+                if key and key not in self._lookup:
+                    self._add_key(key, name)
+                    added = True
+            if added:
+                # Fuzzy matches may resolve differently with the new names
+                self._memo = {}
+
+    def _add_key(self, key: str, canonical: str):
+        if not key or key in self._lookup:
+            return
+        self._lookup[key] = canonical
+        for variant in _deletes(key):
+            self._variants.setdefault(variant, []).append(key)
+
+    def canonical(self, name: str) -> str:
+        """
+        Exact normalization without fuzzy matching
+        Used for knowledge base names, which are trusted spellings
+        """
+        return self._lookup.get(self.clean(name)) or name.strip().title()
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Resolve a free-text name to a canonical drug name, or None if unknown"""
+        memo = self._memo
+        try:
+            return memo[name]
+        except KeyError:
+            pass
+
+        key = self.clean(name)
+        canonical = self._lookup.get(key)
+        if canonical is None and len(key) >= 4:
+            canonical = self._fuzzy(key)
+
+        if len(memo) >= self.CACHE_SIZE:
+            memo.clear()
+        memo[name] = canonical
+        return canonical
+
+    def normalize(self, name: str) -> str:
+        """Canonical name if resolvable, otherwise the title-cased input"""
+        return self.resolve(name) or name.strip().title()
+
+    def normalize_all(self, names: List[str]) -> List[str]:
+        return [self.normalize(name) for name in names]
+
+    def _fuzzy(self, key: str) -> Optional[str]:
+        """Closest vocabulary entry within two edits (one for short names)"""
+        limit = 1 if len(key) < 6 else 2
+        variants = self._variants
+        candidates = set()
+        for variant in _deletes(key):
+            candidates.update(variants.get(variant, ()))
+
+        best, best_distance = None, limit + 1
+        for candidate in sorted(candidates):
+            distance = _near_distance(key, candidate)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+
+        return self._lookup[best] if best is not None else None
+
+    def get_stats(self) -> Dict:
+        return {
+            'vocabulary_size': len(self._lookup),
+            'memoized_inputs': len(self._memo)
+        }
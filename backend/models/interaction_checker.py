@@ -1,5 +1,146 @@
 from typing import Dict, List, Set
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
+from operator import itemgetter
 import json
+import os
+import struct
+import sys
+import threading
+
+from models.drug_normalizer import DrugNameNormalizer
+
+# Severity levels in code order; other severities found in the data get the next codes
+SEVERITY_LEVELS = ('high', 'medium', 'low')
+
+# Compact knowledge base file layout:
+#   header (magic, version, n_severities, n_strings, blob_len, n_records, n_pairs)
+#   string table: UTF-8, NUL-separated; the first n_severities entries are the severity codes
+#   records: n_records rows of three little-endian uint32 (severity code, description, recommendation)
+#   pairs: n_pairs rows of three little-endian uint32 (drug1, drug2, record)
+COMPACT_MAGIC = b'MTKB'
+COMPACT_VERSION = 1
+COMPACT_HEADER = struct.Struct('<4sHIIIII')
+
+# Bumped whenever any checker's knowledge base changes. It lives outside the
+# checker so callers can read it without loading a knowledge base
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def knowledge_base_generation() -> int:
+    """Changes whenever a knowledge base in this process changes"""
+    return _generation
+
+class FrozenIndex(Mapping):
+    """
+    Read-only adjacency index in flat arrays: row i of neighbours/record_of,
+    between offsets[i] and offsets[i + 1], lists drug i's neighbours sorted by id.
+    The rows are array('I') buffers rather than per-drug dicts, so they hold no
+    Python objects: lookups write no reference counts or GC headers, and the
+    pages stay shared when a preloaded gunicorn master forks its workers
+    """
+    
+    def __init__(self, index: Dict[str, Dict[str, Dict]]):
+        self.names = tuple(index)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.offsets = array('I', [0])
+        self.neighbours = array('I')
+        self.record_of = array('I')
+        
+        records = []
+        record_ids = {}
+        for name in self.names:
+            for other, interaction in sorted(((self.ids[other], interaction)
+                                              for other, interaction in index[name].items()), key=itemgetter(0)):
+                record_id = record_ids.get(id(interaction))
+                if record_id is None:
+                    record_id = record_ids[id(interaction)] = len(records)
+                    records.append(interaction)
+                self.neighbours.append(other)
+                self.record_of.append(record_id)
+            self.offsets.append(len(self.neighbours))
+        self.records = tuple(records)
+    
+    def __getitem__(self, name: str) -> '_FrozenNeighbours':
+        return _FrozenNeighbours(self, self.ids[name])
+    
+    def __contains__(self, name) -> bool:
+        return name in self.ids
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __iter__(self):
+        return iter(self.names)
+
+class _FrozenNeighbours(Mapping):
+    """One drug's row of a FrozenIndex, as a read-only mapping of neighbour -> interaction"""
+    
+    __slots__ = ('_index', '_lo', '_hi')
+    
+    def __init__(self, index: FrozenIndex, drug_id: int):
+        self._index = index
+        self._lo = index.offsets[drug_id]
+        self._hi = index.offsets[drug_id + 1]
+    
+    def _position(self, other: str) -> int:
+        """Position of other in the row, or -1"""
+        other_id = self._index.ids.get(other)
+        if other_id is None:
+            return -1
+        neighbours = self._index.neighbours
+        i = bisect_left(neighbours, other_id, self._lo, self._hi)
+        return i if i < self._hi and neighbours[i] == other_id else -1
+    
+    def __getitem__(self, other: str) -> Dict:
+        i = self._position(other)
+        if i < 0:
+            raise KeyError(other)
+        return self._index.records[self._index.record_of[i]]
+    
+    def __contains__(self, other) -> bool:
+        return self._position(other) >= 0
+    
+    def __len__(self) -> int:
+        return self._hi - self._lo
+    
+    def __iter__(self):
+        return map(self._index.names.__getitem__, self._index.neighbours[self._lo:self._hi])
+
+class FrozenPairs(Mapping):
+    """
+    Read-only (drug1, drug2) -> interaction mapping over a FrozenIndex's names and records
+    Pairs are stored as sorted drug1 * n + drug2 keys, so only the orientation they were added in matches
+    """
+    
+    def __init__(self, interactions: Dict, index: FrozenIndex):
+        self._index = index
+        n = len(index.names)
+        records = {id(record): i for i, record in enumerate(index.records)}
+        rows = sorted((index.ids[drug1] * n + index.ids[drug2], records[id(interaction)])
+                      for (drug1, drug2), interaction in interactions.items())
+        self._keys = array('Q', map(itemgetter(0), rows))
+        self._record_of = array('I', map(itemgetter(1), rows))
+    
+    def __getitem__(self, pair) -> Dict:
+        ids = self._index.ids
+        drug1, drug2 = ids.get(pair[0]), ids.get(pair[1])
+        if drug1 is not None and drug2 is not None:
+            key = drug1 * len(ids) + drug2
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                return self._index.records[self._record_of[i]]
+        raise KeyError(pair)
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def __iter__(self):
+        names, n = self._index.names, len(self._index.names)
+        return ((names[key // n], names[key % n]) for key in self._keys)
 
 class InteractionChecker:
     """
@@ -7,16 +148,230 @@ class InteractionChecker:
     Uses a knowledge base to check for dangerous drug combinations
     """
     
+    # Number of distinct medication sets whose results are kept
+    RESULT_CACHE_SIZE = 4096
+    
     def __init__(self, interaction_db_path=None):
+        self.interaction_db_path = interaction_db_path
+        self.normalizer = DrugNameNormalizer()
+        self._strings = {}
+        self._records = {}
         self.interactions = self._load_interaction_database(interaction_db_path)
+        self._build_index()
+        
+        self._result_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+    
+    def reload(self, interaction_db_path=None):
+        """Reload the knowledge base, from a new source if given"""
+        if interaction_db_path is not None:
+            self.interaction_db_path = interaction_db_path
+        frozen = self.frozen
+        self.normalizer = DrugNameNormalizer()
+        self._strings = {}
+        self._records = {}
+        self.interactions = self._load_interaction_database(self.interaction_db_path)
+        self._build_index()
+        if frozen:
+            self.freeze()
+        self._invalidate_cache()
+    
+    @property
+    def frozen(self) -> bool:
+        return isinstance(self._index, FrozenIndex)
+    
+    def freeze(self):
+        """
+        Switch the knowledge base to the compact read-only layout of FrozenIndex
+        and FrozenPairs. Lookups keep working; add_interaction() switches back first
+        """
+        if self.frozen:
+            return
+        index = FrozenIndex(self._index)
+        self.interactions = FrozenPairs(self.interactions, index)
+        self._index = index
+        # Only needed to share strings and records while building
+        self._strings = {}
+        self._records = {}
+    
+    def _thaw(self):
+        self.interactions = dict(self.interactions.items())
+        self._build_index()
     
     def _load_interaction_database(self, db_path=None) -> Dict:
         """
         Load drug interaction database
-        In production, this would load from a comprehensive medical database
+        db_path is either a SQLAlchemy URL, read from the drug_interactions table,
+        or a compact knowledge base file written by save_compact().
+        Falls back to the built-in sample set when no source is given or the table
+        is empty; uses_sample_data tells which happened.
+        """
+        interactions = None
+        
+        if db_path and '://' in db_path:
+            interactions = self._load_from_table(db_path)
+        elif db_path:
+            interactions = self._load_compact(db_path)
+        
+        self.uses_sample_data = not interactions
+        if not interactions:
+            interactions = {
+                (drug1, drug2): self._record(**interaction)
+                for (drug1, drug2), interaction in self._sample_interactions().items()
+            }
+        
+        return interactions
+    
+    def _intern(self, value: str) -> str:
+        """Return the shared copy of a string, so repeated texts are stored once"""
+        return self._strings.setdefault(value, value)
+    
+    def _record(self, severity: str, description: str, recommendation: str = None) -> Dict:
+        """
+        Return the shared interaction record for these texts
+        Records are shared between pairs and must be treated as read-only
         """
-        # Sample interaction database
-        interactions = {
+        key = (severity, description, recommendation or '')
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = {
+                'severity': self._intern(key[0]),
+                'description': self._intern(key[1]),
+                'recommendation': self._intern(key[2])
+            }
+        return record
+    
+    def _normalize_name(self, name: str) -> str:
+        """Canonical form of a knowledge base name (synonyms mapped, no fuzzy matching)"""
+        return self._intern(sys.intern(self.normalizer.canonical(name)))
+    
+    def _load_from_table(self, db_url: str) -> Dict:
+        """Bulk-load interactions from the drug_interactions table"""
+        from sqlalchemy import MetaData, Table, create_engine, select
+        from sqlalchemy.exc import NoSuchTableError
+        
+        engine = create_engine(db_url)
+        interactions = {}
+        try:
+            try:
+                table = Table('drug_interactions', MetaData(), autoload_with=engine)
+            except NoSuchTableError:
+                return interactions
+            
+            columns = [table.c.drug1, table.c.drug2, table.c.severity, table.c.description]
+            # Tables created before the recommendation column was added
+            if 'recommendation' in table.c:
+                columns.append(table.c.recommendation)
+            
+            # Raw value -> normalized name / shared record, so each distinct text is processed once
+            names = {}
+            records = {}
+            
+            with engine.connect() as conn:
+                result = conn.execution_options(stream_results=True, yield_per=10000).execute(select(*columns))
+                for partition in result.partitions():
+                    for row in partition:
+                        drug1, drug2 = row[0], row[1]
+                        name1 = names.get(drug1) or names.setdefault(drug1, self._normalize_name(drug1))
+                        name2 = names.get(drug2) or names.setdefault(drug2, self._normalize_name(drug2))
+                        
+                        record_key = tuple(row[2:])
+                        record = records.get(record_key)
+                        if record is None:
+                            record = records[record_key] = self._record(*record_key)
+                        
+                        interactions[(name1, name2)] = record
+        finally:
+            engine.dispose()
+        
+        return interactions
+    
+    def _load_compact(self, path: str) -> Dict:
+        """Load interactions from a compact knowledge base file"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        
+        magic, version, n_severities, n_strings, blob_len, n_records, n_pairs = COMPACT_HEADER.unpack_from(data)
+        if magic != COMPACT_MAGIC or version != COMPACT_VERSION:
+            raise ValueError(f'Unsupported interaction knowledge base file: {path}')
+        
+        offset = COMPACT_HEADER.size
+        strings = data[offset:offset + blob_len].decode('utf-8').split('\0') if n_strings else []
+        strings = [self._intern(sys.intern(value)) for value in strings]
+        offset += blob_len
+        
+        def read_rows(count: int) -> array:
+            nonlocal offset
+            rows = array('I')
+            size = count * 3 * rows.itemsize
+            rows.frombytes(data[offset:offset + size])
+            if sys.byteorder == 'big':
+                rows.byteswap()
+            offset += size
+            return rows
+        
+        record_rows = read_rows(n_records)
+        records = [
+            self._record(strings[severity], strings[description], strings[recommendation])
+            for severity, description, recommendation in zip(record_rows[0::3], record_rows[1::3], record_rows[2::3])
+        ]
+        
+        pair_rows = read_rows(n_pairs)
+        return dict(zip(
+            zip(map(strings.__getitem__, pair_rows[0::3]), map(strings.__getitem__, pair_rows[1::3])),
+            map(records.__getitem__, pair_rows[2::3])
+        ))
+    
+    def save_compact(self, path: str):
+        """Write the knowledge base to a compact file for fast startup"""
+        severities = list(SEVERITY_LEVELS) + sorted(
+            {i['severity'] for i in self.interactions.values()} - set(SEVERITY_LEVELS)
+        )
+        strings = list(severities)
+        string_ids = {value: n for n, value in enumerate(strings)}
+        
+        def string_id(value: str) -> int:
+            n = string_ids.get(value)
+            if n is None:
+                if '\0' in value:
+                    raise ValueError(f'NUL character in knowledge base text: {value!r}')
+                n = string_ids[value] = len(strings)
+                strings.append(value)
+            return n
+        
+        record_rows = array('I')
+        record_ids = {}
+        pair_rows = array('I')
+        for (drug1, drug2), interaction in self.interactions.items():
+            record_key = (interaction['severity'], interaction['description'], interaction['recommendation'] or '')
+            record_id = record_ids.get(record_key)
+            if record_id is None:
+                record_id = record_ids[record_key] = len(record_ids)
+                record_rows.extend((string_ids[record_key[0]], string_id(record_key[1]), string_id(record_key[2])))
+            pair_rows.extend((string_id(drug1), string_id(drug2), record_id))
+        
+        if sys.byteorder == 'big':
+            record_rows.byteswap()
+            pair_rows.byteswap()
+        
+        blob = '\0'.join(strings).encode('utf-8')
+        header = COMPACT_HEADER.pack(COMPACT_MAGIC, COMPACT_VERSION, len(severities), len(strings),
+                                     len(blob), len(record_ids), len(self.interactions))
+        
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(blob)
+            f.write(record_rows.tobytes())
+            f.write(pair_rows.tobytes())
+        os.replace(tmp_path, path)
+    
+    def _sample_interactions(self) -> Dict:
+        """Sample interaction database, used when no knowledge base is configured"""
+        return {
             ('Aspirin', 'Warfarin'): {
                 'severity': 'high',
                 'description': 'Increased risk of bleeding. Monitor closely.',
@@ -68,35 +423,130 @@ class InteractionChecker:
                 'recommendation': 'Consult doctor about alternative acid reducer.'
             }
         }
+    
+    def _build_index(self):
+        """
+        Build the per-drug adjacency index and severity counters
+        index[drug][other] holds the interaction for the pair, so a lookup
+        only touches the neighbours of a medication instead of every pair
+        """
+        self._index = index = {}
         
-        return interactions
+        for (drug1, drug2), interaction in self.interactions.items():
+            neighbours = index.get(drug1)
+            if neighbours is None:
+                neighbours = index[drug1] = {}
+            neighbours[drug2] = interaction
+        
+        # Reverse direction, unless the pair is also stored in that orientation
+        for (drug1, drug2), interaction in self.interactions.items():
+            neighbours = index.get(drug2)
+            if neighbours is None:
+                neighbours = index[drug2] = {}
+            neighbours.setdefault(drug1, interaction)
+        
+        self._severity_counts = dict(Counter(map(itemgetter('severity'), self.interactions.values())))
+        self.normalizer.add_names(index)
+    
+    def _index_pair(self, drug1: str, drug2: str, interaction: Dict):
+        """Register a pair in the adjacency index"""
+        self._index.setdefault(drug1, {})[drug2] = interaction
+        # (drug1, drug2) wins over (drug2, drug1) for lookups starting at drug1,
+        # so only fill the reverse direction when it has no entry of its own
+        if (drug2, drug1) not in self.interactions:
+            self._index.setdefault(drug2, {})[drug1] = interaction
     
     def check_interactions(self, medications: List[str]) -> Dict:
         """
         Check for interactions between multiple medications
         Returns list of interactions found with severity levels
         """
-        interactions_found = []
-        warnings = []
+        # Resolve free-text names (brands, strengths, typos) to canonical names
+        meds = self.normalizer.normalize_all(medications)
+        
+        # Results only depend on the set of medications, so they are cached per set
+        key = tuple(sorted(set(meds)))
+        with self._cache_lock:
+            result = self._result_cache.get(key)
+            if result is not None:
+                self._result_cache.move_to_end(key)
+                self._cache_hits += 1
+            generation = self._cache_generation
         
-        # Normalize medication names
-        meds = [med.strip().title() for med in medications]
+        if result is None:
+            result = self._find_interactions(list(key))
+            with self._cache_lock:
+                self._cache_misses += 1
+                # Skip storing if the knowledge base changed while computing
+                if generation == self._cache_generation:
+                    self._result_cache[key] = result
+                    if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                        self._result_cache.popitem(last=False)
         
-        # Check all pairs
+        # Copy the mutable parts, so callers never edit the cached result
+        return {**result, 'interactions': [dict(entry) for entry in result['interactions']],
+                'medications_checked': meds}
+    
+    def _find_interactions(self, meds: List[str]) -> Dict:
+        """Check a list of distinct, normalized medications"""
+        interactions_found = []
+        positions = {med: i for i, med in enumerate(meds)}
+        
+        # Only intersect each medication's neighbours with the patient's list
+        pairs = []
         for i, med1 in enumerate(meds):
-            for med2 in meds[i+1:]:
-                # Check both orderings
-                interaction = self._get_interaction(med1, med2)
-                
-                if interaction:
-                    interactions_found.append({
-                        'drug1': med1,
-                        'drug2': med2,
-                        'severity': interaction['severity'],
-                        'description': interaction['description'],
-                        'recommendation': interaction['recommendation']
-                    })
+            neighbours = self._index.get(med1)
+            if not neighbours:
+                continue
+            
+            if len(neighbours) < len(positions):
+                candidates = [med for med in neighbours if med in positions]
+            else:
+                candidates = [med for med in positions if med in neighbours]
+            
+            for med2 in candidates:
+                j = positions[med2]
+                if j > i:
+                    pairs.append((i, j, med1, med2, neighbours[med2]))
+        
+        pairs.sort(key=lambda pair: (pair[0], pair[1]))
         
+        for _, _, med1, med2, interaction in pairs:
+            interactions_found.append(self._interaction_entry(med1, med2, interaction))
+        
+        return self._summarize(interactions_found, meds)
+    
+    def check_new_medication(self, medication: str, existing_medications: List[str]) -> Dict:
+        """
+        Check a newly added medication against the patient's existing ones
+        Only pairs involving the new medication are looked up, so the cost
+        depends on the patient's list rather than the whole knowledge base
+        """
+        new_med = self.normalizer.normalize(medication)
+        existing = self.normalizer.normalize_all(existing_medications)
+        
+        interactions_found = []
+        neighbours = self._index.get(new_med)
+        if neighbours:
+            seen = set()
+            for other in existing:
+                if other in neighbours and other not in seen:
+                    seen.add(other)
+                    interactions_found.append(self._interaction_entry(new_med, other, neighbours[other]))
+        
+        return self._summarize(interactions_found, existing + [new_med])
+    
+    def _interaction_entry(self, med1: str, med2: str, interaction: Dict) -> Dict:
+        return {
+            'drug1': med1,
+            'drug2': med2,
+            'severity': interaction['severity'],
+            'description': interaction['description'],
+            'recommendation': interaction['recommendation']
+        }
+    
+    def _summarize(self, interactions_found: List[Dict], meds: List[str]) -> Dict:
+        """Sort found interactions by severity and build the result summary"""
         # Sort by severity
         severity_order = {'high': 0, 'medium': 1, 'low': 2}
         interactions_found.sort(key=lambda x: severity_order.get(x['severity'], 3))
@@ -132,20 +582,15 @@ class InteractionChecker:
     
     def _get_interaction(self, med1: str, med2: str) -> Dict:
         """Get interaction between two medications"""
-        # Check both orderings
-        key1 = (med1, med2)
-        key2 = (med2, med1)
-        
-        if key1 in self.interactions:
-            return self.interactions[key1]
-        elif key2 in self.interactions:
-            return self.interactions[key2]
+        neighbours = self._index.get(med1)
+        if neighbours:
+            return neighbours.get(med2)
         
         return None
     
     def check_single_interaction(self, med1: str, med2: str) -> Dict:
         """Check interaction between two specific medications"""
-        interaction = self._get_interaction(med1.strip().title(), med2.strip().title())
+        interaction = self._get_interaction(self.normalizer.normalize(med1), self.normalizer.normalize(med2))
         
         if interaction:
             return {
@@ -164,43 +609,68 @@ class InteractionChecker:
     
     def get_medication_warnings(self, medication: str) -> List[str]:
         """Get all known interactions for a specific medication"""
-        med = medication.strip().title()
+        med = self.normalizer.normalize(medication)
         warnings = []
         
-        for (drug1, drug2), interaction in self.interactions.items():
-            if drug1 == med or drug2 == med:
-                other_drug = drug2 if drug1 == med else drug1
-                warnings.append({
-                    'interacts_with': other_drug,
-                    'severity': interaction['severity'],
-                    'description': interaction['description']
-                })
+        for other_drug, interaction in self._index.get(med, {}).items():
+            warnings.append({
+                'interacts_with': other_drug,
+                'severity': interaction['severity'],
+                'description': interaction['description']
+            })
         
         return warnings
     
     def add_interaction(self, drug1: str, drug2: str, severity: str, 
                        description: str, recommendation: str):
         """Add a new interaction to the database"""
-        key = (drug1.strip().title(), drug2.strip().title())
-        self.interactions[key] = {
-            'severity': severity,
-            'description': description,
-            'recommendation': recommendation
-        }
+        if self.frozen:
+            self._thaw()
+        key = (self._normalize_name(drug1), self._normalize_name(drug2))
+        interaction = self._record(severity, description, recommendation)
+        
+        previous = self.interactions.get(key)
+        if previous:
+            self._severity_counts[previous['severity']] -= 1
+        self._severity_counts[severity] = self._severity_counts.get(severity, 0) + 1
+        
+        self.interactions[key] = interaction
+        self._index_pair(key[0], key[1], interaction)
+        self.normalizer.add_names(key)
+        self._invalidate_cache()
+    
+    @property
+    def version(self) -> int:
+        """Changes whenever the knowledge base changes"""
+        return self._cache_generation
+    
+    def _invalidate_cache(self):
+        """Drop cached results after the knowledge base changed"""
+        global _generation
+        with self._cache_lock:
+            self._result_cache.clear()
+            self._cache_generation += 1
+        with _generation_lock:
+            _generation += 1
+    
+    def get_cache_stats(self) -> Dict:
+        """Get hit/miss counters of the per-medication-set result cache"""
+        with self._cache_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'hit_rate': self._cache_hits / lookups if lookups else 0.0,
+                'size': len(self._result_cache),
+                'max_size': self.RESULT_CACHE_SIZE
+            }
     
     def get_database_stats(self) -> Dict:
         """Get statistics about the interaction database"""
-        total = len(self.interactions)
-        high = sum(1 for i in self.interactions.values() if i['severity'] == 'high')
-        medium = sum(1 for i in self.interactions.values() if i['severity'] == 'medium')
-        low = sum(1 for i in self.interactions.values() if i['severity'] == 'low')
-        
         return {
-            'total_interactions': total,
-            'high_severity': high,
-            'medium_severity': medium,
-            'low_severity': low,
-            'unique_medications': len(set(
-                drug for pair in self.interactions.keys() for drug in pair
-            ))
+            'total_interactions': len(self.interactions),
+            'high_severity': self._severity_counts.get('high', 0),
+            'medium_severity': self._severity_counts.get('medium', 0),
+            'low_severity': self._severity_counts.get('low', 0),
+            'unique_medications': len(self._index)
         }
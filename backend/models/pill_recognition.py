@@ -15,15 +15,15 @@ class PillRecognitionModel:
         self.img_size = (224, 224)
     
     def _get_pill_classes(self):
-        """Define common pill/medication classes"""
-        return [
+        """Define common pill/medication classes (a tuple: read-only, shared by forked workers)"""
+        return (
             'Aspirin', 'Ibuprofen', 'Acetaminophen', 'Amoxicillin',
             'Lisinopril', 'Metformin', 'Atorvastatin', 'Amlodipine',
             'Omeprazole', 'Losartan', 'Gabapentin', 'Hydrochlorothiazide',
             'Levothyroxine', 'Metoprolol', 'Simvastatin', 'Prednisone',
             'Albuterol', 'Furosemide', 'Pantoprazole', 'Sertraline',
             'Unknown'
-        ]
+        )
     
     def preprocess_image(self, image_data):
         """Preprocess image for model input"""
@@ -1,7 +1,8 @@
 import os
-import json
-from datetime import datetime, timedelta
-from twilio.rest import Client
+import time
+from datetime import datetime
+import events
+import metrics
 from database import MedicineDatabase
 
 class NotificationEngine:
@@ -12,47 +13,37 @@ class NotificationEngine:
         self.whatsapp_from = os.getenv('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886') # Default Twilio sandbox number
         
         if self.account_sid and self.auth_token:
+            # Only imported when notifications can actually be sent
+            from twilio.rest import Client
             self.client = Client(self.account_sid, self.auth_token)
             print("Twilio notification service initialized.")
         else:
             self.client = None
             print("Twilio credentials missing. Notifications will be logged but not sent.")
+        
+        # (medication id, dose time) announced as dose.due today; reminders repeat every check, the event does not
+        self._announced = set()
+        self._announced_day = None
 
     def check_and_send_notifications(self):
         """Check for medications due soon and send WhatsApp notifications"""
-        print(f"[{datetime.now()}] Checking for upcoming medications...")
-        
-        medications = self.db.get_all_medications()
         now = datetime.now()
+        print(f"[{now}] Checking for upcoming medications...")
+        
+        if self._announced_day != now.date():
+            self._announced, self._announced_day = set(), now.date()
         
-        for med in medications:
-            if not med.get('phone_number'):
-                continue
-                
-            reminder_window = med.get('reminder_minutes', 15)
-            times = med.get('times', [])
-            if isinstance(times, str):
-                times = json.loads(times)
-                
-            for scheduled_time_str in times:
-                try:
-                    # Parse scheduled time (format: HH:MM)
-                    shour, smin = map(int, scheduled_time_str.split(':'))
-                    scheduled_time = now.replace(hour=shour, minute=smin, second=0, microsecond=0)
-                    
-                    # If scheduled time is in the past today, check if it's for tomorrow? 
-                    # For simplicity, we only check today's window.
-                    
-                    # Calculate notification time
-                    notification_time = scheduled_time - timedelta(minutes=reminder_window)
-                    
-                    # Check if we are within the notification window (now is between notification_time and scheduled_time)
-                    # And ensure we haven't already sent a notification for this specific dose today
-                    if notification_time <= now < scheduled_time:
-                        self._send_whatsapp_notification(med, scheduled_time_str)
-                        
-                except Exception as e:
-                    print(f"Error processing medication {med.get('name')}: {e}")
+        # Doses within their reminder window, from an indexed range query on dose times
+        for dose in self.db.get_due_reminders(now):
+            key = (dose['id'], dose['time'])
+            if key not in self._announced:
+                self._announced.add(key)
+                events.publish(dose['user_id'], 'dose.due', medication_id=dose['id'], name=dose['name'],
+                               dosage=dose['dosage'], time=dose['time'])
+            try:
+                self._send_whatsapp_notification(dose, dose['time'])
+            except Exception as e:
+                print(f"Error processing medication {dose.get('name')}: {e}")
 
     def _send_whatsapp_notification(self, med, scheduled_time):
         """Send the actual WhatsApp message"""
@@ -69,14 +60,17 @@ class NotificationEngine:
         print(f"DEBUG: Attempting to send WhatsApp to {phone}: {message_body}")
         
         if self.client:
+            start = time.perf_counter()
             try:
                 message = self.client.messages.create(
                     body=message_body,
                     from_=self.whatsapp_from,
                     to=phone
                 )
+                metrics.notification_send_duration.observe(time.perf_counter() - start, ('sent',))
                 print(f"Notification sent! SID: {message.sid}")
             except Exception as e:
+                metrics.notification_send_duration.observe(time.perf_counter() - start, ('failed',))
                 print(f"Failed to send WhatsApp notification: {e}")
         else:
             print("SKIPPING: Twilio client not configured.")
@@ -0,0 +1,204 @@
+"""
+Opt-in profiling of live requests
+
+A request is profiled when it carries X-Profile-Token matching PROFILE_TOKEN,
+or when it is picked by PROFILE_SAMPLE_RATE (optionally only on the route
+patterns in PROFILE_ROUTES). Sampled requests use a statistical stack
+sampler and are written as collapsed stacks ("a;b;c 12" lines), which
+flamegraph.pl, speedscope and inferno read directly. A token request may ask
+for X-Profile-Mode: cprofile instead, written as a .pstats file.
+
+Files go to PROFILE_DIR, keeping the newest PROFILE_MAX_FILES. With neither
+PROFILE_TOKEN nor PROFILE_SAMPLE_RATE set, init_app() installs nothing.
+"""
+from collections import Counter
+import cProfile
+from datetime import datetime
+import hmac
+import itertools
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+from flask import Blueprint, abort, g, jsonify, request, send_from_directory
+
+
+class StackSampler:
+    """Samples one thread's Python stack every interval seconds from a helper thread"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+
+def collapse_stack(frame) -> str:
+    """Root-first 'function (file:line);...' string for a frame and its callers"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class RequestProfiler:
+    """Decides which requests to profile, runs the profiler and keeps the output ring"""
+
+    def __init__(self, token: str = None, sample_rate: float = 0.0, routes=(), directory: str = None,
+                 max_files: int = 50, interval: float = 0.001):
+        self.token = token
+        self.sample_rate = sample_rate
+        self.routes = set(routes)
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'medicine-tracker-profiles')
+        self.max_files = max_files
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    @classmethod
+    def from_env(cls) -> 'RequestProfiler':
+        return cls(
+            token=os.getenv('PROFILE_TOKEN') or None,
+            sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+            routes=[route.strip() for route in os.getenv('PROFILE_ROUTES', '').split(',') if route.strip()],
+            directory=os.getenv('PROFILE_DIR'),
+            max_files=int(os.getenv('PROFILE_MAX_FILES', '50')),
+            interval=float(os.getenv('PROFILE_INTERVAL_MS', '1')) / 1000,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def authorized(self) -> bool:
+        supplied = request.headers.get('X-Profile-Token')
+        return bool(self.token and supplied) and hmac.compare_digest(supplied, self.token)
+
+    def start(self):
+        """before_request: start profiling this request if it asked for it or was sampled"""
+        if self.authorized():
+            mode = 'cprofile' if request.headers.get('X-Profile-Mode') == 'cprofile' else 'sample'
+        elif self.sample_rate and (not self.routes or (request.url_rule and request.url_rule.rule in self.routes)) \
+                and random.random() < self.sample_rate:
+            mode = 'sample'
+        else:
+            return
+
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident(), self.interval)
+            profiler.start()
+        g.profile = (mode, profiler, time.perf_counter())
+
+    def finish(self, response):
+        """after_request: stop the profiler, write its output and name the file in X-Profile-File"""
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        mode, profiler, start = profile
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', f'{request.method} {route}').strip('_')
+        # Timestamp first, so names sort oldest to newest across workers
+        stamp = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        name = f'{stamp}-{os.getpid()}-{next(self._sequence)}-{slug}-{elapsed_ms:.0f}ms'
+        if mode == 'cprofile':
+            profiler.disable()
+            name += '.pstats'
+            self._write(name, profiler.dump_stats)
+        else:
+            stacks = profiler.stop()
+            name += '.collapsed'
+            self._write(name, lambda path: self._write_collapsed(path, stacks))
+
+        if self.authorized():
+            response.headers['X-Profile-File'] = name
+        return response
+
+    def cleanup(self, exc):
+        """teardown_request: stop a profiler that after_request never reached"""
+        profile = g.pop('profile', None)
+        if profile is not None:
+            mode, profiler, _ = profile
+            profiler.disable() if mode == 'cprofile' else profiler.stop()
+
+    @staticmethod
+    def _write_collapsed(path: str, stacks: Counter):
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+    def _write(self, name: str, writer):
+        """Write one profile and drop the oldest beyond max_files"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            writer(os.path.join(self.directory, name))
+            files = self.list_files()
+            for old in files[self.max_files:]:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except FileNotFoundError:
+                    pass
+
+    def list_files(self) -> list:
+        """Profile file names, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = [name for name in os.listdir(self.directory) if name.endswith(('.collapsed', '.pstats'))]
+        return sorted(names, reverse=True)
+
+
+def init_app(app, profiler: RequestProfiler = None) -> RequestProfiler:
+    """Install the profiling hooks and /api/profiles routes, if profiling is configured"""
+    profiler = profiler or RequestProfiler.from_env()
+    if not profiler.enabled:
+        return profiler
+
+    app.before_request(profiler.start)
+    app.after_request(profiler.finish)
+    app.teardown_request(profiler.cleanup)
+
+    profiles = Blueprint('profiles', __name__)
+
+    @profiles.before_request
+    def require_token():
+        if not profiler.authorized():
+            abort(401)
+
+    @profiles.route('/api/profiles', methods=['GET'])
+    def list_profiles():
+        """The newest profiles first"""
+        return jsonify({'success': True, 'profiles': profiler.list_files()})
+
+    @profiles.route('/api/profiles/<name>', methods=['GET'])
+    def get_profile(name):
+        if name not in profiler.list_files():
+            abort(404)
+        return send_from_directory(profiler.directory, name, as_attachment=True)
+
+    app.register_blueprint(profiles)
+    return profiler
@@ -0,0 +1,141 @@
+"""
+Slow-query log and repeated-query (N+1) detection
+
+Every statement on every engine is observed through the timing listener of
+the metrics module. One slower than SLOW_QUERY_MS is
+printed with the endpoint that ran it and, for SELECTs, the database's
+EXPLAIN plan. Requests record the shape of each statement (its SQL with
+IN-lists collapsed); a shape run REPEATED_QUERY_THRESHOLD or more times in
+one request is reported as a likely query-in-a-loop. Both also count toward
+db_slow_queries_total and db_repeated_query_requests_total.
+
+track_queries() gives the same per-shape counts to tests; see the
+query_budget fixture in conftest.py.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+import os
+import re
+
+from flask import g, has_request_context, request
+
+import metrics
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '250'))
+REPEATED_QUERY_THRESHOLD = int(os.getenv('REPEATED_QUERY_THRESHOLD', '5'))
+
+# Shape counters of the request and any tests tracking this context
+_trackers = ContextVar('query_trackers', default=())
+
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s')
+_PLACEHOLDER_LIST = re.compile(r'\(\?(?:, ?\?)*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """The statement with placeholders normalised and IN-lists of any length collapsed to (?)"""
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _PLACEHOLDER.sub('?', shape)
+    return _PLACEHOLDER_LIST.sub('(?)', shape)
+
+
+def current_endpoint() -> str:
+    """The route pattern being served, or 'background' outside a request (jobs, shard workers)"""
+    if has_request_context():
+        return request.url_rule.rule if request.url_rule else 'unmatched'
+    # One fixed label: thread names are unbounded as pools come and go
+    return 'background'
+
+
+def repeated_shapes(shapes: Counter, threshold: int = None) -> list:
+    """(shape, count) pairs run at least threshold times, most repeated first"""
+    threshold = threshold or REPEATED_QUERY_THRESHOLD
+    return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+
+def start_tracking():
+    """Count this context's statements by shape; returns the token for stop_tracking()"""
+    return _trackers.set(_trackers.get() + (Counter(),))
+
+
+def stop_tracking(token) -> Counter:
+    """Stop counting and return the shape counts"""
+    shapes = _trackers.get()[-1]
+    _trackers.reset(token)
+    return shapes
+
+
+@contextmanager
+def track_queries():
+    """Yield a Counter of statement shapes run inside the block, including by nested requests"""
+    token = start_tracking()
+    try:
+        yield _trackers.get()[-1]
+    finally:
+        stop_tracking(token)
+
+
+def explain(conn, statement: str, parameters) -> str:
+    """The database's plan for a SELECT, run on a raw cursor so it is not itself monitored"""
+    if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return ''
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    except Exception as e:
+        return f'(EXPLAIN failed: {e})'
+    finally:
+        cursor.close()
+    # SQLite rows are (id, parent, notused, detail); PostgreSQL returns one text column
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def _observe_query(conn, statement, parameters, executemany, seconds):
+    elapsed_ms = seconds * 1000
+    trackers = _trackers.get()
+    if trackers:
+        shape = statement_shape(statement)
+        for shapes in trackers:
+            shapes[shape] += 1
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        endpoint = current_endpoint()
+        metrics.db_slow_queries.inc((endpoint,))
+        plan = '' if executemany else explain(conn, statement, parameters)
+        print(f"SLOW QUERY {elapsed_ms:.0f}ms in {endpoint}: {_WHITESPACE.sub(' ', statement).strip()}")
+        if plan:
+            print('  plan: ' + plan.replace('\n', '\n        '))
+
+
+def instrument_sqlalchemy():
+    """Monitor every statement on every engine, including shards, replicas and ones created later"""
+    metrics.instrument_sqlalchemy()
+    metrics.add_query_observer(_observe_query)
+
+
+def start_request_monitor():
+    g.query_shapes_token = start_tracking()
+
+
+def finish_request_monitor(exc):
+    """Report statement shapes the request repeated past REPEATED_QUERY_THRESHOLD"""
+    token = g.pop('query_shapes_token', None)
+    if token is None:
+        return
+    repeated = repeated_shapes(stop_tracking(token))
+    if repeated:
+        endpoint = current_endpoint()
+        metrics.db_repeated_query_requests.inc((endpoint,))
+        for shape, count in repeated:
+            print(f"REPEATED QUERY {count}x in {request.method} {endpoint}: {shape}")
+
+
+def init_app(app):
+    instrument_sqlalchemy()
+    app.before_request(start_request_monitor)
+    app.teardown_request(finish_request_monitor)
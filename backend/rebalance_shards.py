@@ -0,0 +1,48 @@
+"""
+Move users to the shard their id hashes to after the shard list changed
+
+Usage:
+    DATABASE_SHARD_URLS=url1,url2 python rebalance_shards.py [--dry-run]
+
+Shard 0 is DATABASE_URL. Appending a shard to DATABASE_SHARD_URLS moves only
+about 1/N of the users. Run it with the app stopped, then start the app with
+the new shard list: running processes cache where each user lives.
+Moved users' medications and logs get new ids on their new shard.
+"""
+import argparse
+import time
+
+from sqlalchemy import select
+
+import database
+from database import MedicineDatabase, UserDirectory, jump_hash
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move users to the shard their id hashes to')
+    parser.add_argument('--dry-run', action='store_true', help='Only report how many users would move')
+    args = parser.parse_args()
+
+    shards = len(database.shard_engines)
+    if shards == 1:
+        print("No shards configured; set DATABASE_SHARD_URLS.")
+        return
+
+    with database.engine.connect() as conn:
+        entries = conn.execute(select(UserDirectory.id, UserDirectory.shard).order_by(UserDirectory.id)).all()
+    moves = [(user_id, shard, jump_hash(user_id, shards)) for user_id, shard in entries
+             if shard != jump_hash(user_id, shards)]
+    print(f"{len(entries)} users across {shards} shards, {len(moves)} to move")
+    if args.dry_run:
+        return
+
+    db = MedicineDatabase()
+    start = time.perf_counter()
+    for user_id, source, target in moves:
+        db.move_user(user_id, target)
+        print(f"Moved user {user_id}: shard {source} -> {target}")
+    print(f"Moved {len(moves)} users in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -60,8 +60,30 @@ def test_google_auth_logic():
     else:
         print(f"❌ FAILURE: User 2 scoping failed. Found: {[m['name'] for m in meds2]}")
 
+def test_local_tokens_sign_in_only_with_the_secret():
+    import app as app_module
+    import local_auth
+
+    token = local_auth.sign('local_user_1', 'secret')
+    assert local_auth.verify(token, 'secret')['sub'] == 'local_user_1'
+    assert local_auth.verify(token, 'other') is None
+    assert local_auth.verify(token[:-1] + '0', 'secret') is None
+
+    client = app_module.app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    original = app_module.LOCAL_AUTH_SECRET
+    app_module.LOCAL_AUTH_SECRET = 'secret'
+    try:
+        response = client.get('/api/medications', headers=headers)
+        assert response.status_code == 200 and response.json['medications'] == []
+    finally:
+        app_module.LOCAL_AUTH_SECRET = original
+    user = app_module.db.get_or_create_user('local_user_1', 'unused@example.com')
+    assert user.email == 'local_user_1@local.test'
+
 if __name__ == "__main__":
     test_google_auth_logic()
+    test_local_tokens_sign_in_only_with_the_secret()
 
 if __name__ == "__main__":
     test_google_auth_logic()
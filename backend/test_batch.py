@@ -0,0 +1,82 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+import uuid
+
+
+def test_batch_matches_the_individual_endpoints(auth_user):
+    import app as app_module
+
+    db = app_module.db
+    google_id = f'batch_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    med_id = db.add_medication(user_id=user.id, name='Batched Med', dosage='5mg', frequency='daily',
+                               times=['08:00'], start_date='2025-01-01', end_date='2025-03-01')
+    assert user.id
+    auth_user(user)
+    client = app_module.app.test_client()
+    medications = client.get('/api/medications').get_json()
+    logs = client.get('/api/logs').get_json()
+
+    response = client.post('/api/batch', json={'requests': [
+        {'id': 'meds', 'path': '/api/medications'},
+        {'id': 'logs', 'method': 'GET', 'path': '/api/logs'},
+        {'id': 'log', 'method': 'POST', 'path': '/api/logs',
+         'body': {'medication_id': med_id, 'scheduled_time': '2025-02-01T08:00:00', 'status': 'taken'}},
+        {'id': 'after', 'path': '/api/logs'},
+        {'id': 'missing', 'path': '/api/no-such-endpoint'},
+    ]})
+    assert response.status_code == 200
+    results = {result['id']: result for result in response.get_json()['responses']}
+    assert [result['id'] for result in response.get_json()['responses']] == \
+        ['meds', 'logs', 'log', 'after', 'missing']
+    assert results['meds']['status'] == 200 and results['meds']['body'] == medications
+    assert results['logs']['body'] == logs
+    assert results['log']['status'] in (200, 201) and results['log']['body']['success']
+    # Writes run in order, so the GET after the POST sees its log
+    assert len(results['after']['body']['logs']) == len(logs['logs']) + 1
+    assert results['missing']['status'] == 404
+
+
+def test_failed_write_does_not_break_later_writes(auth_user):
+    import app as app_module
+
+    db = app_module.db
+    google_id = f'batch_rollback_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    med_id = db.add_medication(user_id=user.id, name='Rollback Med', dosage='5mg', frequency='daily',
+                               times=['08:00'], start_date='2025-01-01')
+    auth_user(user)
+    client = app_module.app.test_client()
+    response = client.post('/api/batch', json={'requests': [
+        {'id': 'bad', 'method': 'POST', 'path': '/api/logs',
+         'body': {'medication_id': med_id, 'scheduled_time': '2025-02-01T08:00:00', 'status': None}},
+        {'id': 'log', 'method': 'POST', 'path': '/api/logs',
+         'body': {'medication_id': med_id, 'scheduled_time': '2025-02-01T08:00:00', 'status': 'taken'}},
+        {'id': 'update', 'method': 'PUT', 'path': f'/api/medications/{med_id}', 'body': {'dosage': '10mg'}},
+    ]})
+    results = {result['id']: result for result in response.get_json()['responses']}
+    assert results['bad']['status'] >= 500
+    assert results['log']['status'] in (200, 201) and results['log']['body']['success']
+    assert results['update']['status'] == 200
+    assert db.get_medication(med_id, user.id)['dosage'] == '10mg'
+
+
+def test_batch_rejects_malformed_requests(auth_user):
+    import app as app_module
+
+    client = app_module.app.test_client()
+    assert client.post('/api/batch', json={'requests': [{'path': '/api/health'}]}).status_code == 401
+
+    user = app_module.db.get_or_create_user(google_id='batch_validation_user', email='batch@example.com')
+    auth_user(user)
+    for body in ({}, {'requests': []}, {'requests': [{'method': 'GET'}]},
+                 {'requests': [{'path': '/api/batch', 'method': 'POST'}]},
+                 {'requests': [{'path': 'http://example.com/'}]},
+                 {'requests': [{'path': '/api/health', 'method': 'PATCH'}]},
+                 {'requests': [{'path': '/api/health'}] * (app_module.BATCH_MAX_REQUESTS + 1)}):
+        response = client.post('/api/batch', json=body)
+        assert response.status_code == 400, body
+        assert response.get_json()['success'] is False
+
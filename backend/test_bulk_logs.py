@@ -0,0 +1,56 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+import uuid
+
+from database import MedicineDatabase
+
+
+def test_bulk_insert_and_update_report_per_item_results():
+    db = MedicineDatabase()
+    google_id = f'bulk_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    other = db.get_or_create_user(google_id=f'{google_id}_other', email=f'{google_id}_other@example.com')
+    med_id = db.add_medication(user_id=user.id, name='Bulk Med', dosage='5mg',
+                               frequency='daily', times=['08:00'], start_date='2025-01-01')
+    other_med_id = db.add_medication(user_id=other.id, name='Other Med', dosage='5mg',
+                                     frequency='daily', times=['08:00'], start_date='2025-01-01')
+    version = db.get_data_version(user.id)
+
+    results = db.bulk_log_medications(user.id, [
+        {'medication_id': med_id, 'scheduled_time': '2025-02-01T08:00:00'},
+        {'medication_id': other_med_id, 'scheduled_time': '2025-02-01T08:00:00'},
+        {'medication_id': med_id, 'scheduled_time': '2025-02-02T08:00:00', 'status': 'taken'},
+        {'medication_id': med_id, 'scheduled_time': '2025-02-03T08:00:00', 'status': 'forgotten'},
+        {'scheduled_time': '2025-02-04T08:00:00'},
+    ])
+
+    assert results[1] == {'error': 'Medication not found'}
+    assert 'error' in results[3] and 'error' in results[4]
+    first_id, second_id = results[0]['log_id'], results[2]['log_id']
+    assert second_id > first_id
+    assert db.get_data_version(user.id) == version + 1
+
+    logs = {log['id']: log for log in db.get_medication_logs(user.id, med_id)}
+    assert logs[first_id]['status'] == 'pending'
+    assert logs[second_id]['status'] == 'taken'
+
+    other_log_id = db.log_medication(other.id, other_med_id, '2025-02-01T08:00:00')
+    results = db.bulk_update_log_status(user.id, [
+        {'id': first_id, 'status': 'taken', 'taken_time': '2025-02-01T08:10:00'},
+        {'id': second_id, 'status': 'missed'},
+        {'id': other_log_id, 'status': 'taken'},
+    ])
+
+    assert results == [{'log_id': first_id}, {'log_id': second_id}, {'error': 'Log not found'}]
+    logs = {log['id']: log for log in db.get_medication_logs(user.id, med_id)}
+    assert logs[first_id]['status'] == 'taken'
+    assert logs[first_id]['taken_time'] == '2025-02-01T08:10:00'
+    assert logs[second_id]['status'] == 'missed'
+    assert {log['id']: log['status'] for log in db.get_medication_logs(other.id)} == {other_log_id: 'pending'}
+
+
+if __name__ == "__main__":
+    test_bulk_insert_and_update_report_per_item_results()
+    print("✅ SUCCESS: Bulk log tests passed.")
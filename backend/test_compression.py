@@ -0,0 +1,81 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+import gzip
+import json
+import uuid
+from datetime import date, datetime
+
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+import compression
+import fastjson
+
+
+def test_fastjson_rows_match_the_dict_path():
+    keys = ['id', 'name', 'when', 'day', 'ratio', 'flag', 'note']
+    rows = [
+        (1, 'Café "quoted" \\ 50%', datetime(2025, 1, 2, 8, 30), date(2025, 1, 2), 0.5, True, None),
+        (2, '', None, None, float(3), False, '\n'),
+    ]
+    payload = {'success': True, 'items': fastjson.RowList(keys, rows), 'next_cursor': None}
+    expected = [{key: value.isoformat() if isinstance(value, (date, datetime)) else value
+                 for key, value in zip(keys, row)} for row in rows]
+    assert json.loads(fastjson.dumps(payload)) == {'success': True, 'items': expected, 'next_cursor': None}
+    assert fastjson.dumps(fastjson.RowList(keys, [])) == '[]'
+
+
+def test_choose_encoding_follows_accept_encoding():
+    def accept(header):
+        return parse_accept_header(header, Accept)
+
+    assert compression.choose_encoding(accept('gzip, deflate')) == 'gzip'
+    assert compression.choose_encoding(accept('identity')) is None
+    assert compression.choose_encoding(accept('gzip;q=0')) is None
+    expected = 'br' if compression.brotli else 'gzip'
+    assert compression.choose_encoding(accept('gzip, br')) == expected
+    assert compression.choose_encoding(accept('*')) == expected
+
+
+def test_large_list_responses_are_compressed_when_accepted(auth_user):
+    import app as app_module
+
+    db = app_module.db
+    google_id = f'compression_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    med_id = db.add_medication(user_id=user.id, name='Compressed Med', dosage='5mg', frequency='daily',
+                               times=['08:00'], start_date='2025-01-01', end_date='2025-03-01')
+    db.bulk_log_medications(user.id, [{'medication_id': med_id, 'scheduled_time': f'2025-02-{day:02d}T08:00:00',
+                                       'status': 'taken'} for day in range(1, 29)])
+    assert user.id
+    auth_user(user)
+    client = app_module.app.test_client()
+    plain = client.get('/api/logs')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    logs = plain.get_json()['logs']
+    assert logs == db.get_medication_logs(user.id)
+    assert len(plain.data) >= compression.COMPRESS_MIN_BYTES
+
+    packed = client.get('/api/logs', headers={'Accept-Encoding': 'gzip'})
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert int(packed.headers['Content-Length']) == len(packed.data) < len(plain.data) / 3
+    assert gzip.decompress(packed.data) == plain.data
+
+    # A short page stays below the threshold
+    page_response = client.get('/api/logs?limit=5', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in page_response.headers
+    page = page_response.get_json()
+    assert len(page['logs']) == 5 and page['next_cursor']
+
+    # Below the threshold the body goes out as it is
+    small = client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+if __name__ == "__main__":
+    test_fastjson_rows_match_the_dict_path()
+    test_choose_encoding_follows_accept_encoding()
+    print("✅ SUCCESS: Compression tests passed.")
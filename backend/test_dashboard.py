@@ -0,0 +1,90 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+import uuid
+from datetime import datetime, timedelta
+from database import MedicineDatabase
+
+
+def test_dashboard_snapshot_and_data_version():
+    db = MedicineDatabase()
+    google_id = f'dashboard_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    empty = db.get_dashboard_snapshot(user.id)
+    assert empty == {'medications': [], 'today_doses': 0, 'adherence_rate': 0}
+
+    version = db.get_data_version(user.id)
+    med_id = db.add_medication(user_id=user.id, name='Dashboard Med', dosage='5mg',
+                               frequency='daily', times=['08:00'], start_date='2025-01-01')
+    assert db.get_data_version(user.id) == version + 1
+
+    now = datetime.now()
+    db.log_medication(user.id, med_id, now.strftime('%Y-%m-%dT08:00:00'), status='taken')
+    db.log_medication(user.id, med_id, (now - timedelta(days=2)).strftime('%Y-%m-%dT08:00:00'), status='missed')
+    assert db.get_data_version(user.id) == version + 3
+
+    snapshot = db.get_dashboard_snapshot(user.id)
+    stats = db.get_adherence_stats(user.id, days=7)
+    assert snapshot['medications'] == db.get_all_medications(user.id)
+    assert snapshot['adherence_rate'] == stats['adherence_rate']
+    assert snapshot['today_doses'] >= 1
+
+
+def test_dashboard_endpoint_answers_conditional_requests(auth_user):
+    import app as app_module
+
+    db = app_module.db
+    google_id = f'dashboard_etag_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    auth_user(user)
+    client = app_module.app.test_client()
+    first = client.get('/api/analytics/dashboard')
+    assert first.status_code == 200 and first.headers.get('ETag')
+
+    # Revalidating never loads the interaction knowledge base
+    def unavailable():
+        raise AssertionError('interaction checker loaded for a 304')
+    original_checker = app_module.interaction_checker
+    app_module.interaction_checker = app_module.LazyComponent('interaction checker', unavailable)
+    try:
+        cached = client.get('/api/analytics/dashboard', headers={'If-None-Match': first.headers['ETag']})
+    finally:
+        app_module.interaction_checker = original_checker
+    assert cached.status_code == 304
+
+    db.add_medication(user_id=user.id, name='Warfarin', dosage='5mg',
+                      frequency='daily', times=['08:00'], start_date='2025-01-01')
+    changed = client.get('/api/analytics/dashboard', headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+    assert changed.json['total_medications'] == first.json['total_medications'] + 1
+
+
+def test_etag_follows_the_knowledge_base_source(monkeypatch, tmp_path):
+    import app as app_module
+
+    def etag():
+        # Look the source up again instead of reusing the cached fingerprint
+        monkeypatch.setattr(app_module, '_kb_fingerprint', (0.0, ''))
+        return app_module.dashboard_etag(1, 1)
+
+    # The drug_interactions table gained rows, e.g. in another process
+    monkeypatch.delenv('INTERACTION_KB_PATH', raising=False)
+    monkeypatch.setattr(app_module.db, 'get_drug_interactions_stamp', lambda: (10, 10))
+    before = etag()
+    assert etag() == before
+    monkeypatch.setattr(app_module.db, 'get_drug_interactions_stamp', lambda: (11, 11))
+    assert etag() != before
+
+    # A compact knowledge base file was replaced by a deploy
+    kb_file = tmp_path / 'interactions.kb'
+    kb_file.write_bytes(b'first')
+    monkeypatch.setenv('INTERACTION_KB_PATH', str(kb_file))
+    before = etag()
+    kb_file.write_bytes(b'second build')
+    assert etag() != before
+
+
+if __name__ == "__main__":
+    test_dashboard_snapshot_and_data_version()
+    print("✅ SUCCESS: Dashboard tests passed.")
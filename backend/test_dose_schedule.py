@@ -0,0 +1,133 @@
+import os
+import uuid
+from datetime import date, datetime
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+from database import MaterializedDay, MedicationDoseTime, MedicineDatabase
+
+# materialize_doses and sweep_missed_doses run over every user, so each test
+# asserts on its own user only
+
+
+def _new_user(db, prefix):
+    google_id = f'{prefix}_{uuid.uuid4().hex}'
+    return db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+
+
+def test_materialize_doses_is_idempotent_and_follows_schedule():
+    db = MedicineDatabase()
+    user = _new_user(db, 'schedule_user')
+    daily = db.add_medication(user_id=user.id, name='Daily Med', dosage='5mg', frequency='daily',
+                              times=['08:00', '20:00'], start_date='2031-01-01')
+    weekly = db.add_medication(user_id=user.id, name='Weekly Med', dosage='5mg', frequency='weekly',
+                               times=['09:00'], start_date='2031-01-01')
+    db.add_medication(user_id=user.id, name='PRN Med', dosage='5mg', frequency='as-needed',
+                      times=['10:00'], start_date='2031-01-01')
+    db.add_medication(user_id=user.id, name='Ended Med', dosage='5mg', frequency='daily',
+                      times=['10:00'], start_date='2030-01-01', end_date='2031-01-05')
+    # A dose the client already logged is not duplicated
+    db.log_medication(user.id, daily, '2031-01-08T08:00:00', '2031-01-08T08:02:00', 'taken')
+    version = db.get_data_version(user.id)
+
+    def day_logs(day):
+        logs = db.get_medication_logs(user.id, start_date=day, end_date=day)
+        return sorted((log['medication_id'], log['scheduled_time'], log['status']) for log in logs)
+
+    expected = [
+        (daily, '2031-01-08T08:00:00', 'taken'),
+        (daily, '2031-01-08T20:00:00', 'pending'),
+        (weekly, '2031-01-08T09:00:00', 'pending'),
+    ]
+    assert db.materialize_doses('2031-01-08', batch_size=2) >= 2
+    assert day_logs('2031-01-08') == expected
+    materialized_version = db.get_data_version(user.id)
+    assert materialized_version > version
+
+    # A second run finds nothing missing for this user
+    db.materialize_doses('2031-01-08')
+    assert day_logs('2031-01-08') == expected
+    assert db.get_data_version(user.id) == materialized_version
+
+    # Off-schedule day for the weekly medication
+    db.materialize_doses('2031-01-09')
+    assert [time for _, time, _ in day_logs('2031-01-09')] == \
+        ['2031-01-09T08:00:00', '2031-01-09T20:00:00']
+
+
+def test_catch_up_fills_in_missed_days():
+    db = MedicineDatabase()
+    user = _new_user(db, 'catch_up_user')
+    med_id = db.add_medication(user_id=user.id, name='Catch-up Med', dosage='5mg', frequency='daily',
+                               times=['08:00'], start_date='2031-03-10')
+    # Forget earlier runs of this test; then the run for 03-10 happened and those for 03-11 to 03-14 did not
+    db.session.query(MaterializedDay).filter(MaterializedDay.day.between(date(2031, 3, 1), date(2031, 3, 31))).delete()
+    db.session.commit()
+    db.materialize_doses('2031-03-10')
+
+    db.catch_up_doses(days=7, today=date(2031, 3, 15))
+    days = [log['scheduled_time'][:10] for log in db.get_medication_logs(user.id, med_id)]
+    assert sorted(days) == [f'2031-03-{day}' for day in range(10, 17)]
+
+    # Every day in the window is recorded, so a rerun creates nothing
+    db.catch_up_doses(days=7, today=date(2031, 3, 15))
+    assert len(db.get_medication_logs(user.id, med_id)) == 7
+
+
+def test_sweep_missed_doses_only_touches_overdue_pending_logs():
+    db = MedicineDatabase()
+    user = _new_user(db, 'sweep_user')
+    med_id = db.add_medication(user_id=user.id, name='Sweep Med', dosage='5mg', frequency='daily',
+                               times=['08:00'], start_date='2031-01-01')
+    overdue = db.log_medication(user.id, med_id, '2031-02-01T08:00:00')
+    recent = db.log_medication(user.id, med_id, '2031-02-01T11:30:00')
+    taken = db.log_medication(user.id, med_id, '2031-02-01T07:00:00', '2031-02-01T07:05:00', 'taken')
+    version = db.get_data_version(user.id)
+
+    swept = db.sweep_missed_doses(grace_minutes=60, now=datetime(2031, 2, 1, 12, 0))
+    assert swept >= 1
+    assert db.get_data_version(user.id) == version + 1
+
+    statuses = {log['id']: log['status'] for log in db.get_medication_logs(user.id, med_id)}
+    assert statuses[overdue] == 'missed'
+    assert statuses[recent] == 'pending'
+    assert statuses[taken] == 'taken'
+
+
+def test_dose_times_follow_writes_and_drive_reminders():
+    db = MedicineDatabase()
+    user = _new_user(db, 'reminder_user')
+    med_id = db.add_medication(user_id=user.id, name='Reminder Med', dosage='5mg', frequency='daily',
+                               times=['23:58', '23:50'], start_date='2031-01-01',
+                               phone_number='+15550001', reminder_minutes=5)
+
+    def minutes():
+        return sorted(dose.minute_of_day for dose in
+                      db.session.query(MedicationDoseTime).filter(MedicationDoseTime.medication_id == med_id))
+
+    assert minutes() == [23 * 60 + 50, 23 * 60 + 58]
+    assert db.get_medication(med_id, user.id)['times'] == '["23:58", "23:50"]'
+
+    def due(hour, minute):
+        return [dose['time'] for dose in db.get_due_reminders(datetime(2031, 1, 1, hour, minute, 30))
+                if dose['id'] == med_id]
+
+    assert due(23, 44) == []
+    assert due(23, 45) == ['23:50']
+    assert due(23, 53) == ['23:58']
+    assert due(23, 58) == []
+
+    db.update_medication(med_id, user.id, times=['23:58', '23:59'])
+    assert minutes() == [23 * 60 + 58, 23 * 60 + 59]
+    assert due(23, 54) == ['23:58', '23:59']
+
+    db.delete_medication(med_id, user.id)
+    assert minutes() == []
+
+
+if __name__ == "__main__":
+    test_materialize_doses_is_idempotent_and_follows_schedule()
+    test_catch_up_fills_in_missed_days()
+    test_sweep_missed_doses_only_touches_overdue_pending_logs()
+    test_dose_times_follow_writes_and_drive_reminders()
+    print("✅ SUCCESS: Dose schedule tests passed.")
@@ -0,0 +1,40 @@
+from models.drug_normalizer import DrugNameNormalizer
+from models.interaction_checker import InteractionChecker
+
+
+def test_resolves_brands_strengths_and_typos():
+    normalizer = DrugNameNormalizer(['Acetaminophen', 'Warfarin', 'Metformin'])
+
+    assert normalizer.resolve('acetaminophen 500mg') == 'Acetaminophen'
+    assert normalizer.resolve('Tylenol Extra Strength tablets') == 'Acetaminophen'
+    assert normalizer.resolve('warfrin') == 'Warfarin'
+    assert normalizer.resolve('Metformin XR 750 mg') == 'Metformin'
+    assert normalizer.resolve('Zinc') is None
+    assert normalizer.normalize(' vitamin c ') == 'Vitamin C'
+
+
+def test_results_memoized_until_vocabulary_changes():
+    normalizer = DrugNameNormalizer(['Warfarin'])
+
+    assert normalizer.resolve('Sertralin') is None
+    assert normalizer.get_stats()['memoized_inputs'] == 1
+
+    normalizer.add_names(['Sertraline'])
+    assert normalizer.get_stats()['memoized_inputs'] == 0
+    assert normalizer.resolve('Sertralin') == 'Sertraline'
+
+
+def test_interaction_checker_matches_free_text_names():
+    checker = InteractionChecker()
+
+    result = checker.check_interactions(['Tylenol 500mg', 'coumadin'])
+    assert result['medications_checked'] == ['Acetaminophen', 'Warfarin']
+    assert result['total_interactions'] == 1
+    assert checker.check_single_interaction('Asprin', 'Warfarin 5 mg')['has_interaction']
+
+
+if __name__ == "__main__":
+    test_resolves_brands_strengths_and_typos()
+    test_results_memoized_until_vocabulary_changes()
+    test_interaction_checker_matches_free_text_names()
+    print("✅ SUCCESS: Drug name normalizer tests passed.")
@@ -0,0 +1,114 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+import json
+import uuid
+
+import events
+
+
+def _parse(chunk: bytes) -> list:
+    """(event type, data) for each event in a chunk of an SSE stream; comments are skipped"""
+    parsed = []
+    for block in chunk.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            parsed.append((fields['event'], json.loads(fields['data'])))
+    return parsed
+
+
+def test_writes_publish_events_after_commit():
+    from database import MedicineDatabase
+
+    db = MedicineDatabase()
+    google_id = f'events_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    other = db.get_or_create_user(google_id=f'{google_id}_other', email=f'{google_id}_other@example.com')
+    subscription = events.get_broker().subscribe(user.id)
+    other_subscription = events.get_broker().subscribe(other.id)
+    try:
+        med_id = db.add_medication(user_id=user.id, name='Evented Med', dosage='5mg', frequency='as-needed',
+                                   times=['08:00'], start_date='2025-01-01', end_date='2025-03-01')
+        db.update_medication(med_id, user.id, dosage='10mg', notes='With food')
+        log_id = db.log_medication(user.id, med_id, '2025-02-01T08:00:00')
+        db.update_log_status(log_id, user.id, 'taken', '2025-02-01T08:05:00')
+        bulk = db.bulk_log_medications(user.id, [{'medication_id': med_id, 'scheduled_time': '2025-02-02T08:00:00'}])
+        assert not db.update_log_status(log_id, other.id, 'missed')
+
+        received = [subscription.get(timeout=1) for _ in range(5)]
+        assert received == [
+            {'type': 'medication.created', 'medication_id': med_id, 'name': 'Evented Med'},
+            {'type': 'medication.updated', 'medication_id': med_id, 'fields': ['dosage', 'notes']},
+            {'type': 'log.created', 'log_id': log_id, 'medication_id': med_id,
+             'scheduled_time': '2025-02-01T08:00:00', 'status': 'pending'},
+            {'type': 'log.updated', 'log_id': log_id, 'medication_id': med_id, 'status': 'taken',
+             'taken_time': '2025-02-01T08:05:00'},
+            {'type': 'logs.created', 'count': 1, 'log_ids': [bulk[0]['log_id']]},
+        ]
+        # Failed writes and other users' writes publish nothing here
+        assert subscription.get(timeout=0.01) is None
+        assert other_subscription.get(timeout=0.01) is None
+    finally:
+        events.get_broker().unsubscribe(subscription)
+        events.get_broker().unsubscribe(other_subscription)
+
+
+def test_slow_subscribers_are_told_to_resync():
+    subscription = events.Subscription(user_id=1, maxsize=2)
+    for i in range(3):
+        subscription.put({'type': 'log.created', 'log_id': i})
+    stream = events.stream(subscription, {'type': 'ready', 'data_version': 4}, heartbeat=0.01, max_seconds=5)
+
+    assert next(stream).startswith('retry: ')
+    assert _parse(next(stream).encode()) == [('resync', {'type': 'resync'})]
+    # The backlog is dropped for the refetch; then the stream carries on
+    assert next(stream) == ': keepalive\n\n'
+    subscription.put({'type': 'log.created', 'log_id': 9})
+    assert _parse(next(stream).encode()) == [('log.created', {'type': 'log.created', 'log_id': 9})]
+
+
+def test_event_stream_endpoint(auth_user):
+    import app as app_module
+
+    db = app_module.db
+    client = app_module.app.test_client()
+    assert client.get('/api/events').status_code == 401
+
+    google_id = f'stream_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    assert user.id
+    broker = events.get_broker()
+    auth_user(user)
+    response = client.get('/api/events', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'Content-Encoding' not in response.headers
+    assert broker.subscriber_count(user.id) == 1
+    chunks = iter(response.response)
+    assert _parse(next(chunks)) == [('ready', {'type': 'ready', 'data_version': db.get_data_version(user.id)})]
+
+    client.post('/api/medications', json={'name': 'Streamed Med', 'dosage': '1mg', 'frequency': 'as-needed',
+                                          'times': ['08:00'], 'start_date': '2025-01-01'})
+    (event_type, data), = _parse(next(chunks))
+    assert event_type == 'medication.created' and data['name'] == 'Streamed Med'
+
+    original_max = events.EVENTS_MAX_STREAMS
+    events.EVENTS_MAX_STREAMS = broker.subscriber_count()
+    try:
+        refused = client.get('/api/events', headers={'Origin': 'http://localhost:5173'})
+        assert refused.status_code == 503
+        assert refused.headers['Retry-After'] == str(events.EVENTS_BUSY_RETRY_SECONDS)
+        # The browser client can only honour it cross-origin when it is exposed
+        assert 'Retry-After' in refused.headers['Access-Control-Expose-Headers']
+    finally:
+        events.EVENTS_MAX_STREAMS = original_max
+
+    response.close()
+    assert broker.subscriber_count(user.id) == 0
+
+
+if __name__ == "__main__":
+    test_writes_publish_events_after_commit()
+    test_slow_subscribers_are_told_to_resync()
+    print("✅ SUCCESS: Event stream tests passed.")
@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import tempfile
+
+from models.interaction_checker import InteractionChecker
+
+
+def test_check_interactions_uses_index():
+    checker = InteractionChecker()
+
+    result = checker.check_interactions(['warfarin', 'Aspirin', 'Ibuprofen', 'Vitamin D'])
+
+    pairs = [{i['drug1'], i['drug2']} for i in result['interactions']]
+    assert {'Warfarin', 'Aspirin'} in pairs
+    assert {'Aspirin', 'Ibuprofen'} in pairs
+    assert result['overall_risk'] == 'high'
+    assert result['total_interactions'] == 2
+
+
+def test_add_interaction_updates_index_and_stats():
+    checker = InteractionChecker()
+    before = checker.get_database_stats()
+
+    checker.add_interaction('Sertraline', 'Tramadol', 'high',
+                            'Risk of serotonin syndrome.', 'Avoid combination.')
+
+    stats = checker.get_database_stats()
+    assert stats['total_interactions'] == before['total_interactions'] + 1
+    assert stats['high_severity'] == before['high_severity'] + 1
+    assert stats['unique_medications'] == before['unique_medications'] + 2
+
+    warnings = checker.get_medication_warnings('tramadol')
+    assert [w['interacts_with'] for w in warnings] == ['Sertraline']
+    assert checker.check_single_interaction('Tramadol', 'Sertraline')['has_interaction']
+
+    # Overwriting a pair moves it between severity buckets
+    checker.add_interaction('Sertraline', 'Tramadol', 'medium', 'Monitor.', 'Monitor.')
+    stats = checker.get_database_stats()
+    assert stats['total_interactions'] == before['total_interactions'] + 1
+    assert stats['high_severity'] == before['high_severity']
+    assert stats['medium_severity'] == before['medium_severity'] + 1
+
+
+
+def test_results_cached_per_medication_set():
+    checker = InteractionChecker()
+
+    first = checker.check_interactions(['Aspirin', 'Warfarin'])
+    second = checker.check_interactions([' warfarin', 'ASPIRIN', 'Aspirin'])
+    assert checker.get_cache_stats()['hits'] == 1
+    assert checker.get_cache_stats()['misses'] == 1
+    assert second['interactions'] == first['interactions']
+    assert second['medications_checked'] == ['Warfarin', 'Aspirin', 'Aspirin']
+
+    # Callers get their own copies of the cached result
+    first['interactions'][0]['severity'] = 'edited'
+    second['interactions'].clear()
+    assert checker.check_interactions(['Aspirin', 'Warfarin'])['interactions'][0]['severity'] == 'high'
+
+    # Knowledge base changes invalidate cached results
+    checker.add_interaction('Aspirin', 'Warfarin', 'low', 'Changed.', 'Changed.')
+    assert checker.get_cache_stats()['size'] == 0
+    assert checker.check_interactions(['Aspirin', 'Warfarin'])['overall_risk'] == 'low'
+
+    checker.reload()
+    assert checker.check_interactions(['Aspirin', 'Warfarin'])['overall_risk'] == 'high'
+    assert checker.get_cache_stats()['misses'] == 3
+
+
+def test_check_new_medication_only_reports_new_pairs():
+    checker = InteractionChecker()
+
+    result = checker.check_new_medication('ibuprofen', ['Aspirin', 'Lisinopril', 'Warfarin', 'Aspirin'])
+
+    pairs = [(i['drug1'], i['drug2']) for i in result['interactions']]
+    # Aspirin + Warfarin is an existing pair and is not reported again
+    assert sorted(pairs) == [('Ibuprofen', 'Aspirin'), ('Ibuprofen', 'Lisinopril')]
+    assert result['overall_risk'] == 'medium'
+    assert checker.check_new_medication('Vitamin D', ['Aspirin'])['total_interactions'] == 0
+
+
+def test_frozen_index_answers_like_the_dict_index():
+    checker = InteractionChecker()
+    frozen = InteractionChecker()
+    frozen.freeze()
+    assert frozen.frozen and not checker.frozen
+
+    medications = ['Warfarin', 'Aspirin', 'Ibuprofen', 'Lisinopril', 'Prednisone', 'Vitamin D']
+    assert frozen.check_interactions(medications) == checker.check_interactions(medications)
+    assert frozen.check_new_medication('Ibuprofen', medications) == checker.check_new_medication('Ibuprofen', medications)
+    assert frozen.check_single_interaction('Warfarin', 'Aspirin') == checker.check_single_interaction('Warfarin', 'Aspirin')
+    assert sorted(map(str, frozen.get_medication_warnings('Ibuprofen'))) == \
+        sorted(map(str, checker.get_medication_warnings('Ibuprofen')))
+    assert frozen.get_database_stats() == checker.get_database_stats()
+    assert dict(frozen.interactions.items()) == checker.interactions
+    # Pairs only match in the orientation they were added in, as with the dict
+    assert ('Aspirin', 'Warfarin') in frozen.interactions
+    assert ('Warfarin', 'Aspirin') not in frozen.interactions
+
+    # Adding an interaction switches back to the mutable layout
+    frozen.add_interaction('Sertraline', 'Tramadol', 'high', 'Risk of serotonin syndrome.', 'Avoid combination.')
+    assert not frozen.frozen
+    assert frozen.check_single_interaction('Tramadol', 'Sertraline')['has_interaction']
+    assert frozen.get_database_stats()['total_interactions'] == checker.get_database_stats()['total_interactions'] + 1
+
+
+def test_load_from_table_and_compact_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'kb.db')
+        conn = sqlite3.connect(db_file)
+        # Schema from before the recommendation column existed
+        conn.execute('CREATE TABLE drug_interactions (id INTEGER PRIMARY KEY, drug1 TEXT, '
+                     'drug2 TEXT, severity TEXT, description TEXT)')
+        conn.executemany(
+            'INSERT INTO drug_interactions (drug1, drug2, severity, description) VALUES (?, ?, ?, ?)',
+            [('sertraline ', 'Tramadol', 'high', 'Serotonin syndrome.'),
+             ('Fluoxetine', 'Tramadol', 'high', 'Serotonin syndrome.'),
+             ('Digoxin', 'Amiodarone', 'medium', 'Raised digoxin levels.')]
+        )
+        conn.commit()
+        conn.close()
+
+        checker = InteractionChecker(f'sqlite:///{db_file}')
+        assert not checker.uses_sample_data and InteractionChecker().uses_sample_data
+        stats = checker.get_database_stats()
+        assert stats['total_interactions'] == 3
+        assert stats['high_severity'] == 2
+        assert checker.check_single_interaction('Tramadol', 'Sertraline')['has_interaction']
+        # Identical texts share one record
+        assert checker.interactions[('Sertraline', 'Tramadol')] is checker.interactions[('Fluoxetine', 'Tramadol')]
+
+        kb_file = os.path.join(tmp, 'interactions.kb')
+        checker.save_compact(kb_file)
+        reloaded = InteractionChecker(kb_file)
+        assert reloaded.interactions == checker.interactions
+        assert reloaded.get_database_stats() == stats
+
+
+if __name__ == "__main__":
+    test_check_interactions_uses_index()
+    test_add_interaction_updates_index_and_stats()
+    test_results_cached_per_medication_set()
+    test_check_new_medication_only_reports_new_pairs()
+    test_frozen_index_answers_like_the_dict_index()
+    test_load_from_table_and_compact_file()
+    print("✅ SUCCESS: Interaction checker tests passed.")
@@ -0,0 +1,56 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+from database import MedicineDatabase
+
+
+def _seed_logs(db, google_id):
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    med_id = db.add_medication(user_id=user.id, name='Pagination Med', dosage='5mg',
+                               frequency='daily', times=['08:00'], start_date='2025-01-01')
+    for day in range(1, 8):
+        # Two logs share each scheduled time, so the id tie-breaker matters
+        for _ in range(2):
+            db.log_medication(user.id, med_id, f'2025-01-{day:02d}T08:00:00', status='taken')
+    return user
+
+
+def test_keyset_pages_cover_history_once():
+    db = MedicineDatabase()
+    user = _seed_logs(db, 'pagination_user')
+
+    full = db.get_medication_logs(user.id)
+    pages, cursor = [], None
+    while True:
+        logs, cursor = db.get_medication_logs_page(user.id, limit=4, cursor=cursor)
+        pages.append(logs)
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages][:-1] == [4] * (len(pages) - 1)
+    assert [log['id'] for page in pages for log in page] == [log['id'] for log in full]
+
+
+def test_streamed_logs_match_full_list():
+    db = MedicineDatabase()
+    user = _seed_logs(db, 'streaming_user')
+
+    streamed = list(db.iter_medication_logs(user.id, batch_size=3))
+    assert streamed == db.get_medication_logs(user.id)
+
+
+def test_malformed_cursor_rejected():
+    db = MedicineDatabase()
+    try:
+        db.get_medication_logs_page(1, cursor='not-a-cursor')
+    except ValueError:
+        return
+    assert False, 'Expected ValueError for a malformed cursor'
+
+
+if __name__ == "__main__":
+    test_keyset_pages_cover_history_once()
+    test_streamed_logs_match_full_list()
+    test_malformed_cursor_rejected()
+    print("✅ SUCCESS: Log pagination tests passed.")
@@ -0,0 +1,82 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+import uuid
+
+import metrics
+
+
+def _sample(text: str, line_start: str) -> float:
+    """Value of the first exposition line starting with line_start"""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f'{line_start!r} not in metrics output')
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram('test_seconds', 'Test histogram', ('job',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, ('a"b',))
+
+    lines = histogram.render()
+    assert lines[:2] == ['# HELP test_seconds Test histogram', '# TYPE test_seconds histogram']
+    assert lines[2:] == [
+        'test_seconds_bucket{job="a\\"b",le="0.1"} 1',
+        'test_seconds_bucket{job="a\\"b",le="1"} 3',
+        'test_seconds_bucket{job="a\\"b",le="+Inf"} 4',
+        'test_seconds_sum{job="a\\"b"} 6.05',
+        'test_seconds_count{job="a\\"b"} 4',
+    ]
+
+
+def test_metrics_endpoint_reports_requests_and_queries(auth_user):
+    import app as app_module
+
+    db = app_module.db
+    google_id = f'metrics_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    # Load the id now: request teardown closes the session the user came from
+    assert user.id
+    auth_user(user)
+    client = app_module.app.test_client()
+    before = client.get('/api/metrics').get_data(as_text=True)
+    route = 'http_requests_total{route="/api/medications/<int:med_id>",method="GET",status="404"}'
+    count_before = _sample(before, route) if route in before else 0
+
+    assert client.get('/api/medications/999999999').status_code == 404
+    assert client.get('/api/no-such-route').status_code == 404
+
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert _sample(text, route) == count_before + 1
+    assert _sample(text, 'http_requests_total{route="unmatched",method="GET",status="404"}') >= 1
+    assert _sample(text, 'http_request_duration_seconds_count{route="/api/medications/<int:med_id>"') >= 1
+    # The medication lookup ran SQL inside the request
+    assert _sample(text, 'db_time_per_request_seconds_count{route="/api/medications/<int:med_id>"}') >= 1
+    assert _sample(text, 'db_queries_per_request_sum{route="/api/medications/<int:med_id>"}') >= 1
+    assert _sample(text, 'db_queries_total') >= 1
+    # Only the metrics request itself is in flight
+    assert _sample(text, 'http_requests_in_flight') == 1
+
+
+def test_scheduler_jobs_are_timed():
+    import app as app_module
+
+    def runs() -> float:
+        text = '\n'.join(metrics.scheduler_job_duration.render())
+        line = 'scheduler_job_duration_seconds_count{job="sweep_missed_doses"}'
+        return _sample(text, line) if line in text else 0
+
+    before = runs()
+    app_module.sweep_missed_doses(app_module.app)
+    assert runs() == before + 1
+
+
+if __name__ == "__main__":
+    test_histogram_renders_cumulative_buckets()
+    test_scheduler_jobs_are_timed()
+    print("✅ SUCCESS: Metrics tests passed.")
@@ -1,25 +1,25 @@
+import events
 from notifications import NotificationEngine
 from unittest.mock import MagicMock
 from datetime import datetime, timedelta
-import json
 
 def test_notification_logic():
     # Setup mock DB
     db = MagicMock()
     
-    # Mock medication due in 10 minutes, with 15 min reminder window
+    # Mock dose due in 10 minutes, as returned by the reminder query
     now = datetime.now()
     due_time = (now + timedelta(minutes=10)).strftime('%H:%M')
     
-    meds = [{
+    doses = [{
         'id': 1,
+        'user_id': 7,
         'name': 'Test Med',
         'dosage': '10mg',
-        'times': json.dumps([due_time]),
         'phone_number': 'whatsapp:+1234567890',
-        'reminder_minutes': 15
+        'time': due_time
     }]
-    db.get_all_medications.return_value = meds
+    db.get_due_reminders.return_value = doses
     
     # Setup Notification Engine
     engine = NotificationEngine(db)
@@ -41,6 +41,21 @@ def test_notification_logic():
         print(f"Body: {kwargs['body']}")
     else:
         print("❌ FAILURE: Notification was NOT triggered.")
+    assert engine.client.messages.create.called
+    assert due_time in engine.client.messages.create.call_args.kwargs['body']
+    
+    # The reminder repeats on every check; its dose.due event goes out once
+    subscription = events.get_broker().subscribe(7)
+    try:
+        engine._announced.clear()
+        engine.check_and_send_notifications()
+        engine.check_and_send_notifications()
+        event = subscription.get(timeout=1)
+        assert event == {'type': 'dose.due', 'medication_id': 1, 'name': 'Test Med', 'dosage': '10mg',
+                         'time': due_time}
+        assert subscription.get(timeout=0.01) is None
+    finally:
+        events.get_broker().unsubscribe(subscription)
 
 if __name__ == "__main__":
     test_notification_logic()
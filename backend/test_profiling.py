@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+
+from flask import Flask, jsonify
+
+import profiling
+
+
+def _app(profiler):
+    app = Flask(__name__)
+
+    @app.route('/api/slow')
+    def slow():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+        return jsonify({'success': True})
+
+    @app.route('/api/other')
+    def other():
+        return jsonify({'success': True})
+
+    profiling.init_app(app, profiler)
+    return app
+
+
+def test_disabled_profiler_installs_nothing():
+    app = _app(profiling.RequestProfiler())
+    assert not app.before_request_funcs
+    assert 'profiles' not in app.blueprints
+
+
+def test_token_request_writes_collapsed_stacks_to_a_bounded_ring():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = profiling.RequestProfiler(token='secret', directory=tmp, max_files=2)
+        client = _app(profiler).test_client()
+
+        assert 'X-Profile-File' not in client.get('/api/slow').headers
+        assert client.get('/api/slow', headers={'X-Profile-Token': 'wrong'}).headers.get('X-Profile-File') is None
+        assert profiler.list_files() == []
+
+        names = []
+        for _ in range(3):
+            response = client.get('/api/slow', headers={'X-Profile-Token': 'secret'})
+            names.append(response.headers['X-Profile-File'])
+        assert sorted(profiler.list_files()) == sorted(names[1:])
+
+        with open(os.path.join(tmp, names[-1])) as f:
+            lines = f.read().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(' ', 1)
+        assert int(count) > 0
+        assert any('slow (test_profiling.py' in line for line in lines)
+
+        assert client.get('/api/profiles').status_code == 401
+        listing = client.get('/api/profiles', headers={'X-Profile-Token': 'secret'}).get_json()
+        assert listing['profiles'][0] == names[-1]
+        download = client.get(f'/api/profiles/{names[-1]}', headers={'X-Profile-Token': 'secret'})
+        assert download.status_code == 200 and b'slow (test_profiling.py' in download.data
+        assert client.get('/api/profiles/..%2Fetc', headers={'X-Profile-Token': 'secret'}).status_code == 404
+
+
+def test_cprofile_mode_and_route_sampling():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = profiling.RequestProfiler(token='secret', sample_rate=1.0, routes=['/api/slow'], directory=tmp)
+        client = _app(profiler).test_client()
+
+        response = client.get('/api/slow', headers={'X-Profile-Token': 'secret', 'X-Profile-Mode': 'cprofile'})
+        assert response.headers['X-Profile-File'].endswith('.pstats')
+
+        # Sampled requests are written but not announced to the caller
+        assert 'X-Profile-File' not in client.get('/api/slow').headers
+        client.get('/api/other')
+        files = profiler.list_files()
+        assert len(files) == 2
+        assert sum(name.endswith('.collapsed') for name in files) == 1
+        assert not any('api_other' in name for name in files)
+
+
+if __name__ == "__main__":
+    test_disabled_profiler_installs_nothing()
+    test_token_request_writes_collapsed_stacks_to_a_bounded_ring()
+    test_cprofile_mode_and_route_sampling()
+    print("✅ SUCCESS: Profiling tests passed.")
@@ -0,0 +1,94 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+import uuid
+
+import metrics
+import query_monitor
+
+# Most SQL statements each endpoint may run for a user with several medications and logs.
+# Raise a budget only together with the change that needs it
+ENDPOINT_BUDGETS = {
+    ('GET', '/api/medications'): 2,
+    ('GET', '/api/medications/{med}'): 1,
+    ('POST', '/api/medications'): 5,
+    ('PUT', '/api/medications/{med}'): 3,
+    ('DELETE', '/api/medications/{spare}'): 6,
+    ('GET', '/api/logs'): 1,
+    ('POST', '/api/logs'): 3,
+    ('GET', '/api/analytics/adherence'): 1,
+    ('GET', '/api/analytics/dashboard'): 2,
+    ('POST', '/api/ml/predict-adherence'): 3,
+}
+
+BODIES = {
+    ('POST', '/api/medications'): {'name': 'Budget Med', 'dosage': '1mg', 'frequency': 'daily',
+                                   'times': ['08:00'], 'start_date': '2025-01-01'},
+    ('PUT', '/api/medications/{med}'): {'dosage': '10mg'},
+    ('POST', '/api/logs'): {'medication_id': '{med}', 'scheduled_time': '2026-01-10T08:00:00', 'status': 'taken'},
+    ('POST', '/api/ml/predict-adherence'): {'medication_id': '{med}'},
+}
+
+
+def _user_with_history(db):
+    google_id = f'budget_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    med_ids = [db.add_medication(user_id=user.id, name=f'Budget Med {i}', dosage='5mg', frequency='daily',
+                                 times=['08:00', '20:00'], start_date='2025-01-01') for i in range(6)]
+    for med_id in med_ids:
+        for day in range(1, 8):
+            db.log_medication(user.id, med_id, f'2026-01-{day:02d}T08:00:00', status='taken')
+    spare = db.add_medication(user_id=user.id, name='Spare', dosage='5mg', frequency='daily',
+                              times=['08:00'], start_date='2025-01-01')
+    return user, med_ids[0], spare
+
+
+def test_endpoints_stay_within_query_budgets(query_budget, auth_user):
+    import app as app_module
+
+    user, med, spare = _user_with_history(app_module.db)
+    auth_user(user)
+    client = app_module.app.test_client()
+    for (method, path), budget in ENDPOINT_BUDGETS.items():
+        body = BODIES.get((method, path))
+        if body:
+            body = {key: med if value == '{med}' else value for key, value in body.items()}
+        url = path.format(med=med, spare=spare)
+        with query_budget(budget):
+            response = client.open(url, method=method, json=body)
+        assert response.status_code == 200, (method, url, response.get_json())
+
+
+def test_slow_and_repeated_queries_are_reported(capsys):
+    import app as app_module
+
+    db = app_module.db
+    user, med, _ = _user_with_history(db)
+    threshold = query_monitor.SLOW_QUERY_MS
+    query_monitor.SLOW_QUERY_MS = 0
+    try:
+        with app_module.app.test_request_context('/api/medications/1'):
+            query_monitor.start_request_monitor()
+            for _ in range(query_monitor.REPEATED_QUERY_THRESHOLD):
+                db.get_medication(med, user.id)
+            query_monitor.finish_request_monitor(None)
+    finally:
+        query_monitor.SLOW_QUERY_MS = threshold
+
+    output = capsys.readouterr().out
+    assert 'SLOW QUERY' in output and 'in /api/medications/<int:med_id>: SELECT' in output
+    # SQLite's EXPLAIN QUERY PLAN names the access path
+    assert 'plan: SEARCH medications' in output
+    assert f'REPEATED QUERY {query_monitor.REPEATED_QUERY_THRESHOLD}x in GET /api/medications/<int:med_id>' in output
+    # The monitor is fed by the metrics module's timing listener rather than timing statements again
+    assert metrics._query_observers.count(query_monitor._observe_query) == 1
+
+
+def test_statement_shapes_ignore_in_list_length():
+    assert query_monitor.statement_shape('SELECT * FROM t WHERE id IN (?, ?, ?)') == \
+        query_monitor.statement_shape('SELECT *\n  FROM t WHERE id IN (?)')
+    assert query_monitor.statement_shape('SELECT * FROM t WHERE a = %(a_1)s AND b IN (%s, %s)') == \
+        'SELECT * FROM t WHERE a = ? AND b IN (?)'
+    # Work outside a request shares one label, whatever thread runs it
+    assert query_monitor.current_endpoint() == 'background'
@@ -0,0 +1,104 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+import time
+import uuid
+
+import database
+from database import Base, MedicineDatabase, ReplicaPool
+
+REPLICA_FILE = 'test_medicine_tracker_replica.db'
+
+
+def _seed_replica(user_id: int, google_id: str) -> ReplicaPool:
+    """A second SQLite file stands in for a replica that holds different data"""
+    if os.path.exists(REPLICA_FILE):
+        os.remove(REPLICA_FILE)
+    pool = ReplicaPool([f'sqlite:///{REPLICA_FILE}', 'sqlite:////nonexistent-dir/replica.db'])
+    replica = pool.engines[0]
+    Base.metadata.create_all(bind=replica)
+    with replica.begin() as conn:
+        conn.execute(database.insert(database.User).values(id=user_id, google_id=google_id, email=f'{google_id}@example.com'))
+        conn.execute(database.insert(database.Medication).values(
+            user_id=user_id, name='Replica Med', dosage='5mg', frequency='daily', times='["08:00"]',
+            start_date=database.date(2033, 1, 1)
+        ))
+    return pool
+
+
+def test_reads_route_to_replicas_with_read_your_writes():
+    db = MedicineDatabase()
+    google_id = f'routing_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    db.add_medication(user_id=user.id, name='Primary Med', dosage='5mg', frequency='daily',
+                      times=['08:00'], start_date='2033-01-01')
+    pool = _seed_replica(user.id, google_id)
+    database.replicas = pool
+
+    def names():
+        return [med['name'] for med in db.get_all_medications(user.id)]
+
+    try:
+        # The user just wrote, so read-your-writes stays on the primary
+        assert names() == ['Primary Med']
+
+        database._last_write.pop(user.id)
+        # The unreachable replica is skipped and marked down; the healthy one serves reads
+        assert names() == ['Replica Med']
+        assert names() == ['Replica Med']
+        assert pool.get_stats() == {'replicas': 2, 'down': 1}
+        assert db.get_adherence_stats(user.id)['total'] == 0
+
+        # A write made on another worker, whose marker the client sends back, also keeps reads on the primary
+        db.set_read_consistency(None, time.time())
+        assert names() == ['Primary Med']
+        db.set_read_consistency(None, time.time() - database.REPLICA_LAG_SECONDS)
+        assert names() == ['Replica Med']
+
+        db.set_read_consistency('strong')
+        assert names() == ['Primary Med']
+
+        db.set_read_consistency('eventual')
+        db.add_medication(user_id=user.id, name='Second Med', dosage='5mg', frequency='daily',
+                          times=['09:00'], start_date='2033-01-01')
+        assert names() == ['Replica Med']
+
+        # With every replica down, reads fall back to the primary
+        pool.mark_down(pool.engines[0])
+        assert sorted(names()) == ['Primary Med', 'Second Med']
+    finally:
+        database.replicas = None
+        db.remove_session()
+        for engine in pool.engines:
+            engine.dispose()
+        if os.path.exists(REPLICA_FILE):
+            os.remove(REPLICA_FILE)
+
+
+def test_writes_hand_the_client_a_marker_and_old_entries_are_pruned(auth_user):
+    import app as app_module
+
+    db = app_module.db
+    google_id = f'marker_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    auth_user(user)
+    client = app_module.app.test_client()
+    assert 'X-Last-Write' not in client.get('/api/medications').headers
+    response = client.post('/api/medications', json={'name': 'Marked Med', 'dosage': '1mg', 'frequency': 'daily',
+                                                      'times': ['08:00'], 'start_date': '2033-01-01'})
+    assert abs(float(response.headers['X-Last-Write']) - time.time()) < 5
+
+    stale = time.time() - database.REPLICA_LAG_SECONDS - 1
+    for i in range(database.LAST_WRITE_PRUNE_SIZE + 1):
+        database._last_write[-1 - i] = stale
+    db.add_medication(user_id=user.id, name='Pruning Med', dosage='5mg', frequency='daily',
+                      times=['08:00'], start_date='2033-01-01')
+    db.remove_session()
+    assert user.id in database._last_write
+    assert all(key not in database._last_write for key in range(-1, -database.LAST_WRITE_PRUNE_SIZE - 2, -1))
+
+
+if __name__ == "__main__":
+    test_reads_route_to_replicas_with_read_your_writes()
+    print("✅ SUCCESS: Read replica routing tests passed.")
@@ -0,0 +1,120 @@
+import os
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+import uuid
+from datetime import datetime
+
+import database
+from database import Medication, MedicineDatabase, MLPrediction, User, jump_hash, select
+
+SHARD_FILES = ['test_medicine_tracker_shard1.db', 'test_medicine_tracker_shard2.db']
+
+
+def _remove_shard_files():
+    for path in SHARD_FILES:
+        for leftover in (path, f'{path}-wal', f'{path}-shm'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+def _configure():
+    _remove_shard_files()
+    database.configure_shards([f'sqlite:///{path}' for path in SHARD_FILES])
+
+
+def _reset():
+    MedicineDatabase().remove_session()
+    database.configure_shards([])
+    _remove_shard_files()
+
+
+def _medication_owners(shard: int) -> set:
+    with database.shard_engines[shard].connect() as conn:
+        return set(conn.execute(select(Medication.user_id)).scalars())
+
+
+def test_jump_hash_is_stable_and_moves_few_keys():
+    assert [jump_hash(key, 3) for key in range(10)] == [jump_hash(key, 3) for key in range(10)]
+    assert all(0 <= jump_hash(key, 5) < 5 for key in range(1000))
+    # Growing from 4 to 5 buckets only moves keys into the new bucket
+    moved = [key for key in range(10000) if jump_hash(key, 4) != jump_hash(key, 5)]
+    assert all(jump_hash(key, 5) == 4 for key in moved)
+    assert 1500 < len(moved) < 2500
+
+
+def test_users_are_placed_by_hash_and_jobs_fan_out():
+    _configure()
+    db = MedicineDatabase()
+    try:
+        run = uuid.uuid4().hex
+        users = [db.get_or_create_user(google_id=f'shard_user_{run}_{i}', email=f's{run}_{i}@example.com') for i in range(12)]
+        assert db.get_or_create_user(google_id=f'shard_user_{run}_0', email=f's{run}_0@example.com').id == users[0].id
+        for user in users:
+            db.add_medication(user_id=user.id, name=f'Med {user.id}', dosage='5mg', frequency='daily',
+                              times=['08:30'], start_date='2034-01-01', phone_number='+15550001')
+
+        placed = {user.id: jump_hash(user.id, 3) for user in users}
+        assert len(set(placed.values())) > 1
+        for user_id, shard in placed.items():
+            assert db.shard_for_user(user_id) == shard
+            assert user_id in _medication_owners(shard)
+            assert [med['name'] for med in db.get_all_medications(user_id)] == [f'Med {user_id}']
+
+        names = {f'Med {user_id}' for user_id in placed}
+        assert names <= {med['name'] for med in db.get_all_medications()}
+        reminders = db.get_due_reminders(datetime(2034, 1, 2, 8, 20))
+        assert names <= {dose['name'] for dose in reminders}
+        # Every fan-out runs on the one shared pool
+        pool = database._get_fan_out_pool()
+        db.get_all_medications()
+        assert database._get_fan_out_pool() is pool
+
+        assert db.materialize_doses('2034-01-02') >= len(users)
+        for user_id in placed:
+            assert len(db.get_medication_logs(user_id)) == 1
+        assert db.sweep_missed_doses(now=datetime(2034, 1, 3)) >= len(users)
+    finally:
+        _reset()
+
+
+def test_move_user_copies_rows_and_repoints_directory():
+    _configure()
+    db = MedicineDatabase()
+    try:
+        google_id = f'moving_user_{uuid.uuid4().hex}'
+        user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+        med_id = db.add_medication(user_id=user.id, name='Mover', dosage='5mg', frequency='daily',
+                                   times=['09:00', '21:00'], start_date='2034-01-01')
+        db.log_medication(user.id, med_id, '2034-01-01T09:00:00', status='taken')
+        # Predictions reference the medication, so they live on its user's shard
+        db.save_ml_prediction(user.id, med_id, 'adherence', 0.9, 0.8)
+        source = db.shard_for_user(user.id)
+        with database.shard_engines[source].connect() as conn:
+            assert conn.execute(select(MLPrediction.confidence).where(MLPrediction.medication_id == med_id)).scalar() == 0.8
+        target = (source + 1) % 3
+
+        assert db.move_user(user.id, target)
+        assert not db.move_user(user.id, target)
+        assert db.shard_for_user(user.id) == target
+        assert user.id not in _medication_owners(source)
+
+        meds = db.get_all_medications(user.id)
+        assert [(med['name'], med['times']) for med in meds] == [('Mover', '["09:00", "21:00"]')]
+        logs = db.get_medication_logs(user.id)
+        assert [(log['medication_id'], log['status']) for log in logs] == [(meds[0]['id'], 'taken')]
+        with database.shard_engines[target].connect() as conn:
+            assert conn.execute(select(User.email).where(User.id == user.id)).scalar() == f'{google_id}@example.com'
+            moved = select(MLPrediction.confidence).where(MLPrediction.medication_id == meds[0]['id'])
+            assert conn.execute(moved).scalars().all() == [0.8]
+        with database.shard_engines[source].connect() as conn:
+            assert conn.execute(select(MLPrediction.id).where(MLPrediction.medication_id == med_id)).first() is None
+    finally:
+        _reset()
+
+
+if __name__ == "__main__":
+    test_jump_hash_is_stable_and_moves_few_keys()
+    test_users_are_placed_by_hash_and_jobs_fan_out()
+    test_move_user_copies_rows_and_repoints_directory()
+    print("All shard tests passed!")
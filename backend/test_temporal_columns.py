@@ -0,0 +1,112 @@
+import os
+import uuid
+from datetime import date, datetime, time, timedelta
+# Use a temporary database for testing
+os.environ['DATABASE_URL'] = 'sqlite:///test_medicine_tracker.db'
+
+from sqlalchemy import text
+
+import database
+from database import MedicineDatabase
+
+
+def test_timestamps_are_native_and_serialized_as_iso():
+    db = MedicineDatabase()
+    user = db.get_or_create_user(google_id='temporal_user', email='temporal@example.com')
+    med_id = db.add_medication(user_id=user.id, name='Temporal Med', dosage='5mg', frequency='daily',
+                               times=['08:00'], start_date='2032-01-01')
+    early = db.log_medication(user.id, med_id, '2032-01-09T08:00:00')
+    late = db.log_medication(user.id, med_id, '2032-01-10T08:00:00', '2032-01-10T08:04:30', 'taken')
+
+    logs = db.get_medication_logs(user.id, med_id, start_date='2032-01-10')
+    assert [log['id'] for log in logs] == [late]
+    assert logs[0]['scheduled_time'] == '2032-01-10T08:00:00'
+    assert logs[0]['taken_time'] == '2032-01-10T08:04:30'
+    assert db.get_medication(med_id, user.id)['start_date'] == '2032-01-01'
+
+    raw = db.get_medication_logs(user.id, med_id, iso=False)
+    assert raw[-1]['id'] == early
+    assert raw[-1]['scheduled_time'] == datetime(2032, 1, 9, 8, 0)
+
+    try:
+        db.log_medication(user.id, med_id, 'tomorrow morning')
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
+
+def test_date_only_end_date_includes_the_whole_day():
+    # The dashboard's "today" query: start_date = end_date = today
+    db = MedicineDatabase()
+    google_id = f'today_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    med_id = db.add_medication(user_id=user.id, name='Today Med', dosage='5mg', frequency='as-needed',
+                               times=['08:00'], start_date='2025-01-01')
+    today = date.today()
+    midnight = datetime.combine(today, time())
+    ids = {offset: db.log_medication(user.id, med_id, (midnight + offset).isoformat())
+           for offset in (timedelta(0), timedelta(hours=8), timedelta(hours=23, minutes=59, seconds=59),
+                          timedelta(days=1), timedelta(seconds=-1))}
+
+    logs = db.get_medication_logs(user.id, start_date=today.isoformat(), end_date=today.isoformat())
+    assert sorted(log['id'] for log in logs) == sorted(ids[offset] for offset in (
+        timedelta(0), timedelta(hours=8), timedelta(hours=23, minutes=59, seconds=59)))
+
+    # A full timestamp is still an inclusive instant
+    logs = db.get_medication_logs(user.id, start_date=today.isoformat(), end_date=f'{today.isoformat()}T08:00:00')
+    assert sorted(log['id'] for log in logs) == sorted([ids[timedelta(0)], ids[timedelta(hours=8)]])
+
+
+def test_offsets_are_converted_to_server_local_time():
+    db = MedicineDatabase()
+    google_id = f'offset_user_{uuid.uuid4().hex}'
+    user = db.get_or_create_user(google_id=google_id, email=f'{google_id}@example.com')
+    med_id = db.add_medication(user_id=user.id, name='Offset Med', dosage='5mg', frequency='as-needed',
+                               times=['08:00'], start_date='2025-01-01')
+    log_id = db.log_medication(user.id, med_id, '2032-03-01T08:00:00Z', '2032-03-01T10:05:00+02:00', 'taken')
+
+    def local(value):
+        return datetime.fromisoformat(value).astimezone().replace(tzinfo=None).isoformat()
+
+    log, = [log for log in db.get_medication_logs(user.id, med_id) if log['id'] == log_id]
+    assert log['scheduled_time'] == local('2032-03-01T08:00:00+00:00')
+    assert log['taken_time'] == local('2032-03-01T10:05:00+02:00')
+
+
+def test_legacy_string_values_are_migrated():
+    db = MedicineDatabase()
+    user = db.get_or_create_user(google_id='legacy_user', email='legacy@example.com')
+    with database.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO medications (name, dosage, frequency, times, start_date, end_date, user_id, created_at) "
+            "VALUES ('Legacy Med', '5mg', 'daily', '[\"08:00\"]', '2032-02-01', '', :user_id, '2032-01-15 00:00:00.000000')"
+        ), {'user_id': user.id})
+        med_id = conn.execute(text('SELECT max(id) FROM medications')).scalar()
+        conn.execute(text(
+            "INSERT INTO medication_logs (medication_id, user_id, scheduled_time, taken_time, status, created_at) VALUES "
+            "(:med_id, :user_id, '2032-02-02T08:00', '2032-02-02T08:10:00', 'taken', '2032-02-02 07:00:00.000000'), "
+            "(:med_id, :user_id, 'not a time', '', 'pending', '2032-02-03 07:00:00.000000')"
+        ), {'med_id': med_id, 'user_id': user.id})
+        conn.execute(text("DELETE FROM schema_migrations WHERE name = 'native_temporal_columns'"))
+
+    database._migrate_temporal_columns(batch_size=2)
+
+    medication = db.get_medication(med_id, user.id)
+    assert medication['start_date'] == '2032-02-01'
+    assert medication['end_date'] is None
+
+    logs = db.get_medication_logs(user.id, med_id, iso=False)
+    assert [(log['scheduled_time'], log['taken_time']) for log in logs] == [
+        # Unparseable required values fall back to created_at
+        (datetime(2032, 2, 3, 7, 0), None),
+        (datetime(2032, 2, 2, 8, 0), datetime(2032, 2, 2, 8, 10)),
+    ]
+    assert db.materialize_doses(date(2032, 2, 4).isoformat()) >= 1
+
+
+if __name__ == "__main__":
+    test_timestamps_are_native_and_serialized_as_iso()
+    test_date_only_end_date_includes_the_whole_day()
+    test_offsets_are_converted_to_server_local_time()
+    test_legacy_string_values_are_migrated()
+    print("✅ SUCCESS: Temporal column tests passed.")
@@ -9,6 +9,18 @@ export default function Dashboard() {
     useEffect(() => {
         loadDashboard();
         loadTodayLogs();
+
+        // Refetch when the data changes instead of polling; `ready` follows every
+        // (re)connect, so only a later one can have missed changes
+        let connected = false;
+        return api.subscribeEvents((type) => {
+            if (type === 'ready' && !connected) {
+                connected = true;
+                return;
+            }
+            loadTodayLogs();
+            loadDashboard();
+        });
     }, []);
 
     const loadDashboard = async () => {
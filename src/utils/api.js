@@ -3,16 +3,26 @@ const API_BASE_URL = rawApiUrl.endsWith('/api') ? rawApiUrl : `${rawApiUrl}/api`
 
 const getHeaders = () => {
     const token = localStorage.getItem('google_token');
+    const lastWrite = sessionStorage.getItem('last_write');
     return {
         'Content-Type': 'application/json',
-        ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+        ...(token ? { 'Authorization': `Bearer ${token}` } : {}),
+        // Keeps reads right after our own writes off lagging replicas, whichever server worker answers
+        ...(lastWrite ? { 'X-Last-Write': lastWrite } : {})
     };
 };
 
+const request = async (url, options) => {
+    const response = await fetch(url, options);
+    const lastWrite = response.headers.get('X-Last-Write');
+    if (lastWrite) sessionStorage.setItem('last_write', lastWrite);
+    return response;
+};
+
 export const api = {
     // Auth
     login: async (idToken) => {
-        const response = await fetch(`${API_BASE_URL}/auth/google`, {
+        const response = await request(`${API_BASE_URL}/auth/google`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -24,14 +34,14 @@ export const api = {
 
     // Medications
     getMedications: async () => {
-        const response = await fetch(`${API_BASE_URL}/medications`, {
+        const response = await request(`${API_BASE_URL}/medications`, {
             headers: getHeaders()
         });
         return response.json();
     },
 
     addMedication: async (medication) => {
-        const response = await fetch(`${API_BASE_URL}/medications`, {
+        const response = await request(`${API_BASE_URL}/medications`, {
             method: 'POST',
             headers: getHeaders(),
             body: JSON.stringify(medication),
@@ -40,7 +50,7 @@ export const api = {
     },
 
     updateMedication: async (id, medication) => {
-        const response = await fetch(`${API_BASE_URL}/medications/${id}`, {
+        const response = await request(`${API_BASE_URL}/medications/${id}`, {
             method: 'PUT',
             headers: getHeaders(),
             body: JSON.stringify(medication),
@@ -49,7 +59,7 @@ export const api = {
     },
 
     deleteMedication: async (id) => {
-        const response = await fetch(`${API_BASE_URL}/medications/${id}`, {
+        const response = await request(`${API_BASE_URL}/medications/${id}`, {
             method: 'DELETE',
             headers: getHeaders(),
         });
@@ -63,14 +73,14 @@ export const api = {
         if (startDate) params.append('start_date', startDate);
         if (endDate) params.append('end_date', endDate);
 
-        const response = await fetch(`${API_BASE_URL}/logs?${params}`, {
+        const response = await request(`${API_BASE_URL}/logs?${params}`, {
             headers: getHeaders()
         });
         return response.json();
     },
 
     logMedication: async (log) => {
-        const response = await fetch(`${API_BASE_URL}/logs`, {
+        const response = await request(`${API_BASE_URL}/logs`, {
             method: 'POST',
             headers: getHeaders(),
             body: JSON.stringify(log),
@@ -79,7 +89,7 @@ export const api = {
     },
 
     updateLog: async (id, status, takenTime) => {
-        const response = await fetch(`${API_BASE_URL}/logs/${id}`, {
+        const response = await request(`${API_BASE_URL}/logs/${id}`, {
             method: 'PUT',
             headers: getHeaders(),
             body: JSON.stringify({ status, taken_time: takenTime }),
@@ -89,7 +99,7 @@ export const api = {
 
     // ML Features
     recognizePill: async (imageData) => {
-        const response = await fetch(`${API_BASE_URL}/ml/recognize-pill`, {
+        const response = await request(`${API_BASE_URL}/ml/recognize-pill`, {
             method: 'POST',
             headers: getHeaders(),
             body: JSON.stringify({ image: imageData }),
@@ -98,7 +108,7 @@ export const api = {
     },
 
     predictAdherence: async (medicationId) => {
-        const response = await fetch(`${API_BASE_URL}/ml/predict-adherence`, {
+        const response = await request(`${API_BASE_URL}/ml/predict-adherence`, {
             method: 'POST',
             headers: getHeaders(),
             body: JSON.stringify({ medication_id: medicationId }),
@@ -107,7 +117,7 @@ export const api = {
     },
 
     checkInteractions: async (medications) => {
-        const response = await fetch(`${API_BASE_URL}/ml/check-interactions`, {
+        const response = await request(`${API_BASE_URL}/ml/check-interactions`, {
             method: 'POST',
             headers: getHeaders(),
             body: JSON.stringify({ medications }),
@@ -121,14 +131,14 @@ export const api = {
         if (medicationId) params.append('medication_id', medicationId);
         params.append('days', days);
 
-        const response = await fetch(`${API_BASE_URL}/analytics/adherence?${params}`, {
+        const response = await request(`${API_BASE_URL}/analytics/adherence?${params}`, {
             headers: getHeaders()
         });
         return response.json();
     },
 
     getDashboardData: async () => {
-        const response = await fetch(`${API_BASE_URL}/analytics/dashboard`, {
+        const response = await request(`${API_BASE_URL}/analytics/dashboard`, {
             headers: getHeaders()
         });
         return response.json();
@@ -136,11 +146,73 @@ export const api = {
 
     // Models Info
     getModelsInfo: async () => {
-        const response = await fetch(`${API_BASE_URL}/models/info`, {
+        const response = await request(`${API_BASE_URL}/models/info`, {
             headers: getHeaders()
         });
         return response.json();
     },
+
+    // Change events: calls onEvent(type, data) for each server-sent event until the returned function is called.
+    // Read with fetch, since EventSource cannot send the Authorization header; reconnects when the stream ends,
+    // backing off exponentially (from the server's Retry-After) while it refuses the stream
+    subscribeEvents: (onEvent) => {
+        const controller = new AbortController();
+        const maxBackoffMs = 5 * 60 * 1000;
+        let retryMs = 3000;
+        let failures = 0;
+
+        const handle = (block) => {
+            let type = 'message';
+            const data = [];
+            for (const line of block.split('\n')) {
+                if (line.startsWith('event: ')) type = line.slice(7);
+                else if (line.startsWith('data: ')) data.push(line.slice(6));
+                else if (line.startsWith('retry: ')) retryMs = Number(line.slice(7)) || retryMs;
+            }
+            if (data.length) onEvent(type, JSON.parse(data.join('\n')));
+        };
+
+        const connect = async () => {
+            while (!controller.signal.aborted) {
+                let delayMs = retryMs;
+                try {
+                    const response = await request(`${API_BASE_URL}/events`, {
+                        headers: getHeaders(),
+                        signal: controller.signal
+                    });
+                    if (response.status === 401) return;
+                    if (response.ok) {
+                        failures = 0;
+                        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                        let buffer = '';
+                        for (;;) {
+                            const { value, done } = await reader.read();
+                            if (done) break;
+                            buffer += value;
+                            const blocks = buffer.split('\n\n');
+                            buffer = blocks.pop();
+                            blocks.forEach(handle);
+                        }
+                    } else {
+                        const retryAfter = Number(response.headers.get('Retry-After'));
+                        failures += 1;
+                        delayMs = Math.max(retryAfter * 1000 || 0, retryMs) * 2 ** (failures - 1);
+                    }
+                } catch (error) {
+                    if (controller.signal.aborted) return;
+                    console.error('Event stream error:', error);
+                    failures += 1;
+                    delayMs = retryMs * 2 ** (failures - 1);
+                }
+                // Jitter spreads out clients that were refused together
+                delayMs = Math.min(delayMs, maxBackoffMs) * (0.5 + Math.random() / 2);
+                await new Promise((resolve) => setTimeout(resolve, delayMs));
+            }
+        };
+
+        connect();
+        return () => controller.abort();
+    },
 };
 
 export default api;